@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Las pruebas importan los módulos igual que las aplicaciones: con la raíz del repositorio y v2.0 en sys.path"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / 'v2.0'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Capa de red de los backends: reintentos, hedging por tramo de tamaño y circuit breaker"""
+
+import random
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('deep_translator')
+
+from traductor_comun.backends import (BackendUnavailable, HttpPool, LatencyTracker, RetryPolicy,  # noqa: E402
+                                      StubBackend, TranslationBackend)
+from stub_server import StubSettings, create_server  # noqa: E402
+
+
+class ScriptedBackend(TranslationBackend):
+    """Backend en memoria: cada llamada espera lo indicado en delays y devuelve su número de llamada"""
+    name = "scripted"
+
+    def __init__(self, delays, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _translate(self, text, source, target):
+        with self._lock:
+            call = self.calls
+            self.calls += 1
+        time.sleep(self.delays[call] if call < len(self.delays) else 0)
+        return f"{text}#{call}"
+
+
+@pytest.fixture
+def stub():
+    """Servidor simulado en un puerto libre y un StubBackend que falla rápido"""
+    settings = StubSettings(latency_ms=1, jitter_ms=0)
+    server = create_server(port=0, settings=settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    backend = StubBackend(HttpPool(size=4, timeout=2), f"http://127.0.0.1:{server.server_address[1]}",
+                          retry_policy=RetryPolicy(attempts=1), breaker_threshold=3, probe_interval=0.05)
+    yield settings, backend
+    server.shutdown()
+    server.server_close()
+
+
+def test_backoff_is_bounded_and_jittered():
+    policy = RetryPolicy(attempts=5, base_delay=0.25, max_delay=1.0)
+    random.seed(3)
+    for attempt, ceiling in enumerate([0.25, 0.5, 1.0, 1.0, 1.0]):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 150  # Jitter completo: no hay dos esperas iguales
+        assert max(delays) > ceiling * 0.8
+
+
+def test_p95_is_kept_per_size_bucket():
+    tracker = LatencyTracker(min_samples=20, min_delay=0.0, max_workers=1)
+    assert tracker.hedge_delay(50) is None  # Sin muestras suficientes no se cubre
+    for i in range(100):
+        tracker.record(0.01 + i / 10000, chars=50)
+        tracker.record(1.0 + i / 100, chars=4000)
+    assert tracker.percentile(0.95, 50) == pytest.approx(0.0195)
+    assert tracker.percentile(0.95, 4000) == pytest.approx(1.95)
+    assert tracker.hedge_delay(50) == pytest.approx(0.0195)
+    assert tracker.hedge_delay(100) == tracker.hedge_delay(50)  # Mismo tramo
+    assert tracker.percentile(0.95, 500) is None  # Tramo sin muestras
+    tracker.enabled = False
+    assert tracker.hedge_delay(50) is None
+
+
+def test_hedge_fires_after_p95_and_first_result_wins():
+    tracker = LatencyTracker(min_samples=1, min_delay=0.05, max_workers=4)
+    tracker.record(0.01, chars=5)
+    backend = ScriptedBackend([1.0, 0.0], latency=tracker)
+    start = time.perf_counter()
+    assert backend.translate('hola', 'zh-CN', 'es') == 'hola#1'  # El duplicado responde primero
+    assert time.perf_counter() - start < 0.5
+    assert (tracker.hedges, tracker.hedge_wins) == (1, 1)
+
+
+def test_no_hedge_when_the_request_is_fast_or_disabled():
+    tracker = LatencyTracker(min_samples=1, min_delay=0.2, max_workers=4)
+    tracker.record(0.2, chars=5)
+    backend = ScriptedBackend([0.0, 0.5, 0.0], latency=tracker)
+    assert backend.translate('hola', 'zh-CN', 'es') == 'hola#0'
+    assert backend.translate('hola', 'zh-CN', 'es', hedge=False) == 'hola#1'
+    assert (tracker.hedges, backend.calls) == (0, 2)
+
+
+def test_stub_backend_round_trip(stub):
+    _, backend = stub
+    assert backend.translate('你好', 'zh-CN', 'es') == '[es] 你好'
+
+
+def test_breaker_opens_after_failures_and_closes_after_probe(stub):
+    settings, backend = stub
+    settings.error_rate = 1.0  # Todas las peticiones devuelven 503
+    for _ in range(3):
+        with pytest.raises(Exception) as error:
+            backend.translate('你好', 'zh-CN', 'es')
+        assert isinstance(error.value, RetryPolicy.RETRYABLE)
+    assert not backend.breaker.allow()
+    with pytest.raises(BackendUnavailable):
+        backend.translate('你好', 'zh-CN', 'es')
+
+    settings.error_rate = 0.0  # El servicio se recupera: la sonda cierra el circuito
+    deadline = time.monotonic() + 2
+    while not backend.breaker.allow():
+        assert time.monotonic() < deadline, "el circuito no se cerró"
+        time.sleep(0.01)
+    assert backend.translate('你好', 'zh-CN', 'es') == '[es] 你好'
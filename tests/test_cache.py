@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""TinyLFUCache: peso y capacidad, resize y resistencia a ráfagas de entradas únicas"""
+
+import pytest
+
+from traductor_comun.cache import TinyLFUCache, entry_size
+
+
+def total_size(cache: TinyLFUCache) -> int:
+    return sum(entry_size(key, value) for key, value in cache.items())
+
+
+def test_capacity_is_required_once():
+    with pytest.raises(ValueError):
+        TinyLFUCache()
+    with pytest.raises(ValueError):
+        TinyLFUCache(max_entries=10, max_bytes=1024)
+    with pytest.raises(ValueError):
+        TinyLFUCache(max_entries=0)
+
+
+def test_entry_budget():
+    cache = TinyLFUCache(max_entries=100)
+    for i in range(1000):
+        cache.put(i, str(i))
+        assert len(cache) <= cache.capacity == 100
+    assert cache.weight == len(cache)
+    assert cache.evictions + cache.rejections == 1000 - len(cache)
+
+
+def test_weight_matches_entries_and_stays_within_budget():
+    cache = TinyLFUCache(max_bytes=64 * 1024)
+    for i in range(2000):
+        cache.put(f"clave {i}", "traducción " * (i % 20 + 1))
+        assert cache.weight <= cache.capacity
+    assert cache.weight == total_size(cache)
+
+
+def test_updating_a_value_reweighs_it():
+    cache = TinyLFUCache(max_bytes=64 * 1024)
+    cache.put('a', 'corta')
+    before = cache.weight
+    cache.put('a', 'larga ' * 100)
+    assert cache.weight == total_size(cache) > before
+    cache.put('a', 'corta')
+    assert cache.weight == before
+
+
+def test_oversized_entry_is_rejected_without_flushing():
+    cache = TinyLFUCache(max_bytes=8 * 1024)
+    for i in range(10):
+        cache.put(i, 'x')
+    cache.put('enorme', 'x' * 100_000)
+    assert 'enorme' not in cache
+    assert all(i in cache for i in range(10))
+    assert cache.rejections == 1
+
+
+def test_resize_down_evicts_only_what_is_needed():
+    cache = TinyLFUCache(max_bytes=256 * 1024)
+    for i in range(500):
+        cache.put(i, f"traducción {i}")
+    entries = len(cache)
+
+    cache.resize(16 * 1024)
+    assert cache.capacity == 16 * 1024
+    assert cache.weight <= cache.capacity
+    assert cache.weight == total_size(cache)
+    assert 0 < len(cache) < entries
+
+    # Al crecer no se pierde nada y las entradas nuevas vuelven a caber
+    kept = len(cache)
+    cache.resize(256 * 1024)
+    assert len(cache) == kept
+    for i in range(500, 600):
+        cache.put(i, f"traducción {i}")
+    assert len(cache) > kept
+    assert cache.weight == total_size(cache)
+
+
+def test_frequent_keys_survive_a_scan():
+    cache = TinyLFUCache(max_entries=100)
+    hot = [f"frecuente {i}" for i in range(20)]
+    for _ in range(5):
+        for key in hot:
+            cache.put(key, key.upper())
+            cache.get(key)
+    for i in range(5000):
+        cache.put(f"única {i}", 'x')
+    assert all(cache.peek(key) == key.upper() for key in hot)
+
+
+def test_get_and_peek_statistics():
+    cache = TinyLFUCache(max_entries=10)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.peek('a') == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    with pytest.raises(KeyError):
+        cache['b']
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""CacheSnapshot: exportación desde SQLite, búsqueda por resumen y versión del formato"""
+
+import pytest
+
+from cache_snapshot import HEADER, MAGIC, CacheSnapshot, export_store, write_snapshot
+from traductor_comun.codec import ValueCodec
+from traductor_comun.translation_store import TranslationStore
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    db = tmp_path / 'traducciones.sqlite3'
+    store = TranslationStore(db, codec=ValueCodec(threshold=16, train_after=4))
+    for i in range(100):
+        store.put('zh-CN', 'es', 'stub@1', f"句子{i}。", f"Oración número {i} traducida al español. " * 3)
+    store.put('zh-CN', 'en', 'stub@1', '句子0。', 'Sentence 0.')
+    store.put('zh-CN', 'es', 'stub@2', '句子0。', 'Oración cero.')
+    store.close()
+
+    out = tmp_path / 'traducciones.snap'
+    assert export_store(db, out) == 102
+    snapshot = CacheSnapshot(out)
+    yield snapshot
+    snapshot.close()
+
+
+def test_lookup_decompresses_exported_values(snapshot):
+    assert len(snapshot) == 102
+    for i in range(100):
+        assert snapshot.get('zh-CN', 'es', 'stub@1', f"句子{i}。") == f"Oración número {i} traducida al español. " * 3
+
+
+def test_lookup_uses_the_full_key(snapshot):
+    assert snapshot.get('zh-CN', 'en', 'stub@1', '句子0。') == 'Sentence 0.'
+    assert snapshot.get('zh-CN', 'es', 'stub@2', '句子0。') == 'Oración cero.'
+    assert snapshot.get('zh-CN', 'es', 'stub@1', ' 句子0。 ').startswith('Oración número 0')  # Texto normalizado
+    assert snapshot.get('zh-CN', 'es', 'stub@3', '句子0。') is None
+    assert snapshot.get('zh-CN', 'es', 'stub@1', '没有。') is None
+    assert (snapshot.reads, snapshot.hits) == (5, 3)
+
+
+def test_empty_snapshot(tmp_path):
+    path = tmp_path / 'vacia.snap'
+    assert write_snapshot([], path) == 0
+    snapshot = CacheSnapshot(path)
+    assert snapshot.get('zh-CN', 'es', 'stub@1', '你好。') is None
+    snapshot.close()
+
+
+def test_other_format_versions_are_rejected(tmp_path):
+    path = tmp_path / 'antigua.snap'
+    path.write_bytes(HEADER.pack(MAGIC, 1, 0, HEADER.size, HEADER.size))
+    with pytest.raises(ValueError):
+        CacheSnapshot(path)
+    path.write_bytes(b'no es una instantanea'.ljust(HEADER.size, b'\0'))
+    with pytest.raises(ValueError):
+        CacheSnapshot(path)
+
+
+def test_rewrite_keeps_open_readers_valid(tmp_path):
+    path = tmp_path / 'traducciones.snap'
+    digest = TranslationStore.digest('zh-CN', 'es', 'stub@1', '你好。')
+    write_snapshot([(digest, 'Hola.')], path)
+    snapshot = CacheSnapshot(path)
+
+    write_snapshot([(digest, '¡Hola!')], path)
+    assert snapshot.get('zh-CN', 'es', 'stub@1', '你好。') == 'Hola.'
+    snapshot.close()
+    reopened = CacheSnapshot(path)
+    assert reopened.get('zh-CN', 'es', 'stub@1', '你好。') == '¡Hola!'
+    reopened.close()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""ValueCodec: ida y vuelta con y sin diccionario, y diccionarios persistidos en la caché SQLite"""
+
+import sqlite3
+
+import pytest
+
+from traductor_comun.codec import MissingDictionary, ValueCodec, train_dictionary
+from traductor_comun.translation_store import TranslationStore
+
+PARAGRAPHS = [
+    f"El traductor guarda el párrafo número {i} en la caché persistente para no volver a pedirlo "
+    f"al proveedor de traducción cuando el usuario abre de nuevo el mismo documento."
+    for i in range(64)
+]
+
+
+def test_short_values_stay_text():
+    codec = ValueCodec(threshold=128)
+    assert codec.encode('Hola.') == 'Hola.'
+    assert codec.decode('Hola.') == 'Hola.'
+
+
+def test_round_trip_without_dictionary():
+    codec = ValueCodec(threshold=16, train_after=0)
+    text = "traducción repetida " * 50
+    stored = codec.encode(text)
+    assert isinstance(stored, bytes) and len(stored) < len(text.encode('utf-8'))
+    assert codec.decode(stored) == text
+
+
+def test_trained_dictionary_round_trip():
+    codec = ValueCodec(threshold=16, train_after=8)
+    for text in PARAGRAPHS[:8]:
+        assert codec.decode(codec.encode(text)) == text
+    assert codec.current and len(codec.dictionaries) == 1
+
+    stored = [codec.encode(text) for text in PARAGRAPHS[8:]]
+    assert all(isinstance(value, bytes) for value in stored)
+    assert [codec.decode(value) for value in stored] == PARAGRAPHS[8:]
+
+
+def test_unknown_dictionary_raises_until_added():
+    zdict = train_dictionary(PARAGRAPHS)
+    writer = ValueCodec(threshold=16, train_after=0)
+    writer.add_dictionary(zdict)
+    stored = writer.encode(PARAGRAPHS[0])
+
+    reader = ValueCodec(threshold=16, train_after=0)
+    with pytest.raises(MissingDictionary):
+        reader.decode(stored)
+    assert reader.add_dictionary(zdict, make_current=False) == writer.current
+    assert reader.decode(stored) == PARAGRAPHS[0]
+
+
+def test_dictionary_persists_with_the_store(tmp_path):
+    path = tmp_path / 'traducciones.sqlite3'
+    store = TranslationStore(path, codec=ValueCodec(threshold=16, train_after=8))
+    for i, text in enumerate(PARAGRAPHS):
+        store.put('zh-CN', 'es', 'stub@1', f"段落{i}", text)
+    store.close()
+    trained = store.codec.current
+
+    # Otro proceso: el códec nuevo carga el diccionario desde la propia base
+    reopened = TranslationStore(path, codec=ValueCodec(threshold=16, train_after=8))
+    assert trained in reopened.codec.dictionaries
+    assert [reopened.get('zh-CN', 'es', 'stub@1', f"段落{i}") for i in range(len(PARAGRAPHS))] == PARAGRAPHS
+    reopened.close()
+
+    # Los valores posteriores al entrenamiento están comprimidos con él
+    with sqlite3.connect(str(path)) as conn:
+        values = [row[0] for row in conn.execute("SELECT translation FROM translations")]
+    assert any(isinstance(value, bytes) for value in values)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""AdaptiveRateLimiter: AIMD con un reloj simulado"""
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('deep_translator')
+
+from traductor_comun.backends import AdaptiveRateLimiter  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def limiter(clock, **kwargs):
+    options = dict(rate=20.0, min_rate=0.5, max_rate=50.0, burst=8, increase=0.5, decrease=0.5, cooldown=1.0)
+    options.update(kwargs)
+    return AdaptiveRateLimiter(clock=clock, **options)
+
+
+def test_burst_of_throttles_decreases_once_per_cooldown():
+    clock = FakeClock()
+    bucket = limiter(clock)
+    for _ in range(8):  # Las peticiones en vuelo vuelven con 429 casi a la vez
+        bucket.on_throttle()
+        clock.advance(0.05)
+    assert bucket.rate == 10.0
+    assert bucket.throttled == 8
+
+    clock.advance(0.7)  # Ya pasó el enfriamiento: un 429 nuevo es otro evento
+    bucket.on_throttle()
+    assert bucket.rate == 5.0
+
+
+def test_cooldown_stretches_with_the_rtt():
+    clock = FakeClock()
+    bucket = limiter(clock)
+    bucket.on_success(rtt=1.5)
+    rate = bucket.rate
+    bucket.on_throttle()
+    clock.advance(2.0)  # Más que cooldown pero menos que dos RTT
+    bucket.on_throttle()
+    assert bucket.rate == pytest.approx(rate / 2)
+    clock.advance(1.1)
+    bucket.on_throttle()
+    assert bucket.rate == pytest.approx(rate / 4)
+
+
+def test_additive_recovery_of_increase_per_second():
+    clock = FakeClock()
+    bucket = limiter(clock, rate=10.0)
+    for _ in range(10):  # Diez segundos respondiendo al ritmo permitido
+        for _ in range(round(bucket.rate)):
+            bucket.on_success()
+        clock.advance(1.0)
+    assert bucket.rate == pytest.approx(10.0 + 10 * 0.5, abs=0.5)
+
+
+def test_rate_stays_within_bounds():
+    clock = FakeClock()
+    bucket = limiter(clock)
+    for _ in range(20):
+        bucket.on_throttle()
+        clock.advance(1.0)
+    assert bucket.rate == 0.5
+
+    for _ in range(20000):
+        bucket.on_success()
+    assert bucket.rate == 50.0
+
+
+def test_tokens_allow_a_burst_then_follow_the_rate():
+    clock = FakeClock()
+    bucket = limiter(clock, rate=4.0, burst=3)
+    for _ in range(3):
+        bucket.acquire()  # La ráfaga no espera
+    assert bucket.tokens == pytest.approx(0.0)
+    clock.advance(0.5)  # Medio segundo a 4 req/s: dos tokens nuevos
+    bucket.acquire()
+    bucket.acquire()
+    assert bucket.tokens == pytest.approx(0.0)
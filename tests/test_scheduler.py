@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""PriorityScheduler: orden por prioridad y presupuesto de peticiones en vuelo por clase"""
+
+import threading
+import time
+
+import pytest
+
+from traductor_comun.scheduler import BULK, INTERACTIVE, PREFETCH, PriorityScheduler, classify
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condición no alcanzada"
+        time.sleep(0.005)
+
+
+def test_classify():
+    assert classify(100) == INTERACTIVE
+    assert classify(30000) == BULK
+    assert classify(30000, bulk_threshold=50000) == INTERACTIVE
+    assert classify(100, background=True) == PREFETCH
+
+
+def test_interactive_overtakes_queued_bulk():
+    scheduler = PriorityScheduler(workers=1)
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit(BULK, gate.wait)
+    wait_until(lambda: scheduler.stats()[BULK]['running'] == 1)
+
+    futures = [scheduler.submit(BULK, order.append, 'bulk'),
+               scheduler.submit(PREFETCH, order.append, 'prefetch'),
+               scheduler.submit(INTERACTIVE, order.append, 'interactive')]
+    gate.set()
+    for future in [blocker, *futures]:
+        future.result(timeout=2)
+
+    assert order == ['interactive', 'prefetch', 'bulk']
+    assert scheduler.overtaken >= 1
+    scheduler.shutdown()
+
+
+def test_budget_caps_requests_in_flight():
+    scheduler = PriorityScheduler(workers=3, budgets={BULK: 1})
+    gate = threading.Event()
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def task():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        gate.wait()
+        with lock:
+            running.pop()
+
+    bulk = [scheduler.submit(BULK, task) for _ in range(3)]
+    wait_until(lambda: scheduler.stats()[BULK]['running'] == 1)
+    # Los hilos libres siguen disponibles para el editor aunque haya masivas en cola
+    assert scheduler.submit(INTERACTIVE, lambda: 'ok').result(timeout=2) == 'ok'
+    assert scheduler.stats()[BULK] == {'queued': 2, 'running': 1, 'completed': 0}
+
+    gate.set()
+    for future in bulk:
+        future.result(timeout=2)
+    assert max(peak) == 1
+    scheduler.shutdown()
+
+
+def test_cancelled_task_does_not_run():
+    scheduler = PriorityScheduler(workers=1)
+    gate = threading.Event()
+    ran = []
+    scheduler.submit(INTERACTIVE, gate.wait)
+    queued = scheduler.submit(INTERACTIVE, ran.append, 'x')
+    assert queued.cancel()
+    gate.set()
+    scheduler.submit(INTERACTIVE, lambda: None).result(timeout=2)
+    assert ran == []
+    scheduler.shutdown()
+
+
+def test_exceptions_reach_the_future():
+    scheduler = PriorityScheduler(workers=1)
+    future = scheduler.submit(INTERACTIVE, int, 'no es un número')
+    with pytest.raises(ValueError):
+        future.result(timeout=2)
+    scheduler.shutdown()
+
+
+def test_unknown_class_is_rejected():
+    scheduler = PriorityScheduler(workers=1)
+    with pytest.raises(ValueError):
+        scheduler.submit('urgent', lambda: None)
+    scheduler.shutdown()
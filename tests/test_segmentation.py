@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Segmentación compartida: spans contiguos, máximo por span y cortes por cláusula o espacio"""
+
+import random
+
+import pytest
+
+from traductor_comun.segmentation import (MARKER_CHARS, join_segments, normalize_sentence, pack_spans, segment_spans,
+                                          segment_text, sentence_spans, split_segments)
+
+SAMPLES = [
+    "你好。今天天气很好！你去哪儿？我去学校……\n\n明天见。",
+    "Hola. ¿Cómo estás? Muy bien, gracias! Versión 2.0 lista...\nAdiós",
+    "他说：“我们走吧。”然后离开了。The end.",
+    "没有标点的一段很长很长的中文文字" * 20,
+    "   \n  espacios al principio. y al final.   \n",
+]
+
+
+def assert_contiguous(text, spans):
+    """Los spans cubren el texto de principio a fin, sin huecos ni solapes ni spans vacíos"""
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for (_, end), (start, _) in zip(spans, spans[1:]):
+        assert end == start
+    assert all(start < end for start, end in spans)
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+@pytest.mark.parametrize('max_chars', [None, 5, 12, 40, 1000])
+def test_spans_cover_text_within_limit(text, max_chars):
+    spans = segment_spans(text, max_chars)
+    assert_contiguous(text, spans)
+    if max_chars:
+        assert max(end - start for start, end in spans) <= max_chars
+    assert ''.join(segment_text(text, max_chars)) == text
+
+
+def test_random_text_invariants():
+    rng = random.Random(7)
+    alphabet = "中文字句，。！？、；：abc de f,.;:!? \n"
+    for _ in range(200):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 300)))
+        max_chars = rng.randint(1, 60)
+        spans = segment_spans(text, max_chars)
+        assert_contiguous(text, spans)
+        assert max(end - start for start, end in spans) <= max_chars
+
+
+def test_cjk_sentence_endings():
+    assert segment_text("你好。你好吗？很好！") == ["你好。", "你好吗？", "很好！"]
+    assert segment_text("他说：“走吧。”好的。") == ["他说：“走吧。”", "好的。"]
+    assert segment_text("等一下……好") == ["等一下……", "好"]
+
+
+def test_latin_sentence_endings():
+    assert segment_text("Hola. Adiós!") == ["Hola. ", "Adiós!"]
+    # El punto solo cierra oración si le sigue un espacio o el final: no parte números ni siglas
+    assert segment_text("Versión 2.0 lista. Fin") == ["Versión 2.0 lista. ", "Fin"]
+    assert segment_text("línea uno\nlínea dos") == ["línea uno\n", "línea dos"]
+
+
+def test_long_sentence_splits_at_clauses_first():
+    text = "第一部分很长，第二部分也很长，第三部分。"
+    assert segment_text(text, 16) == ["第一部分很长，第二部分也很长，", "第三部分。"]
+
+
+def test_long_clause_splits_at_spaces_before_blind_cuts():
+    text = "uno dos tres cuatro cinco seis siete ocho."
+    pieces = segment_text(text, 12)
+    assert ''.join(pieces) == text
+    # Ningún corte parte una palabra
+    assert all(piece.endswith(' ') or piece == pieces[-1] for piece in pieces)
+
+
+def test_text_without_separators_is_cut_blindly():
+    text = "字" * 25
+    assert segment_text(text, 10) == ["字" * 10, "字" * 10, "字" * 5]
+
+
+def test_sentence_spans_of_a_range():
+    text = "前面。中间一。中间二。后面。"
+    assert sentence_spans(text, 3, 10) == [(3, 7), (7, 10)]
+
+
+def test_normalize_sentence():
+    assert normalize_sentence("  你好  世界 ") == "你好 世界"
+    assert normalize_sentence("ＡＢＣ１２３") == "ABC123"
+
+
+def test_pack_spans_keeps_order_and_limit():
+    text = "你好。" * 50
+    spans = segment_spans(text)
+    requests = pack_spans(spans, 20)
+    assert [span for request in requests for span in request] == spans
+    assert all(request[-1][1] - request[0][0] <= 20 for request in requests)
+
+
+def test_packed_requests_with_markers_fit_max_chars():
+    texts = ["字" * random.Random(i).randint(1, 40) for i in range(300)]
+    spans, pos = [], 0
+    for text in texts:
+        spans.append((pos, pos + len(text)))
+        pos += len(text)
+    for max_chars in (30, 100, 500):
+        for request in pack_spans(spans, max_chars, separator=MARKER_CHARS):
+            if len(request) > 1:
+                packed = join_segments(["字" * (end - start) for start, end in request])
+                assert len(packed) <= max_chars
+
+
+def test_segments_round_trip():
+    texts = [f"Oración {i}." for i in range(120)]
+    assert split_segments(join_segments(texts), len(texts)) == texts
+    # Los proveedores suelen unir líneas o añadir espacios alrededor de los marcadores
+    assert split_segments(join_segments(texts).replace('\n', ' '), len(texts)) == texts
+
+
+def test_marker_variants_with_spaces_are_accepted():
+    assert split_segments("[[ 0 ]] Hola [[1 ]]Mundo [[ 2]]\n¡Adiós!", 3) == ["Hola", "Mundo", "¡Adiós!"]
+
+
+@pytest.mark.parametrize('response', [
+    "[[0]] Hola",  # Falta un marcador
+    "[[0]] Hola [[0]] Mundo",  # Duplicado
+    "[[1]] Mundo [[0]] Hola",  # Reordenado
+    "[[0]] Hola [[1]] Mundo [[2]] sobra",  # Sobra uno
+    "Prefijo [[0]] Hola [[1]] Mundo",  # Texto antes del primer marcador
+    "[[0]] Hola [[1]]  ",  # Segmento vacío
+    "Hola\nMundo",  # Sin marcadores
+    "",
+])
+def test_unreliable_responses_are_rejected(response):
+    assert split_segments(response, 2) is None
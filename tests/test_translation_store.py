@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""TranslationStore: modo WAL, escritor por lotes en segundo plano, get_many y claves"""
+
+import sqlite3
+
+import pytest
+
+from traductor_comun.translation_store import TranslationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TranslationStore(tmp_path / 'traducciones.sqlite3', flush_interval=0.05)
+    yield store
+    store.close()
+
+
+def rows_on_disk(store: TranslationStore) -> int:
+    with sqlite3.connect(str(store.path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+def test_database_uses_wal(store):
+    with sqlite3.connect(str(store.path)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_put_is_readable_before_it_reaches_disk(store):
+    store.put('zh-CN', 'es', 'stub@1', '你好。', 'Hola.')
+    assert store.get('zh-CN', 'es', 'stub@1', '你好。') == 'Hola.'
+    store.flush()
+    assert rows_on_disk(store) == 1
+    assert store.get('zh-CN', 'es', 'stub@1', '你好。') == 'Hola.'
+
+
+def test_writes_are_committed_in_batches(tmp_path):
+    store = TranslationStore(tmp_path / 'traducciones.sqlite3', batch_size=50)
+    for i in range(200):
+        store.put('zh-CN', 'es', 'stub@1', f"句子{i}。", f"Oración {i}.")
+    store.close()  # Confirma lo pendiente antes de cerrar
+    assert store.writes == 200
+    assert 4 <= store.batches < 200
+    assert rows_on_disk(store) == 200
+
+
+def test_closed_store_ignores_calls(store):
+    store.put('zh-CN', 'es', 'stub@1', '你好。', 'Hola.')
+    store.close()
+    store.put('zh-CN', 'es', 'stub@1', '再见。', 'Adiós.')
+    assert store.get('zh-CN', 'es', 'stub@1', '你好。') is None
+    assert store.get_many('zh-CN', 'es', 'stub@1', ['你好。']) == {}
+    assert rows_on_disk(store) == 1
+
+
+def test_get_many_returns_the_requested_texts(store):
+    for i in range(1200):  # Más de una consulta (QUERY_CHUNK)
+        store.put('zh-CN', 'es', 'stub@1', f"句子{i}。", f"Oración {i}.")
+    store.flush()
+    store.put('zh-CN', 'es', 'stub@1', '未写入。', 'Pendiente.')
+
+    texts = [f"句子{i}。" for i in range(0, 1200, 2)] + [' 句子1。 ', '未写入。', '没有。']
+    found = store.get_many('zh-CN', 'es', 'stub@1', texts)
+    assert found[' 句子1。 '] == 'Oración 1.'  # Variante de espacios: misma entrada, clave original
+    assert found['未写入。'] == 'Pendiente.'
+    assert '没有。' not in found
+    assert all(found[f"句子{i}。"] == f"Oración {i}." for i in range(0, 1200, 2))
+
+
+def test_keys_separate_languages_and_backend_versions(store):
+    store.put('zh-CN', 'es', 'stub@1', '你好。', 'Hola.')
+    store.put('zh-CN', 'en', 'stub@1', '你好。', 'Hello.')
+    store.put('zh-CN', 'es', 'stub@2', '你好。', '¡Hola!')
+    assert store.get('zh-CN', 'es', 'stub@1', '你好。') == 'Hola.'
+    assert store.get('zh-CN', 'en', 'stub@1', '你好。') == 'Hello.'
+    assert store.get('zh-CN', 'es', 'stub@2', '你好。') == '¡Hola!'
+    assert store.get('auto', 'es', 'stub@1', '你好。') is None
+
+
+def test_multiline_texts_keep_their_line_breaks():
+    # Una oración se normaliza; un texto de varias líneas no se confunde con su versión en una línea
+    assert TranslationStore.digest('zh-CN', 'es', 'stub@1', ' 你好。 ') == \
+        TranslationStore.digest('zh-CN', 'es', 'stub@1', '你好。')
+    assert TranslationStore.digest('zh-CN', 'es', 'stub@1', '你好\n世界') != \
+        TranslationStore.digest('zh-CN', 'es', 'stub@1', '你好 世界')
+
+
+def test_data_survives_reopening(tmp_path):
+    path = tmp_path / 'traducciones.sqlite3'
+    store = TranslationStore(path)
+    store.put('zh-CN', 'es', 'stub@1', '你好。', 'Hola.')
+    store.close()
+    reopened = TranslationStore(path)
+    assert reopened.get('zh-CN', 'es', 'stub@1', '你好。') == 'Hola.'
+    assert len(reopened) == 1
+    reopened.close()
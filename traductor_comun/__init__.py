@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+Módulos compartidos por la v1.0 (Tkinter) y la v2.0 (PyQt6)
+Cada aplicación añade la raíz del repositorio a sys.path antes de importarlos,
+y build.bat la pasa a PyInstaller con --paths.
+
+    segmentation       oraciones y cláusulas como spans, empaquetado de peticiones
+    scheduler          pool de hilos con colas por prioridad
+    cache              caché W-TinyLFU con presupuesto en entradas o bytes
+    codec              compresión zlib con diccionario entrenado
+    translation_store  caché persistente de traducciones en SQLite
+    backends           backends de traducción, pool HTTP, limitador, reintentos y circuit breaker
+"""
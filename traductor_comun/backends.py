@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backends de traducción y la capa de red que comparten
+Todas las traducciones remotas pasan por TranslationBackend.translate(): un
+limitador AIMD común a todo el proceso, reintentos con backoff y jitter, un
+circuit breaker que falla al instante mientras el proveedor está caído y, si se
+le da un LatencyTracker, peticiones de cobertura (hedging) para la cola lenta.
+Las conexiones salen de un HttpPool con keep-alive.
+
+Cada aplicación crea su pool y su limitador una sola vez y se los pasa a los
+backends, así todos los hilos comparten conexiones y ritmo.
+
+Uso:
+    pool = HttpPool(size=8, timeout=5)
+    backend = GoogleBackend(pool, limiter=AdaptiveRateLimiter())
+    backend.translate('你好', 'zh-CN', 'es')  # 'Hola'
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, List, Optional, TypeVar
+
+import requests
+from bs4 import BeautifulSoup
+from deep_translator.constants import BASE_URLS
+from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+from requests.adapters import HTTPAdapter
+
+from .translation_store import TranslationStore
+
+T = TypeVar('T')
+
+
+class HttpPool:
+    """Cliente HTTP compartido y thread-safe con keep-alive, dimensionado a la concurrencia configurada"""
+
+    def __init__(self, size: int = 8, timeout: float = 5.0):
+        self.size = size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size, pool_block=True)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+        # Un hueco por conexión: medir cuánto espera cada petición por una libre
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.wait_time = 0.0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Envía la petición reutilizando una conexión del pool"""
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.wait_time += waited
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, float]:
+        """Conexiones abiertas, conexiones nuevas, ratio de reutilización y espera media"""
+        new_connections = 0
+        idle = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            if pool.pool is not None:
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+
+        with self._lock:
+            total, active, wait_time = self.requests, self.active, self.wait_time
+        return {
+            'requests': total,
+            'open_connections': idle + active,
+            'new_connections': new_connections,
+            'reuse_ratio': 1 - new_connections / total if total else 0.0,
+            'avg_wait_ms': wait_time / total * 1000 if total else 0.0,
+        }
+
+
+class AdaptiveRateLimiter:
+    """Token bucket cuya tasa se ajusta por AIMD: sube poco a poco con éxitos y cae multiplicativamente con 429"""
+
+    def __init__(self, rate: float = 20.0, min_rate: float = 0.5, max_rate: float = 50.0, burst: int = 8,
+                 increase: float = 0.5, decrease: float = 0.5, cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase  # +req/s por cada segundo de respuestas correctas
+        self.decrease = decrease  # Factor multiplicativo ante throttling
+        self.cooldown = cooldown  # Segundos mínimos entre dos reducciones
+        self.rtt = 0.0  # Media móvil de la latencia de las respuestas correctas
+        self.clock = clock  # Reloj monótono (sustituible en las pruebas)
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.last_decrease = float('-inf')  # La primera reducción nunca espera
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self, rtt: Optional[float] = None):
+        """Aumento aditivo tras una respuesta correcta; rtt alimenta la ventana de enfriamiento"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+            if rtt is not None:
+                self.rtt = rtt if not self.rtt else 0.875 * self.rtt + 0.125 * rtt
+
+    def on_throttle(self):
+        """Reducción multiplicativa ante throttling, una sola por evento de congestión
+
+        Las peticiones que ya estaban en vuelo cuando llegó el primer 429 también pueden
+        volver con 429: durante dos RTT (y nunca menos de `cooldown`) son el mismo evento
+        y no vuelven a reducir la tasa.
+        """
+        with self._lock:
+            now = self.clock()
+            self.throttled += 1
+            if now - self.last_decrease < max(self.cooldown, 2 * self.rtt):
+                return
+            self.last_decrease = now
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class RetryPolicy:
+    """Política de reintentos con backoff exponencial y jitter completo"""
+
+    # Fallos transitorios: throttling, errores HTTP del proveedor, timeouts y conexión
+    RETRYABLE = (TooManyRequests, RequestError, requests.RequestException)
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Espera antes del siguiente intento: aleatoria entre 0 y base·2^intento (acotada)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Latencias recientes por tamaño de petición para calcular el retardo de las peticiones de cobertura"""
+
+    # Límites en caracteres de cada tramo: un lote empaquetado tarda más que una oración sin ir lento
+    BUCKETS = (200, 1000, 3000)
+
+    def __init__(self, window: int = 200, min_samples: int = 20, min_delay: float = 0.2, max_workers: int = 16):
+        self._samples = [deque(maxlen=window) for _ in range(len(self.BUCKETS) + 1)]
+        self._lock = threading.Lock()
+        self.enabled = True
+        self.min_samples = min_samples  # Latencias observadas en el tramo antes de empezar a cubrir
+        self.min_delay = min_delay  # Segundos mínimos antes de lanzar el duplicado
+        self.hedges = 0  # Duplicados lanzados
+        self.hedge_wins = 0  # Duplicados que respondieron antes que el original
+        # Hilos del original y del duplicado, aparte del pool de quien llama
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def _bucket(self, chars: int) -> deque:
+        return self._samples[bisect_left(self.BUCKETS, chars)]
+
+    def record(self, seconds: float, chars: int = 0):
+        with self._lock:
+            self._bucket(chars).append(seconds)
+
+    def record_hedge(self, won: bool = False):
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedges += 1
+
+    def percentile(self, pct: float, chars: int = 0) -> Optional[float]:
+        with self._lock:
+            samples = self._bucket(chars)
+            if not samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def hedge_delay(self, chars: int = 0) -> Optional[float]:
+        """Retardo basado en el p95 del tramo; None si no hay muestras suficientes o el hedging está desactivado"""
+        with self._lock:
+            enough = len(self._bucket(chars)) >= self.min_samples
+        if not self.enabled or not enough:
+            return None
+        return max(self.min_delay, self.percentile(0.95, chars) or 0.0)
+
+
+class BackendUnavailable(Exception):
+    """El circuito está abierto: el backend se considera caído y no se le envían peticiones"""
+
+
+class CircuitBreaker:
+    """Abre el circuito tras N fallos consecutivos y sondea el backend en segundo plano hasta que responde"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, probe: Callable[[], None], threshold: int = 5, probe_interval: float = 5.0):
+        self.probe = probe
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.OPEN or self.failures < self.threshold:
+                return
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        print(f"📴 Circuito abierto tras {self.threshold} fallos: modo sin conexión")
+        threading.Thread(target=self._probe_loop, daemon=True, name="breaker-probe").start()
+
+    def _probe_loop(self):
+        """Sondea el backend hasta que responda y entonces cierra el circuito"""
+        while True:
+            time.sleep(self.probe_interval)
+            try:
+                self.probe()
+            except Exception:
+                continue
+            with self._lock:
+                self.state = self.CLOSED
+                self.failures = 0
+            print(f"🔌 Backend disponible de nuevo tras {time.monotonic() - self.opened_at:.0f}s, circuito cerrado")
+            return
+
+
+class TranslationBackend:
+    """Interfaz común de proveedores de traducción usada por v1 y v2"""
+    name = "base"
+    version = 1  # Subirla al cambiar el proveedor o el tratamiento del texto invalida sus traducciones en caché
+    remote = True  # Los backends de red pasan por el limitador, los reintentos, el hedging y el breaker
+    max_request_chars = 5000  # Texto máximo que acepta el proveedor en una petición
+    retry_policy = RetryPolicy()
+
+    def __init__(self, limiter: Optional[AdaptiveRateLimiter] = None, latency: Optional[LatencyTracker] = None,
+                 retry_policy: Optional[RetryPolicy] = None, breaker_threshold: int = 5,
+                 probe_interval: float = 5.0):
+        # El limitador debe ser el mismo para todos los backends del proceso: lo crea la aplicación.
+        # Un backend local no pasa por la capa de red y no tiene limitador ni breaker
+        self.limiter = (limiter or AdaptiveRateLimiter()) if self.remote else None
+        self.latency = latency  # Sin tracker no hay hedging
+        if retry_policy is not None:
+            self.retry_policy = retry_policy
+        self.breaker = CircuitBreaker(probe=lambda: self._translate("你好", 'zh-CN', 'en'),
+                                      threshold=breaker_threshold,
+                                      probe_interval=probe_interval) if self.remote else None
+        # Segmentos por petición empaquetada: sin tope hasta que el proveedor rompe un reparto
+        self.max_packed_segments: Optional[int] = None
+        self.packing_failures = 0
+        self._packing_lock = threading.Lock()
+
+    @property
+    def cache_id(self) -> str:
+        """Identificador del backend en las claves de caché (el mismo en v1 y v2)"""
+        return f"{self.name}@{self.version}"
+
+    def cache_key(self, text: str, target: str, source: str = 'zh-CN') -> bytes:
+        """Resumen de 16 bytes del texto normalizado, los idiomas y el backend con su versión"""
+        return TranslationStore.digest(source, target, self.cache_id, text)
+
+    def packing_chunks(self, items: List[T]) -> List[List[T]]:
+        """Parte un lote empaquetado en trozos que no superan el tope aprendido de segmentos"""
+        limit = self.max_packed_segments or len(items) or 1
+        return [items[i:i + limit] for i in range(0, len(items), limit)]
+
+    def record_packing(self, segments: int, ok: bool):
+        """Recuerda cómo salió un lote: un reparto roto reduce el tope a la mitad, los correctos lo recuperan"""
+        with self._packing_lock:
+            if ok:
+                if self.max_packed_segments is not None and segments >= self.max_packed_segments:
+                    self.max_packed_segments += 1
+                return
+            self.packing_failures += 1
+            self.max_packed_segments = max(1, min(segments, self.max_packed_segments or segments) // 2)
+
+    def translate(self, text: str, source: str, target: str, retry: Optional[RetryPolicy] = None,
+                  hedge: bool = True) -> str:
+        """Traduce el texto reintentando fallos transitorios; lanza excepción si se agotan los intentos
+
+        hedge=False no lanza duplicados: para lotes masivos un duplicado solo gasta cuota.
+        """
+        if not self.remote:
+            return self._translate(text, source, target)
+
+        policy = retry or self.retry_policy
+        for attempt in range(policy.attempts):
+            # Con el circuito abierto se falla al instante en lugar de esperar timeouts
+            if not self.breaker.allow():
+                raise BackendUnavailable(f"Backend '{self.name}' no disponible")
+            try:
+                if not hedge:
+                    return self._attempt(text, source, target)
+                return self._hedged(text, source, target)
+            except RetryPolicy.RETRYABLE as e:
+                if attempt + 1 >= policy.attempts:
+                    raise
+                delay = policy.backoff(attempt)
+                print(f"🔁 Reintento {attempt + 1}/{policy.attempts - 1} en {delay:.2f}s ({type(e).__name__})")
+                time.sleep(delay)
+        raise RuntimeError("RetryPolicy sin intentos")
+
+    def _hedged(self, text: str, source: str, target: str) -> str:
+        """Si la petición tarda más que el p95 de su tamaño lanza un duplicado y usa la primera respuesta"""
+        tracker = self.latency
+        delay = tracker.hedge_delay(len(text)) if tracker is not None else None
+        if delay is None:
+            return self._attempt(text, source, target)
+
+        primary = tracker.executor.submit(self._attempt, text, source, target)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        tracker.record_hedge()
+        hedge = tracker.executor.submit(self._attempt, text, source, target)
+        error: Optional[BaseException] = None
+        for future in as_completed([primary, hedge]):
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is hedge:
+                tracker.record_hedge(won=True)
+            return result
+        raise error  # type: ignore[misc]
+
+    def _attempt(self, text: str, source: str, target: str) -> str:
+        """Un único intento a través del limitador compartido"""
+        self.limiter.acquire()
+        start = time.perf_counter()
+        try:
+            result = self._translate(text, source, target)
+        except TooManyRequests:
+            # Throttling: el backend responde, solo hay que bajar el ritmo
+            self.limiter.on_throttle()
+            raise
+        except RetryPolicy.RETRYABLE:
+            self.breaker.record_failure()
+            raise
+        elapsed = time.perf_counter() - start
+        self.limiter.on_success(elapsed)
+        self.breaker.record_success()
+        if self.latency is not None:
+            self.latency.record(elapsed, len(text))
+        return result
+
+    def _translate(self, text: str, source: str, target: str) -> str:
+        """Petición concreta del proveedor (implementada por cada backend)"""
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate (endpoint móvil que usa deep-translator) sobre el pool HTTP compartido"""
+    name = "google"
+
+    def __init__(self, pool: HttpPool, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    def _translate(self, text: str, source: str, target: str) -> str:
+        text = text.strip()
+        if not text or source == target:
+            return text
+
+        response = self.pool.get(BASE_URLS['GOOGLE_TRANSLATE'], params={'sl': source, 'tl': target, 'q': text})
+        if response.status_code == 429:
+            raise TooManyRequests()
+        if response.status_code != 200:
+            raise RequestError()
+
+        soup = BeautifulSoup(response.text, 'html.parser')
+        element = soup.find('div', {'class': 'result-container'}) or soup.find('div', {'class': 't0'})
+        if not element:
+            raise TranslationNotFound(text)
+        return element.get_text(strip=True)
+
+
+class StubBackend(TranslationBackend):
+    """Cliente del servidor local simulado (v2.0/stub_server.py) para pruebas sin red"""
+    name = "stub"
+
+    def __init__(self, pool: HttpPool, base_url: str = 'http://127.0.0.1:8765', **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+        self.pool = pool
+
+    def _translate(self, text: str, source: str, target: str) -> str:
+        response = self.pool.post(f"{self.base_url}/translate", data={'sl': source, 'tl': target, 'q': text})
+        if response.status_code == 429:
+            raise TooManyRequests()
+        if response.status_code != 200:
+            raise RequestError()
+        return response.json()['translatedText']
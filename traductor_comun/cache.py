@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de traducciones W-TinyLFU con operaciones O(1)
+Una ventana LRU pequeña recibe las entradas nuevas; al salir de ella solo entran
+en la caché principal (LRU segmentada) si el sketch de frecuencias indica que son
+más populares que la víctima que desplazarían. Así una ráfaga de oraciones únicas
+no expulsa a las frases que se repiten todo el tiempo.
+
+La capacidad se mide en entradas o en bytes (max_bytes): en el segundo caso cada
+entrada pesa lo que ocupan en memoria su clave y su valor, y al superarse el
+presupuesto se desalojan solo las entradas necesarias, nunca la caché entera.
+Con un códec (codec.ValueCodec) los valores de texto largos se guardan
+comprimidos y pesan lo que ocupan comprimidos: caben más en el mismo presupuesto.
+
+Uso:
+    cache = TinyLFUCache(max_bytes=8 * 1024 * 1024)
+    cache.put(clave, traduccion)
+    traduccion = cache.get(clave)  # None si no está
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Nodo del OrderedDict más la entrada con su contador (medido en CPython 3.x de 64 bits)
+ENTRY_OVERHEAD = 150
+
+
+def sizeof(value: Any) -> int:
+    """Bytes que ocupa un valor, recorriendo listas, tuplas y diccionarios (p. ej. resultados de pypinyin)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sizeof(key) + sizeof(item) for key, item in value.items())
+    return size
+
+
+def entry_size(key: Hashable, value: Any) -> int:
+    """Peso de una entrada en una caché medida en bytes"""
+    return sizeof(key) + sizeof(value) + ENTRY_OVERHEAD
+
+
+class FrequencySketch:
+    """Count-min sketch de 4 filas con contadores saturados en 15 y envejecimiento periódico"""
+
+    MAX_COUNT = 15
+    _MIX = 0x9E3779B97F4A7C15  # Un solo producto reparte el hash en cuatro campos de 16 bits
+    _HALVE = bytes(count >> 1 for count in range(256))
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.width = 1 << max(4, min(16, (2 * capacity - 1).bit_length()))
+        self.mask = self.width - 1
+        self.table = bytearray(self.width * 4)
+        # Tras ~10 accesos por entrada se dividen todos los contadores entre dos
+        self.sample_size = 10 * capacity
+        self.additions = 0
+
+    def _indexes(self, key: Hashable) -> Tuple[int, int, int, int]:
+        h = (hash(key) * self._MIX) >> 8
+        mask, width = self.mask, self.width
+        return (h & mask, width + ((h >> 16) & mask),
+                2 * width + ((h >> 32) & mask), 3 * width + ((h >> 48) & mask))
+
+    def increment(self, key: Hashable):
+        table = self.table
+        for idx in self._indexes(key):
+            if table[idx] < self.MAX_COUNT:
+                table[idx] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def frequency(self, key: Hashable) -> int:
+        a, b, c, d = self._indexes(key)
+        table = self.table
+        return min(table[a], table[b], table[c], table[d])
+
+    def _age(self):
+        """Olvida el pasado lejano: coste O(ancho) amortizado entre sample_size accesos"""
+        self.table = bytearray(self.table.translate(self._HALVE))
+        self.additions //= 2
+
+
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ('value', 'hits', 'size')
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.hits = 0
+        self.size = size
+
+
+class TinyLFUCache:
+    """Caché W-TinyLFU de capacidad fija (entradas o bytes) con contador de aciertos por entrada (thread-safe)"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 window_ratio: float = 0.01, protected_ratio: float = 0.8, codec: Optional[Any] = None):
+        if (max_entries is None) == (max_bytes is None):
+            raise ValueError("Indica max_entries o max_bytes")
+        capacity = max_bytes if max_bytes is not None else max_entries
+        if capacity <= 0:
+            raise ValueError("La capacidad debe ser positiva")
+        self.by_bytes = max_bytes is not None
+        self.window_ratio = window_ratio
+        self.protected_ratio = protected_ratio
+        self.codec = codec  # Solo se aplica a valores str; get() siempre devuelve el valor original
+        # Tres segmentos LRU: ventana, periodo de prueba y protegidas (accedidas más de una vez)
+        self._window: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._probation: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._protected: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._window_weight = self._main_weight = self._protected_weight = 0
+        self._sketch = FrequencySketch(self._expected_entries(capacity))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0  # Candidatas descartadas por ser menos populares que la víctima
+        self._set_capacity(capacity)
+
+    @property
+    def capacity(self) -> int:
+        """Presupuesto en entradas o en bytes, según cómo se creó"""
+        return self.window_size + self.main_size
+
+    @property
+    def weight(self) -> int:
+        """Ocupación actual en las mismas unidades que capacity"""
+        return self._window_weight + self._main_weight
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Valor de la clave (contando el acceso) o default"""
+        with self._lock:
+            self._sketch.increment(key)
+            entry = self._touch(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            entry.hits += 1
+            self.hits += 1
+            value = entry.value
+        return self._decode(value)  # Descomprimir fuera del lock
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Valor de la clave sin alterar el orden ni las estadísticas"""
+        with self._lock:
+            entry = self._find(key)
+            if entry is None:
+                return default
+            value = entry.value
+        return self._decode(value)
+
+    def put(self, key: Hashable, value: Any):
+        """Inserta o actualiza; las entradas nuevas pasan por la ventana antes de competir por un hueco"""
+        if self.codec is not None and isinstance(value, str):
+            value = self.codec.encode(value)
+        size = entry_size(key, value) if self.by_bytes else 1
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None:
+                self._reweigh(key, entry, size)
+                entry.value = value
+            else:
+                self._window[key] = _Entry(value, size)
+                self._window_weight += size
+            while self._window_weight > self.window_size and self._window:
+                candidate, candidate_entry = self._window.popitem(last=False)
+                self._window_weight -= candidate_entry.size
+                self._admit(candidate, candidate_entry)
+            self._evict_overflow()
+
+    def update(self, items: Iterable[Tuple[Hashable, Any]]):
+        """Inserta varias entradas en orden (p. ej. al cargar una caché persistida)"""
+        for key, value in items:
+            self.put(key, value)
+
+    def resize(self, capacity: int):
+        """Cambia el presupuesto; si baja, desaloja de forma incremental las entradas menos útiles"""
+        with self._lock:
+            self._set_capacity(capacity)
+            if self._expected_entries(capacity) > 2 * self._sketch.capacity:
+                self._sketch = FrequencySketch(self._expected_entries(capacity))  # Más entradas: más contadores
+            while self._window_weight > self.window_size and self._window:
+                candidate, candidate_entry = self._window.popitem(last=False)
+                self._window_weight -= candidate_entry.size
+                self._admit(candidate, candidate_entry)
+            self._evict_overflow()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._remove(key)
+        return default if entry is None else self._decode(entry.value)
+
+    def clear(self):
+        with self._lock:
+            self._window.clear()
+            self._probation.clear()
+            self._protected.clear()
+            self._window_weight = self._main_weight = self._protected_weight = 0
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Copia de las entradas, de la menos a la más valiosa (reinsertarlas en orden conserva la prioridad)"""
+        with self._lock:
+            segments = (self._probation, self._protected, self._window)
+            entries = [(key, entry.value) for segment in segments for key, entry in segment.items()]
+        return [(key, self._decode(value)) for key, value in entries]
+
+    def hottest(self, n: int = 10) -> List[Tuple[Hashable, int]]:
+        """Las n claves con más aciertos (para diagnóstico; recorre toda la caché)"""
+        with self._lock:
+            entries = [*self._window.items(), *self._probation.items(), *self._protected.items()]
+        ranked = sorted(entries, key=lambda item: item[1].hits, reverse=True)
+        return [(key, entry.hits) for key, entry in ranked[:n]]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self),
+                'weight': self.weight,
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejections': self.rejections,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _expected_entries(self, capacity: int) -> int:
+        """Entradas previstas para dimensionar el sketch; en bytes se estiman ~256 B por traducción"""
+        return max(1, capacity // 256) if self.by_bytes else capacity
+
+    def _set_capacity(self, capacity: int):
+        self.window_size = max(1, int(capacity * self.window_ratio))
+        self.main_size = max(1, capacity - self.window_size)
+        self.protected_size = max(1, int(self.main_size * self.protected_ratio))
+
+    def _decode(self, value: Any) -> Any:
+        if self.codec is not None and isinstance(value, bytes):
+            return self.codec.decode(value)
+        return value
+
+    def _find(self, key: Hashable) -> Optional[_Entry]:
+        return self._window.get(key) or self._probation.get(key) or self._protected.get(key)
+
+    def _remove(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._window.pop(key, None)
+        if entry is not None:
+            self._window_weight -= entry.size
+            return entry
+        entry = self._protected.pop(key, None)
+        if entry is not None:
+            self._protected_weight -= entry.size
+        else:
+            entry = self._probation.pop(key, None)
+        if entry is not None:
+            self._main_weight -= entry.size
+        return entry
+
+    def _reweigh(self, key: Hashable, entry: _Entry, size: int):
+        """Actualiza el peso de una entrada existente cuyo valor cambia"""
+        delta = size - entry.size
+        entry.size = size
+        if key in self._window:
+            self._window_weight += delta
+            return
+        self._main_weight += delta
+        if key in self._protected:
+            self._protected_weight += delta
+
+    def _touch(self, key: Hashable) -> Optional[_Entry]:
+        """Marca la clave como la más reciente de su segmento; un acierto en prueba la protege"""
+        entry = self._window.get(key)
+        if entry is not None:
+            self._window.move_to_end(key)
+            return entry
+        entry = self._protected.get(key)
+        if entry is not None:
+            self._protected.move_to_end(key)
+            return entry
+        entry = self._probation.pop(key, None)
+        if entry is not None:
+            self._protected[key] = entry
+            self._protected_weight += entry.size
+            while self._protected_weight > self.protected_size and len(self._protected) > 1:
+                # La protegida menos reciente vuelve a prueba en lugar de salir de la caché
+                demoted, demoted_entry = self._protected.popitem(last=False)
+                self._protected_weight -= demoted_entry.size
+                self._probation[demoted] = demoted_entry
+        return entry
+
+    def _admit(self, key: Hashable, entry: _Entry):
+        """Una candidata que sale de la ventana entra si cabe o si es más frecuente que las víctimas que desplaza"""
+        if entry.size > self.main_size:
+            self.rejections += 1
+            return
+        frequency = self._sketch.frequency(key)
+        while self._main_weight + entry.size > self.main_size:
+            victims = self._probation or self._protected
+            victim = next(iter(victims))
+            if frequency <= self._sketch.frequency(victim):
+                self.rejections += 1
+                return
+            self._remove(victim)
+            self.evictions += 1
+        self._probation[key] = entry
+        self._main_weight += entry.size
+
+    def _evict_overflow(self):
+        """Tras crecer una entrada o reducir el presupuesto: desalojar por LRU hasta caber"""
+        while self._main_weight > self.main_size:
+            victims = self._probation or self._protected
+            self._remove(next(iter(victims)))
+            self.evictions += 1
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.put(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._find(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
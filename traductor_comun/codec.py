@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compresión transparente de traducciones largas (zlib con diccionario compartido)
+Las traducciones de párrafos ocupan la mayor parte de las cachés. Por encima de
+un umbral se guardan comprimidas con zlib; las primeras que pasan por el códec
+sirven para entrenar un diccionario con los fragmentos que más se repiten, de
+modo que incluso textos de pocas frases comprimen bien. Cada valor comprimido
+lleva el identificador del diccionario con el que se creó, así que los
+diccionarios nuevos conviven con los anteriores (la caché SQLite los persiste).
+
+Formato de un valor comprimido: b'Z' + id del diccionario (u32, 0 = sin
+diccionario) + flujo zlib. Por debajo del umbral, o si no se gana espacio, el
+valor se queda como str.
+
+Uso:
+    codec = ValueCodec(threshold=128)
+    stored = codec.encode(traduccion)  # str o bytes
+    traduccion = codec.decode(stored)
+"""
+
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Union
+
+MARKER = b'Z'
+HEADER = struct.Struct('<cI')
+NO_DICTIONARY = 0
+MAX_DICTIONARY = 32 * 1024  # Ventana de zlib: lo que excede nunca se referencia
+
+Stored = Union[str, bytes]
+
+
+class MissingDictionary(LookupError):
+    """El valor se comprimió con un diccionario que este códec aún no conoce"""
+
+    def __init__(self, dict_id: int):
+        super().__init__(f"Diccionario de compresión desconocido: {dict_id:#010x}")
+        self.dict_id = dict_id
+
+
+def train_dictionary(samples: Iterable[str], size: int = 16 * 1024, max_words: int = 4) -> bytes:
+    """Diccionario zlib con los fragmentos de 1 a max_words palabras que más bytes ahorrarían"""
+    counts: Counter = Counter()
+    for text in set(samples):  # Un mismo valor puede pasar por la caché en memoria y por la de disco
+        words = text.split()
+        for n in range(1, max_words + 1):
+            for i in range(len(words) - n + 1):
+                counts[' '.join(words[i:i + n])] += 1
+
+    # Ahorro aproximado: cada repetición más allá de la primera se convierte en una referencia
+    candidates = sorted(((count - 1) * len(fragment.encode('utf-8')), fragment)
+                        for fragment, count in counts.items() if count > 1)
+    chosen: List[str] = []
+    used = 0
+    joined = ''
+    for _, fragment in reversed(candidates[-4096:]):
+        if fragment in joined:  # Ya cubierto por un fragmento más largo
+            continue
+        cost = len(fragment.encode('utf-8')) + 1
+        if used + cost > size:
+            break
+        chosen.append(fragment)
+        joined += ' ' + fragment
+        used += cost
+    # zlib codifica más barato lo que está cerca del final: los más valiosos van al final
+    return ' '.join(reversed(chosen)).encode('utf-8')
+
+
+class ValueCodec:
+    """Comprime str largos con zlib y un diccionario entrenado sobre los propios valores (thread-safe)"""
+
+    def __init__(self, threshold: int = 128, level: int = 6, train_after: int = 256,
+                 dictionary_size: int = 16 * 1024):
+        self.threshold = threshold  # Bytes UTF-8 por debajo de los que el valor se guarda tal cual
+        self.level = level
+        self.train_after = train_after  # Valores largos observados antes de entrenar (0 = no entrenar)
+        self.dictionary_size = min(dictionary_size, MAX_DICTIONARY)
+        self.dictionaries: Dict[int, bytes] = {}
+        self.current = NO_DICTIONARY
+        self._samples: Optional[List[str]] = []  # None mientras se entrena
+        self._lock = threading.Lock()
+        # Métricas
+        self.compressed = 0
+        self.raw = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.decodes = 0
+        self.decode_seconds = 0.0
+
+    def add_dictionary(self, zdict: bytes, make_current: bool = True) -> int:
+        """Registra un diccionario (p. ej. cargado de disco) y devuelve su id"""
+        dict_id = zlib.adler32(zdict) or 1
+        with self._lock:
+            self.dictionaries[dict_id] = zdict
+            if make_current:
+                self.current = dict_id
+        return dict_id
+
+    def encode(self, text: str) -> Stored:
+        """Valor a guardar: bytes comprimidos si superan el umbral y ocupan menos, si no el propio str"""
+        raw = text.encode('utf-8')
+        if len(raw) < self.threshold:
+            self.raw += 1
+            return text
+        self._observe(text)
+
+        dict_id = self.current
+        if dict_id == NO_DICTIONARY:
+            compressor = zlib.compressobj(self.level)
+        else:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionaries[dict_id])
+        packed = HEADER.pack(MARKER, dict_id) + compressor.compress(raw) + compressor.flush()
+        if len(packed) >= len(raw):
+            self.raw += 1
+            return text
+        self.compressed += 1
+        self.bytes_in += len(raw)
+        self.bytes_out += len(packed)
+        return packed
+
+    def decode(self, value: Stored) -> str:
+        """Texto original; lanza MissingDictionary si falta el diccionario con el que se comprimió"""
+        if isinstance(value, str):
+            return value
+        start = time.perf_counter()
+        marker, dict_id = HEADER.unpack_from(value)
+        if marker != MARKER:
+            raise ValueError("Valor comprimido con formato desconocido")
+        if dict_id == NO_DICTIONARY:
+            decompressor = zlib.decompressobj()
+        else:
+            zdict = self.dictionaries.get(dict_id)
+            if zdict is None:
+                raise MissingDictionary(dict_id)
+            decompressor = zlib.decompressobj(zdict=zdict)
+        text = (decompressor.decompress(value[HEADER.size:]) + decompressor.flush()).decode('utf-8')
+        self.decodes += 1
+        self.decode_seconds += time.perf_counter() - start
+        return text
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'compressed': self.compressed,
+            'raw': self.raw,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.bytes_in / self.bytes_out if self.bytes_out else 1.0,
+            'decodes': self.decodes,
+            'decode_us': self.decode_seconds / self.decodes * 1e6 if self.decodes else 0.0,
+            'dictionaries': len(self.dictionaries),
+        }
+
+    def _observe(self, text: str):
+        """Acumula muestras hasta train_after y entonces entrena el primer diccionario"""
+        if self.current != NO_DICTIONARY or not self.train_after:
+            return
+        with self._lock:
+            if self.current != NO_DICTIONARY or self._samples is None:
+                return
+            self._samples.append(text)
+            if len(self._samples) < self.train_after:
+                return
+            samples = self._samples
+            self._samples = None
+        # Fuera del lock: mientras tanto se sigue comprimiendo sin diccionario
+        zdict = train_dictionary(samples, self.dictionary_size)
+        if zdict:
+            self.add_dictionary(zdict)
+            print(f"🗜️ Diccionario de compresión entrenado ({len(zdict) / 1024:.1f} KB, {len(samples)} muestras)")
+        else:
+            with self._lock:
+                self._samples = []  # Nada se repite todavía: volver a intentarlo con muestras nuevas
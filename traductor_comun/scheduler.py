@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador de peticiones por prioridad
+Un pool fijo de hilos compartido por tres clases de trabajo. Siempre se atiende
+primero la cola de mayor prioridad y cada clase tiene un máximo de peticiones
+en vuelo, de modo que un documento largo nunca ocupa todos los hilos y las
+peticiones del editor adelantan a los fragmentos masivos que esperan en cola.
+
+Uso:
+    scheduler = PriorityScheduler(workers=6, budgets={PREFETCH: 1, BULK: 3})
+    future = scheduler.submit(classify(len(texto)), backend.translate, texto, 'zh-CN', 'es')
+    traduccion = future.result()
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+# Clases de trabajo, de mayor a menor prioridad
+INTERACTIVE = 'interactive'  # Lo que el usuario está esperando en el editor
+PREFETCH = 'prefetch'  # Precargas especulativas (p. ej. el otro idioma)
+BULK = 'bulk'  # Documentos largos
+CLASSES = (INTERACTIVE, PREFETCH, BULK)
+
+_Task = Tuple[Future, Callable, tuple, dict]
+
+
+def classify(length: int, background: bool = False, bulk_threshold: int = 20000) -> str:
+    """Clase de un trabajo según su origen y el tamaño del texto"""
+    if background:
+        return PREFETCH
+    return BULK if length > bulk_threshold else INTERACTIVE
+
+
+class PriorityScheduler:
+    """Pool de hilos con colas por prioridad y presupuesto de concurrencia por clase"""
+
+    def __init__(self, workers: int, budgets: Optional[Dict[str, int]] = None, name: str = "scheduler"):
+        self.workers = workers
+        # Sin presupuesto explícito una clase puede usar todos los hilos
+        self.budgets = {cls: workers for cls in CLASSES}
+        self.budgets.update(budgets or {})
+        self._queues: Dict[str, Deque[_Task]] = {cls: deque() for cls in CLASSES}
+        self._running = {cls: 0 for cls in CLASSES}
+        self.completed = {cls: 0 for cls in CLASSES}
+        self.overtaken = 0  # Veces que una petición adelantó a otras de menor prioridad en cola
+        self._cond = threading.Condition()
+        self._shutdown = False
+        for i in range(workers):
+            threading.Thread(target=self._loop, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, cls: str, fn: Callable, *args, **kwargs) -> Future:
+        """Encola fn en la clase indicada; cancelar el Future lo retira si aún no empezó"""
+        if cls not in self._queues:
+            raise ValueError(f"Clase de trabajo desconocida: {cls}")
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("El planificador está detenido")
+            self._queues[cls].append((future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Peticiones en cola, en vuelo y completadas por clase"""
+        with self._cond:
+            return {
+                cls: {
+                    'queued': len(self._queues[cls]),
+                    'running': self._running[cls],
+                    'completed': self.completed[cls],
+                }
+                for cls in CLASSES
+            }
+
+    def shutdown(self):
+        """Cancela lo que sigue en cola y detiene los hilos al terminar lo que está en vuelo"""
+        with self._cond:
+            self._shutdown = True
+            for queue in self._queues.values():
+                while queue:
+                    queue.popleft()[0].cancel()
+            self._cond.notify_all()
+
+    def _next(self) -> Optional[Tuple[str, _Task]]:
+        """Siguiente tarea: la clase más prioritaria con cola y presupuesto libre (con el lock tomado)"""
+        for rank, cls in enumerate(CLASSES):
+            if self._queues[cls] and self._running[cls] < self.budgets[cls]:
+                if any(self._queues[lower] for lower in CLASSES[rank + 1:]):
+                    self.overtaken += 1
+                return cls, self._queues[cls].popleft()
+        return None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                task = self._next()
+                while task is None and not self._shutdown:
+                    self._cond.wait()
+                    task = self._next()
+                if task is None:
+                    return
+                cls, (future, fn, args, kwargs) = task
+                self._running[cls] += 1
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running[cls] -= 1
+                    self.completed[cls] += 1
+                    # Un hueco libre puede desbloquear una clase que estaba al límite
+                    self._cond.notify_all()
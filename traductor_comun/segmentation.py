@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segmentación de texto en oraciones y cláusulas
+Un solo recorrido lineal con expresiones regulares que devuelve spans (inicio, fin)
+sobre el texto original en lugar de copias.
+
+Uso:
+    for start, end in segment_spans(texto, max_chars=1500):
+        fragmento = texto[start:end]
+
+    # Peticiones llenas hasta el máximo del backend, sin partir oraciones
+    for request in pack_spans(segment_spans(texto, 5000), 5000):
+        inicio, fin = request[0][0], request[-1][1]
+
+    # Varios textos independientes en una petición, separados por marcadores numerados
+    traducido = backend.translate(join_segments(textos), 'zh-CN', 'es')
+    partes = split_segments(traducido, len(textos))  # None si el proveedor alteró los marcadores
+"""
+
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+Span = Tuple[int, int]
+
+# Cierres que acompañan a la puntuación: comillas, paréntesis y corchetes
+_CLOSERS = '”’」』）)\\]】》"\''
+
+# Fin de oración: puntuación final china u occidental (el punto solo si le sigue un espacio) o salto de línea
+SENTENCE_END = re.compile(rf'(?:[。！？!?…]+|\.(?=\s|$))[{_CLOSERS}]*\s*|\n\s*')
+
+# Fin de cláusula: solo se usa para partir oraciones que superan el máximo
+CLAUSE_END = re.compile(rf'[，、,：:；;—]+[{_CLOSERS}]*\s*')
+
+# Marcador numerado delante de cada segmento empaquetado: los traductores lo copian tal cual
+# aunque unan o partan líneas, y el número detecta segmentos perdidos o reordenados
+SEGMENT_MARKER = re.compile(r'\[\[\s*(\d+)\s*\]\]')
+# Caracteres que añade cada segmento ("\n[[999]] "): el separador a pasar a pack_spans
+MARKER_CHARS = 9
+
+
+def _spans(pattern: re.Pattern, text: str, start: int, end: int) -> List[Span]:
+    """Corta text[start:end] justo después de cada coincidencia del patrón"""
+    spans = []
+    for match in pattern.finditer(text, start, end):
+        spans.append((start, match.end()))
+        start = match.end()
+    if start < end:
+        spans.append((start, end))
+    return spans
+
+
+def sentence_spans(text: str, start: int = 0, end: Optional[int] = None) -> List[Span]:
+    """Oraciones de text[start:end]; cada una incluye su puntuación y espacios finales"""
+    return _spans(SENTENCE_END, text, start, len(text) if end is None else end)
+
+
+def segment_spans(text: str, max_chars: Optional[int] = None) -> List[Span]:
+    """Oraciones del texto; con max_chars ningún span lo supera (las largas se parten por cláusulas)"""
+    spans = sentence_spans(text)
+    if not max_chars:
+        return spans
+
+    result: List[Span] = []
+    for start, end in spans:
+        if end - start <= max_chars:
+            result.append((start, end))
+        else:
+            result.extend(_split_long(text, start, end, max_chars))
+    return result
+
+
+def segment_text(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Igual que segment_spans pero devolviendo los fragmentos como texto"""
+    return [text[start:end] for start, end in segment_spans(text, max_chars)]
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Clave de deduplicación: sin espacios sobrantes y con ancho completo/medio unificado"""
+    return unicodedata.normalize('NFKC', ' '.join(sentence.split()))
+
+
+def pack_spans(spans: List[Span], max_chars: int, separator: int = 0) -> List[List[Span]]:
+    """Llena cada petición con spans en orden hasta max_chars; cada span suma además `separator`
+
+    El separador se cobra también al primero: join_segments antepone un marcador a todos.
+    """
+    requests: List[List[Span]] = []
+    current: List[Span] = []
+    size = 0
+    for start, end in spans:
+        length = end - start
+        if current and size + separator + length > max_chars:
+            requests.append(current)
+            current, size = [], 0
+        size += separator + length
+        current.append((start, end))
+    if current:
+        requests.append(current)
+    return requests
+
+
+def join_segments(texts: List[str]) -> str:
+    """Une textos en una sola petición anteponiendo a cada uno su marcador numerado"""
+    return '\n'.join(f"[[{i}]] {text}" for i, text in enumerate(texts))
+
+
+def split_segments(result: str, count: int) -> Optional[List[str]]:
+    """Reparte una respuesta de join_segments; None si faltan, sobran o se reordenaron marcadores"""
+    parts = SEGMENT_MARKER.split(result or '')
+    # split con un grupo: [prefijo, n0, texto0, n1, texto1, ...]
+    numbers = [int(n) for n in parts[1::2]]
+    texts = [text.strip() for text in parts[2::2]]
+    if parts[0].strip() or numbers != list(range(count)) or not all(texts):
+        return None
+    return texts
+
+
+def _split_long(text: str, start: int, end: int, max_chars: int) -> List[Span]:
+    """Parte una oración demasiado larga por cláusulas, luego por espacios y como último recurso a ciegas"""
+    pieces: List[Span] = []
+    piece_start = piece_end = start
+    for _, clause_end in _spans(CLAUSE_END, text, start, end):
+        if clause_end - piece_start <= max_chars:
+            piece_end = clause_end
+            continue
+
+        if piece_end > piece_start:
+            pieces.append((piece_start, piece_end))
+            piece_start = piece_end
+
+        # La cláusula sola también puede superar el máximo
+        while clause_end - piece_start > max_chars:
+            limit = piece_start + max_chars
+            cut = text.rfind(' ', piece_start, limit) + 1
+            if cut <= piece_start + max_chars // 2:
+                cut = limit  # Sin espacio útil (p. ej. chino): corte duro
+            pieces.append((piece_start, cut))
+            piece_start = cut
+        piece_end = clause_end
+
+    if piece_end > piece_start:
+        pieces.append((piece_start, piece_end))
+    return pieces
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de traducciones en SQLite (modo WAL)
+Compartida por v1 y v2: cada traducción se guarda con la clave
+(origen, destino, backend y su versión, texto normalizado; ver key_text) sobre un índice primario, así que
+abrirla cuesta lo mismo tenga diez entradas o un millón. Las lecturas usan una
+conexión por hilo; las escrituras se encolan y un hilo en segundo plano las
+confirma por lotes, de modo que traducir nunca espera al disco y un cierre
+inesperado pierde como mucho el último lote. digest() resume esa misma clave en
+16 bytes para las cachés en memoria y la instantánea mapeada.
+
+Las traducciones largas se guardan comprimidas (codec.ValueCodec); los
+diccionarios de compresión viven en la propia base, en la tabla dictionaries,
+y se confirman en la misma transacción que el primer valor que los usa.
+
+Uso:
+    store = TranslationStore(Path.home() / ".traductor_chino" / "traducciones.sqlite3")
+    store.put('zh-CN', 'es', 'google@1', '你好。', 'Hola.')
+    store.get('zh-CN', 'es', 'google@1', '你好。')  # 'Hola.'
+    store.close()  # Confirma lo pendiente
+"""
+
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .codec import MissingDictionary, Stored, ValueCodec
+from .segmentation import normalize_sentence
+
+Key = Tuple[str, str, str, str]
+DIGEST_SIZE = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    text TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source, target, backend, text)
+) WITHOUT ROWID
+"""
+
+DICTIONARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def key_text(text: str) -> str:
+    """Texto de la clave: una oración se normaliza, un texto de varias líneas se conserva tal cual
+
+    La traducción de un texto con saltos de línea los reproduce, así que dos textos que solo
+    difieren en ellos necesitan entradas distintas (la v1 guarda documentos enteros).
+    """
+    stripped = text.strip()
+    return stripped if '\n' in stripped else normalize_sentence(stripped)
+
+
+def digest_key(key: Key) -> bytes:
+    """Resumen BLAKE2b de una clave ya normalizada: tamaño fijo sea cual sea el texto y sin ambigüedad entre campos"""
+    # Idiomas y backend nunca contienen NUL; el texto va último, así que la unión no puede colisionar
+    return hashlib.blake2b('\x00'.join(key).encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def load_dictionaries(conn: sqlite3.Connection, codec: ValueCodec) -> int:
+    """Registra en el códec los diccionarios guardados (el más reciente queda como actual)"""
+    try:
+        rows = conn.execute("SELECT data FROM dictionaries ORDER BY created_at").fetchall()
+    except sqlite3.OperationalError:
+        return 0  # Base anterior a la compresión
+    for (data,) in rows:
+        codec.add_dictionary(data)
+    return len(rows)
+
+
+class TranslationStore:
+    """Almacén SQLite de traducciones con lecturas indexadas y escritor por lotes en segundo plano"""
+
+    QUERY_CHUNK = 500  # Parámetros por consulta en get_many (SQLite antiguo admite como máximo 999)
+
+    def __init__(self, path: Union[str, Path], batch_size: int = 64, flush_interval: float = 0.5,
+                 codec: Optional[ValueCodec] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+        self.batches = 0
+        self._closed = False
+        # Compartible con las cachés en memoria: así todas usan los mismos diccionarios
+        self.codec = codec or ValueCodec()
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Escrituras encoladas y aún no confirmadas: las lecturas las ven de inmediato
+        self._pending: Dict[Key, str] = {}
+        self._pending_lock = threading.Lock()
+        self._queue: 'queue.Queue[Optional[Tuple[Key, str]]]' = queue.Queue()
+
+        # El esquema se crea en el hilo que abre el almacén: un error de disco aparece aquí y no después
+        self._writer_conn = self._connect()
+        self._writer_conn.execute(SCHEMA)
+        self._writer_conn.execute(DICTIONARY_SCHEMA)
+        self._writer_conn.commit()
+        load_dictionaries(self._writer_conn, self.codec)
+        self._saved_dictionaries = set(self.codec.dictionaries)
+        self._writer = threading.Thread(target=self._write_loop, name="translation-store", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def key(source: str, target: str, backend: str, text: str) -> Key:
+        """Clave de una traducción: variantes de espacios de una oración comparten entrada (ver key_text)"""
+        return source, target, backend, key_text(text)
+
+    @classmethod
+    def digest(cls, source: str, target: str, backend: str, text: str) -> bytes:
+        """Clave compacta equivalente a key() para cachés en memoria e instantáneas"""
+        return digest_key(cls.key(source, target, backend, text))
+
+    def get(self, source: str, target: str, backend: str, text: str) -> Optional[str]:
+        """Traducción guardada o None (un error de SQLite cuenta como fallo, nunca interrumpe)"""
+        if self._closed:
+            return None
+        key = self.key(source, target, backend, text)
+        self.reads += 1
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return pending
+        try:
+            row = self._reader().execute(
+                "SELECT translation FROM translations WHERE source = ? AND target = ? AND backend = ? AND text = ?",
+                key).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Error leyendo caché persistente: {e}")
+            return None
+        if row is None:
+            return None
+        translation = self._decode(row[0])
+        if translation is not None:
+            self.hits += 1
+        return translation
+
+    def get_many(self, source: str, target: str, backend: str, texts: Iterable[str]) -> Dict[str, str]:
+        """Traducciones guardadas de varios textos con una consulta por cada QUERY_CHUNK (claves: los textos recibidos)"""
+        if self._closed:
+            return {}  # Tras close() no se abren conexiones nuevas
+        wanted: Dict[str, List[str]] = {}
+        for text in texts:
+            wanted.setdefault(key_text(text), []).append(text)
+        self.reads += len(wanted)
+
+        found: Dict[str, str] = {}
+        with self._pending_lock:
+            for normalized in wanted:
+                pending = self._pending.get((source, target, backend, normalized))
+                if pending is not None:
+                    found[normalized] = pending
+        missing = [normalized for normalized in wanted if normalized not in found]
+        try:
+            reader = self._reader()
+            for start in range(0, len(missing), self.QUERY_CHUNK):
+                chunk = missing[start:start + self.QUERY_CHUNK]
+                rows = reader.execute(
+                    "SELECT text, translation FROM translations WHERE source = ? AND target = ? AND backend = ? "
+                    f"AND text IN ({', '.join('?' * len(chunk))})",
+                    (source, target, backend, *chunk))
+                for normalized, value in rows:
+                    translation = self._decode(value)
+                    if translation is not None:
+                        found[normalized] = translation
+        except sqlite3.Error as e:
+            print(f"⚠️ Error leyendo caché persistente: {e}")
+
+        self.hits += len(found)
+        return {text: translation for normalized, translation in found.items() for text in wanted[normalized]}
+
+    def put(self, source: str, target: str, backend: str, text: str, translation: str):
+        """Encola la escritura; el hilo escritor la confirma en el siguiente lote"""
+        if self._closed:
+            return
+        key = self.key(source, target, backend, text)
+        with self._pending_lock:
+            self._pending[key] = translation
+        self._queue.put((key, translation))
+
+    def flush(self):
+        """Espera a que todo lo encolado esté confirmado en disco"""
+        self._queue.join()
+
+    def close(self):
+        """Confirma lo pendiente y cierra las conexiones"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'reads': self.reads,
+            'hits': self.hits,
+            'writes': self.writes,
+            'batches': self.batches,
+            'pending': self._queue.qsize(),
+            'hit_ratio': self.hits / self.reads if self.reads else 0.0,
+            'compression': self.codec.stats(),
+        }
+
+    def _decode(self, value: Stored) -> Optional[str]:
+        try:
+            return self.codec.decode(value)
+        except MissingDictionary:
+            # Diccionario entrenado por otro proceso después de abrir la base
+            load_dictionaries(self._reader(), self.codec)
+        try:
+            return self.codec.decode(value)
+        except MissingDictionary as e:
+            print(f"⚠️ {e}")
+            return None
+
+    def _encode(self, translation: str) -> Stored:
+        value = self.codec.encode(translation)
+        return sqlite3.Binary(value) if isinstance(value, bytes) else value
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")  # Lectores concurrentes mientras el escritor confirma
+        conn.execute("PRAGMA synchronous=NORMAL")  # En WAL sigue siendo consistente tras un corte
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Conexión de lectura propia del hilo actual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _write_loop(self):
+        closing = False
+        while not closing:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[Tuple[Key, str]] = []
+            taken = 1
+            if first is None:
+                closing = True
+            else:
+                batch.append(first)
+            # Agrupar lo que ya esté en cola en una sola transacción
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    closing = True
+                else:
+                    batch.append(item)
+            self._commit(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+        self._writer_conn.close()
+
+    def _commit(self, batch: List[Tuple[Key, str]]):
+        if not batch:
+            return
+        now = time.time()
+        # Comprimir aquí, en el hilo escritor, para que put() no pague el coste
+        rows = [(*key, self._encode(translation), now) for key, translation in batch]
+        new_dictionaries = [(dict_id, data) for dict_id, data in list(self.codec.dictionaries.items())
+                            if dict_id not in self._saved_dictionaries]
+        try:
+            with self._writer_conn:
+                # El diccionario se confirma junto a los primeros valores que lo usan
+                self._writer_conn.executemany(
+                    "INSERT OR IGNORE INTO dictionaries (id, data, created_at) VALUES (?, ?, ?)",
+                    [(dict_id, data, now) for dict_id, data in new_dictionaries])
+                self._writer_conn.executemany(
+                    "INSERT OR REPLACE INTO translations (source, target, backend, text, translation, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows)
+            self._saved_dictionaries.update(dict_id for dict_id, _ in new_dictionaries)
+            self.writes += len(batch)
+            self.batches += 1
+        except sqlite3.Error as e:
+            print(f"⚠️ Error guardando caché persistente ({len(batch)} entradas): {e}")
+        finally:
+            with self._pending_lock:
+                for key, translation in batch:
+                    if self._pending.get(key) == translation:
+                        del self._pending[key]
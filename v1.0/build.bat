@@ -24,6 +24,7 @@ pyinstaller ^
     --name "TraductorChino" ^
     --icon=icon.ico ^
     --add-data "README.md;." ^
+    --paths ".." ^
     --hidden-import "customtkinter" ^
     --hidden-import "CTkTable" ^
     --hidden-import "pypinyin" ^
@@ -1,6 +1,5 @@
 import customtkinter
 import tkinter as tk
-from deep_translator import GoogleTranslator
 import pyttsx3
 import threading
 from pypinyin import pinyin, lazy_pinyin, Style
@@ -14,10 +13,19 @@ import gc
 import psutil
 import json
 import pickle
+import sqlite3
 from pathlib import Path
 import multiprocessing
 import tempfile
 import webbrowser
+# Módulos compartidos con la v2.0 (carpeta traductor_comun en la raíz del repositorio)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from traductor_comun.backends import AdaptiveRateLimiter, BackendUnavailable, GoogleBackend, HttpPool, StubBackend
+from traductor_comun.cache import TinyLFUCache
+from traductor_comun.codec import ValueCodec
+from traductor_comun.scheduler import BULK, PREFETCH, PriorityScheduler, classify
+from traductor_comun.segmentation import pack_spans, segment_spans, segment_text
+from traductor_comun.translation_store import TranslationStore
 try:
     from tkinterweb import HtmlFrame
     HTML_DISPONIBLE = True
@@ -38,6 +46,46 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# --- Red compartida por todos los backends (pool keep-alive y limitador adaptativo) ---
+_sesion_http = None
+_sesion_http_lock = threading.Lock()
+
+
+def obtener_sesion_http(tamano=4):
+    """Devuelve el pool HTTP único del proceso (se crea con el tamaño de la primera llamada)"""
+    global _sesion_http
+    with _sesion_http_lock:
+        if _sesion_http is None:
+            _sesion_http = HttpPool(size=tamano, timeout=6)
+        return _sesion_http
+
+
+_limitador = None
+_limitador_lock = threading.Lock()
+
+
+def obtener_limitador():
+    """Limitador único del proceso, compartido por todas las llamadas de traducción"""
+    global _limitador
+    with _limitador_lock:
+        if _limitador is None:
+            _limitador = AdaptiveRateLimiter()
+        return _limitador
+
+
+# --- Backends de traducción intercambiables (traductor_comun.backends, sin hedging en la v1) ---
+def crear_backend(nombre=None, tamano_pool=4):
+    """Crea el backend indicado o el de la variable TRADUCTOR_BACKEND (google por defecto)"""
+    nombre = nombre or os.environ.get('TRADUCTOR_BACKEND', 'google')
+    sesion = obtener_sesion_http(tamano_pool)
+    if nombre == StubBackend.name:
+        url_base = os.environ.get('TRADUCTOR_STUB_URL', 'http://127.0.0.1:8765')
+        return StubBackend(sesion, url_base, limiter=obtener_limitador())
+    if nombre != GoogleBackend.name:
+        print(f"Backend desconocido '{nombre}', usando google")
+    return GoogleBackend(sesion, limiter=obtener_limitador())
+
+
 # --- Configuración inicial de la apariencia ---
 customtkinter.set_appearance_mode("System")
 customtkinter.set_default_color_theme("blue")
@@ -46,12 +94,12 @@ customtkinter.set_default_color_theme("blue")
 class GeneradorHTMLPinyin:
     """Generador ultra optimizado de HTML para tabla Pinyin"""
     
-    def __init__(self, hardware_info):
+    def __init__(self, hardware_info, backend=None):
         """Inicializa el generador con configuración basada en hardware"""
         self.hardware_info = hardware_info
+        self.backend = backend or crear_backend()
         self.template_cache = {}
-        self.cache_traducciones_grupos = {}  # Cache para traducciones de grupos
-        self.max_cache_size = 500  # Máximo de entradas en caché
+        self.cache_traducciones_grupos = TinyLFUCache(max_bytes=2 * 1024 * 1024)  # Traducciones de grupos
         self.css_optimizado = self.generar_css_optimizado()
         self.js_interactivo = self.generar_javascript_interactivo()
     
@@ -667,7 +715,7 @@ class GeneradorHTMLPinyin:
                         continue  # Saltar traducciones adicionales
                     
                     # Verificar caché primero
-                    cache_key = f"{texto_grupo}_{idioma_destino}"
+                    cache_key = self.backend.cache_key(texto_grupo, idioma_destino)
                     if cache_key in cache_traducciones:
                         traduccion_grupo = cache_traducciones[cache_key]
                         # Registrar cache hit
@@ -684,12 +732,10 @@ class GeneradorHTMLPinyin:
                         
                         # Intentar traducir con método simple y timeout corto
                         try:
-                            from deep_translator import GoogleTranslator
                             import time
                             start_time = time.time()
                             
-                            traductor_grupo = GoogleTranslator(source='zh-CN', target=idioma_destino)
-                            traduccion_grupo = traductor_grupo.translate(texto_grupo)
+                            traduccion_grupo = self.backend.translate(texto_grupo, 'zh-CN', idioma_destino)
                             
                             # Limpiar prefijos no deseados que a veces agrega el traductor
                             if traduccion_grupo:
@@ -810,9 +856,10 @@ class TraductorChino:
     
     def __init__(self):
         """Inicializa la aplicación del traductor con optimizaciones de recursos"""
-        # Cache para traducciones de grupos con límite de memoria
-        self.cache_traducciones_grupos = {}
-        self.max_cache_size = 500  # Máximo de entradas en caché
+        # Compresión de traducciones largas, compartida por las cachés en memoria y la de disco
+        self.codec = ValueCodec(threshold=128)
+        # Cache para traducciones de grupos con límite de memoria (presupuesto real en aplicar_presupuestos_cache)
+        self.cache_traducciones_grupos = TinyLFUCache(max_bytes=2 * 1024 * 1024, codec=self.codec)
         self.cache_hits = 0
         self.cache_misses = 0
         
@@ -836,11 +883,33 @@ class TraductorChino:
         # Caché persistente para traducciones
         self.cache_dir = Path.home() / ".traductor_chino"
         self.cache_dir.mkdir(exist_ok=True)
-        self.cache_traducciones = self.cargar_cache("traducciones")
-        self.cache_pinyin = self.cargar_cache("pinyin")
+        # Cachés con presupuesto en bytes: al llenarse desalojan solo las entradas necesarias
+        self.cache_traducciones = TinyLFUCache(max_bytes=1024 * 1024, codec=self.codec)
+        self.cache_pinyin = TinyLFUCache(max_bytes=1024 * 1024)
+        self.aplicar_presupuestos_cache()
+        self.cache_pinyin.update(self.cargar_cache("pinyin").items())
+        
+        # Traducciones en SQLite (compartido con la v2.0): abrirlo no depende del tamaño y cada
+        # traducción se guarda al momento en segundo plano, sin esperar al cierre
+        self.almacen_traducciones = self.abrir_almacen_traducciones()
+        self.descartar_cache_traducciones_antiguo()
+        
+        # Pool de hilos dinámico optimizado para cualquier CPU
+        self.max_workers = self.calcular_workers_optimos()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        
+        # Planificador por prioridad: un documento largo usa como mucho la mitad de los hilos,
+        # el resto queda libre para las traducciones del editor y la tabla Pinyin
+        self.planificador = PriorityScheduler(
+            self.max_workers, {PREFETCH: 1, BULK: max(1, self.max_workers // 2)}, name="planificador")
+        self.translation_queue = queue.Queue()
+        self.ui_update_queue = queue.Queue()
+        
+        # Backend de traducción compartido por todas las rutas (pool HTTP del tamaño del executor)
+        self.backend = crear_backend(tamano_pool=self.max_workers)
         
         # Generador HTML optimizado para hardware
-        self.generador_html = GeneradorHTMLPinyin(self.hardware_info)
+        self.generador_html = GeneradorHTMLPinyin(self.hardware_info, self.backend)
         self.archivo_html_temp = None
         self.usar_html_viewer = HTML_DISPONIBLE and not self.hardware_info['is_low_end']
         
@@ -860,12 +929,6 @@ class TraductorChino:
             'formato_markdown': ''
         }
         
-        # Pool de hilos dinámico optimizado para cualquier CPU
-        self.max_workers = self.calcular_workers_optimos()
-        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
-        self.translation_queue = queue.Queue()
-        self.ui_update_queue = queue.Queue()
-        
         # Variables de control de progreso optimizadas
         self.progreso_actual = 0
         self.progreso_total = 100
@@ -883,7 +946,6 @@ class TraductorChino:
         self.update_worker = None
         
         # Límites adaptativos basados en hardware
-        self.limite_segmento = self.calcular_limite_segmento()
         self.caracteres_por_lote = self.calcular_caracteres_por_lote()
         
         # Variables para métricas de rendimiento
@@ -891,8 +953,7 @@ class TraductorChino:
         self.tiempo_ultima_traduccion = time.time()
         self.ultima_gc = time.time()
         
-        # Inicializar traductor y motor de voz
-        self.translator = GoogleTranslator(source='auto', target='zh-CN')
+        # Inicializar motor de voz
         self.engine = None
         self.inicializar_motor_voz()
         
@@ -948,19 +1009,17 @@ class TraductorChino:
             return None
             
         # Crear clave de caché
-        cache_key = f"{texto_grupo}_{idioma_target}"
+        cache_key = self.backend.cache_key(texto_grupo, idioma_target)
         
         # Verificar caché primero
         if cache_key in self.cache_traducciones_grupos:
             return self.cache_traducciones_grupos[cache_key]
         
         try:
-            from deep_translator import GoogleTranslator
             import time
             
             start_time = time.time()
-            traductor = GoogleTranslator(source='zh-CN', target=idioma_target)
-            resultado = traductor.translate(texto_grupo)
+            resultado = self.backend.translate(texto_grupo, 'zh-CN', idioma_target)
             
             # Verificar que no tardó demasiado
             if time.time() - start_time > 8:  # Más de 8 segundos
@@ -1124,22 +1183,6 @@ class TraductorChino:
         except:
             return 0.016  # 60 FPS por defecto
     
-    def calcular_limite_segmento(self):
-        """Calcula el límite de segmento óptimo para traducción"""
-        try:
-            hw = self.hardware_info
-            base_limite = 2000
-            
-            # Ajustar según memoria y CPU
-            factor = (hw['memory_available_gb'] / 8) * (hw['cpu_count'] / 4)
-            factor = max(0.5, min(factor, 2.0))  # Entre 0.5x y 2x
-            
-            limite = int(base_limite * factor * self.factor_rendimiento)
-            return max(1000, min(limite, 4000))  # Entre 1000 y 4000
-            
-        except:
-            return 2000
-    
     def calcular_caracteres_por_lote(self):
         """Calcula caracteres por lote para procesamiento Pinyin"""
         try:
@@ -1199,6 +1242,34 @@ class TraductorChino:
         except:
             return 30000
     
+    def abrir_almacen_traducciones(self):
+        """Abre la caché persistente de traducciones; None si no se puede (se sigue solo en memoria)"""
+        ruta = os.environ.get('TRADUCTOR_CACHE_DB') or self.cache_dir / "traducciones.sqlite3"
+        try:
+            return TranslationStore(ruta, codec=self.codec)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Caché persistente no disponible: {e}")
+            return None
+    
+    def descartar_cache_traducciones_antiguo(self):
+        """Borra el pickle de traducciones de versiones anteriores (ya nadie lo lee).
+        
+        No se importa: sus claves no dicen qué backend produjo cada traducción y pueden
+        contener resultados degradados (⚠️ o el original sin traducir)."""
+        cache_file = self.cache_dir / "traducciones_cache.pkl"
+        if not cache_file.exists():
+            return
+        try:
+            with open(cache_file, 'rb') as f:
+                elementos = len(pickle.load(f))
+        except Exception:
+            elementos = "?"
+        try:
+            cache_file.unlink()
+            print(f"Caché traducciones antiguo descartado: {elementos} elementos (ahora se usa SQLite)")
+        except OSError as e:
+            print(f"Error borrando caché traducciones antiguo: {e}")
+    
     def cargar_cache(self, tipo):
         """Carga caché persistente desde disco"""
         try:
@@ -1218,7 +1289,7 @@ class TraductorChino:
         try:
             cache_file = self.cache_dir / f"{tipo}_cache.pkl"
             with open(cache_file, 'wb') as f:
-                pickle.dump(datos, f)
+                pickle.dump(dict(datos.items()), f)
             print(f"Caché {tipo} guardado: {len(datos)} elementos")
         except Exception as e:
             print(f"Error guardando caché {tipo}: {e}")
@@ -1244,9 +1315,10 @@ class TraductorChino:
     def on_closing(self):
         """Maneja el cierre de la aplicación guardando caché y estadísticas"""
         try:
-            # Guardar cachés
-            self.guardar_cache("traducciones", self.cache_traducciones)
+            # Guardar cachés (las traducciones ya están en SQLite: solo confirmar lo pendiente)
             self.guardar_cache("pinyin", self.cache_pinyin)
+            if self.almacen_traducciones:
+                self.almacen_traducciones.close()
             
             # Guardar estadísticas de rendimiento
             if hasattr(self, 'cache_hits') and hasattr(self, 'cache_misses'):
@@ -1269,13 +1341,21 @@ class TraductorChino:
                     except Exception as e:
                         print(f"Error guardando estadísticas: {e}")
             
+            # Estadísticas del pool HTTP compartido
+            stats_http = obtener_sesion_http().stats()
+            print(f"🌐 HTTP: {stats_http['requests']} peticiones, "
+                  f"{stats_http['open_connections']} conexiones abiertas, "
+                  f"reuso {stats_http['reuse_ratio']:.0%}, espera media {stats_http['avg_wait_ms']:.1f} ms")
+            
             # Detener worker de UI
             if hasattr(self, 'ui_update_queue'):
                 self.ui_update_queue.put(None)
             
-            # Cerrar executor
+            # Cerrar executor y planificador
             if hasattr(self, 'executor'):
                 self.executor.shutdown(wait=False)
+            if hasattr(self, 'planificador'):
+                self.planificador.shutdown()
             
             print("✅ Caché guardado y recursos liberados")
             
@@ -1487,6 +1567,15 @@ class TraductorChino:
         )
         label_traduccion.grid(row=3, column=0, pady=(0, 5), sticky="w", padx=10)
         
+        # Uso de las cachés en memoria, a la derecha del título (se actualiza en cada optimización)
+        self.info_cache = customtkinter.CTkLabel(
+            frame_izquierdo,
+            text=self.texto_uso_caches(),
+            font=("Arial", 12),
+            text_color="gray"
+        )
+        self.info_cache.grid(row=3, column=0, pady=(0, 5), sticky="e", padx=10)
+        
         self.texto_traduccion = customtkinter.CTkTextbox(
             frame_izquierdo,
             height=200,  # Más alto
@@ -2092,27 +2181,49 @@ class TraductorChino:
             elif porcentaje_uso < 50:  # Memoria disponible
                 self.limite_cache_mb = min(300, self.limite_cache_mb * 1.1)
             
-            # Limpiar cachés si exceden límites adaptativos
-            self.gestionar_cache_traducciones()
-            self.gestionar_cache_pinyin_periodico()
+            # Ajustar cada caché a su parte del límite (desalojo incremental, sin vaciarlas)
+            self.aplicar_presupuestos_cache()
             
-            print(f"Optimización caché: {porcentaje_uso}% memoria, límite: {self.limite_cache_mb}MB")
+            uso = self.texto_uso_caches()
+            print(f"Optimización caché: {porcentaje_uso}% memoria, límite: {self.limite_cache_mb:.0f}MB ({uso})")
+            if hasattr(self, 'info_cache'):
+                self.app.after(0, lambda: self.info_cache.configure(text=uso))
+            compresion = self.codec.stats()
+            if compresion['compressed']:
+                print(f"Compresión: x{compresion['ratio']:.1f} en {compresion['compressed']} traducciones, "
+                      f"{compresion['decode_us']:.0f} µs por lectura")
             
         except Exception as e:
             print(f"Error optimizando caché: {e}")
     
+    def caches_con_presupuesto(self):
+        """Cachés con presupuesto en bytes por nombre"""
+        return {
+            'traducciones': self.cache_traducciones,
+            'pinyin': self.cache_pinyin,
+            'grupos': self.cache_traducciones_grupos,
+        }
+    
+    def aplicar_presupuestos_cache(self):
+        """Reparte limite_cache_mb entre las cachés; si baja, cada una desaloja solo lo que sobra"""
+        reparto = {'traducciones': 0.4, 'pinyin': 0.5, 'grupos': 0.1}
+        limite_bytes = self.limite_cache_mb * 1024 * 1024
+        for nombre, cache in self.caches_con_presupuesto().items():
+            cache.resize(max(64 * 1024, int(limite_bytes * reparto[nombre])))
+    
+    def uso_caches(self):
+        """Bytes ocupados y presupuesto de cada caché"""
+        return {nombre: (cache.weight, cache.capacity) for nombre, cache in self.caches_con_presupuesto().items()}
+    
+    def texto_uso_caches(self):
+        """Uso de cada caché en MB para la interfaz y el log"""
+        return "💾 " + " · ".join(f"{nombre} {usado / 1024 / 1024:.1f}/{limite / 1024 / 1024:.1f} MB"
+                                  for nombre, (usado, limite) in self.uso_caches().items())
+    
     def limpiar_cache_agresivo(self):
-        """Limpieza agresiva de caché cuando la memoria es crítica"""
+        """Reducción de caché cuando la memoria es crítica (el límite ya se redujo antes de llamar)"""
         try:
-            # Reducir caché de traducciones a elementos esenciales
-            if len(self.cache_traducciones) > 10:
-                items_recientes = list(self.cache_traducciones.items())[-10:]
-                self.cache_traducciones = dict(items_recientes)
-            
-            # Reducir caché de pinyin
-            if len(self.cache_pinyin) > 5:
-                items_recientes = list(self.cache_pinyin.items())[-5:]
-                self.cache_pinyin = dict(items_recientes)
+            self.aplicar_presupuestos_cache()
             
             # Forzar recolección de basura
             gc.collect()
@@ -2121,50 +2232,6 @@ class TraductorChino:
         except Exception as e:
             print(f"Error en limpieza agresiva: {e}")
     
-    def gestionar_cache_traducciones(self):
-        """Gestiona el caché de traducciones de manera inteligente"""
-        try:
-            limite_elementos = int(self.limite_cache_mb * 0.5)  # 50% del límite para traducciones
-            
-            # Gestionar caché de traducciones principales
-            if len(self.cache_traducciones) > limite_elementos:
-                items_mantener = limite_elementos // 2
-                items_recientes = list(self.cache_traducciones.items())[-items_mantener:]
-                self.cache_traducciones = dict(items_recientes)
-                print(f"Caché traducciones optimizado: {len(self.cache_traducciones)} elementos")
-            
-            # Gestionar caché de grupos de traducciones (nuevo)
-            if hasattr(self, 'cache_traducciones_grupos') and len(self.cache_traducciones_grupos) > self.max_cache_size:
-                # Mantener solo los más recientes
-                items_mantener = self.max_cache_size // 2
-                items_recientes = list(self.cache_traducciones_grupos.items())[-items_mantener:]
-                self.cache_traducciones_grupos = dict(items_recientes)
-                print(f"Caché grupos optimizado: {len(self.cache_traducciones_grupos)} elementos")
-                
-                # Mostrar estadísticas de hit rate
-                total_accesos = self.cache_hits + self.cache_misses
-                if total_accesos > 0:
-                    hit_rate = (self.cache_hits / total_accesos) * 100
-                    print(f"📊 Hit rate del caché: {hit_rate:.1f}% ({self.cache_hits}/{total_accesos})")
-            
-        except Exception as e:
-            print(f"Error gestionando caché traducciones: {e}")
-    
-    def gestionar_cache_pinyin_periodico(self):
-        """Gestiona el caché de pinyin de manera periódica"""
-        try:
-            limite_elementos = int(self.limite_cache_mb * 0.5)  # 50% del límite para pinyin
-            
-            if len(self.cache_pinyin) > limite_elementos:
-                # Mantener elementos más recientes
-                items_mantener = int(limite_elementos * 0.8)
-                items = list(self.cache_pinyin.items())[-items_mantener:]
-                self.cache_pinyin = dict(items)
-                print(f"Caché Pinyin optimizado: {len(self.cache_pinyin)} elementos")
-                
-        except Exception as e:
-            print(f"Error gestionando caché pinyin: {e}")
-    
     def optimizar_memoria_sistema(self):
         """Optimiza el uso de memoria del sistema"""
         try:
@@ -2193,33 +2260,13 @@ class TraductorChino:
                 # CPU disponible - aumentar frecuencia de updates
                 self.update_interval = max(0.008, self.update_interval * 0.9)
             
-            # Ajustar límite de segmento según rendimiento
-            if hasattr(self, 'tiempo_ultima_traduccion'):
-                tiempo_transcurrido = time.time() - self.tiempo_ultima_traduccion
-                if tiempo_transcurrido > 10:  # Traducción tardó más de 10s
-                    self.limite_segmento = max(1000, int(self.limite_segmento * 0.8))
-                elif tiempo_transcurrido < 3:  # Traducción rápida
-                    self.limite_segmento = min(5000, int(self.limite_segmento * 1.1))
-            
         except Exception as e:
             print(f"Error ajustando parámetros dinámicos: {e}")
     
     def optimizar_rendimiento_ui(self):
         """Optimiza el rendimiento general de la UI"""
         try:
-            # Limpiar caché si es muy grande (más de 50 elementos)
-            if len(self.cache_traducciones) > 50:
-                # Mantener solo los 30 más recientes
-                items = list(self.cache_traducciones.items())[-30:]
-                self.cache_traducciones = dict(items)
-                print("Caché de traducciones optimizado")
-            
-            if len(self.cache_pinyin) > 50:
-                # Mantener solo los 30 más recientes
-                items = list(self.cache_pinyin.items())[-30:]
-                self.cache_pinyin = dict(items)
-                print("Caché de pinyin optimizado")
-            
+            # Las cachés se mantienen solas dentro de su presupuesto en bytes
             # Forzar recolección de basura si es necesario
             import gc
             if len(self.cache_traducciones) + len(self.cache_pinyin) > 80:
@@ -2245,7 +2292,7 @@ class TraductorChino:
             # Si no hay variables, verificar caché de traducciones
             texto_actual = self.texto_entrada.get("1.0", "end-1c")
             if texto_actual.strip():
-                cache_key = f"es_{texto_actual}"
+                cache_key = self.backend.cache_key(texto_actual, 'es')
                 if cache_key in self.cache_traducciones:
                     traduccion = self.cache_traducciones[cache_key]
                     self.texto_traduccion.delete("1.0", "end")
@@ -2329,38 +2376,12 @@ class TraductorChino:
     
     def traducir_texto_optimizado_a_chino(self, texto):
         """Versión optimizada de traducción al chino"""
+        def avanzar(hechas, total):
+            progreso = 30 + (hechas / total) * 40  # Entre 30% y 70%
+            self.app.after(0, lambda: self.actualizar_progreso(progreso, f"Traduciendo petición {hechas}/{total}"))
+        
         try:
-            limite_segmento = 2000
-            
-            if len(texto) <= limite_segmento:
-                traductor_chino = GoogleTranslator(source='auto', target='zh-CN')
-                return traductor_chino.translate(texto)
-            
-            # Dividir por líneas para mejor control
-            lineas = texto.split('\n')
-            lineas_traducidas = []
-            total_lineas = len(lineas)
-            
-            for idx, linea in enumerate(lineas):
-                progreso = 30 + (idx / total_lineas) * 40  # Entre 30% y 70%
-                self.app.after(0, lambda p=progreso: self.actualizar_progreso(p, f"Traduciendo línea {idx+1}/{total_lineas}"))
-                
-                if not linea.strip():
-                    lineas_traducidas.append('')
-                    continue
-                
-                try:
-                    traductor_chino = GoogleTranslator(source='auto', target='zh-CN')
-                    linea_traducida = traductor_chino.translate(linea.strip())
-                    lineas_traducidas.append(linea_traducida)
-                except Exception as e:
-                    print(f"Error traduciendo línea {idx} a chino: {e}")
-                    lineas_traducidas.append(linea)
-                
-                time.sleep(0.1)  # Pausa breve
-            
-            return '\n'.join(lineas_traducidas)
-            
+            return self.traducir_empaquetado(texto, 'auto', 'zh-CN', avanzar)[0]
         except Exception as e:
             raise Exception(f"Error en traducción optimizada a chino: {str(e)}")
     
@@ -2388,126 +2409,10 @@ class TraductorChino:
     def traducir_texto_largo_a_chino(self, texto):
         """Traduce textos largos del español/inglés al chino preservando formato exacto"""
         try:
-            # Límite más pequeño para mejor precisión
-            limite_segmento = 1500
-            
-            # Si el texto es corto, traducir directamente
-            if len(texto) <= limite_segmento:
-                traductor_chino = GoogleTranslator(source='auto', target='zh-CN')
-                return traductor_chino.translate(texto)
-            
-            # Dividir por líneas para preservar formato exacto
-            lineas = texto.split('\n')
-            lineas_traducidas = []
-            
-            for linea in lineas:
-                if not linea.strip():  # Línea vacía
-                    lineas_traducidas.append('')  # Preservar líneas vacías
-                    continue
-                
-                # Si la línea es muy larga, dividirla por oraciones
-                if len(linea) > limite_segmento:
-                    # Dividir por puntuaciones para respetar el contexto
-                    segmentos = self.dividir_linea_en_segmentos_occidentales(linea, limite_segmento)
-                    segmentos_traducidos = []
-                    
-                    for segmento in segmentos:
-                        if segmento.strip():
-                            try:
-                                traductor_chino = GoogleTranslator(source='auto', target='zh-CN')
-                                segmento_traducido = traductor_chino.translate(segmento.strip())
-                                segmentos_traducidos.append(segmento_traducido)
-                            except Exception as e:
-                                print(f"Error traduciendo segmento a chino: {e}")
-                                segmentos_traducidos.append(segmento)  # Mantener original si falla
-                    
-                    # Unir segmentos de la línea
-                    linea_completa = ''.join(segmentos_traducidos)  # Sin espacios para chino
-                    lineas_traducidas.append(linea_completa)
-                else:
-                    # Línea corta, traducir directamente
-                    try:
-                        traductor_chino = GoogleTranslator(source='auto', target='zh-CN')
-                        linea_traducida = traductor_chino.translate(linea)
-                        lineas_traducidas.append(linea_traducida)
-                    except Exception as e:
-                        print(f"Error traduciendo línea a chino: {e}")
-                        lineas_traducidas.append(linea)  # Mantener original si falla
-            
-            # Unir todas las líneas preservando saltos de línea exactos
-            return '\n'.join(lineas_traducidas)
-            
+            return self.traducir_empaquetado(texto, 'auto', 'zh-CN')[0]
         except Exception as e:
             raise Exception(f"Error en traducción a chino por segmentos: {str(e)}")
     
-    def dividir_linea_en_segmentos_occidentales(self, linea, limite):
-        """Divide una línea en idiomas occidentales en segmentos respetando puntuaciones importantes"""
-        if len(linea) <= limite:
-            return [linea]
-        
-        segmentos = []
-        segmento_actual = ""
-        
-        # Puntuaciones que indican fin de oración o pausa en idiomas occidentales (mejoradas)
-        puntuaciones_corte = ['.', '!', '?', ';', '。', '！', '？', '；']  # Incluyendo chinas
-        puntuaciones_pausa = [',', ':', ')', ']', '}', '，', '：', '）', '】', '》']  # Incluyendo chinas
-        puntuaciones_enfasis = ['!', '?', '！', '？']  # Puntuaciones que requieren énfasis especial
-        
-        i = 0
-        while i < len(linea):
-            char = linea[i]
-            segmento_actual += char
-            
-            # Si alcanzamos el límite, buscar un punto de corte apropiado
-            if len(segmento_actual) >= limite:
-                # Buscar punto de corte hacia atrás
-                punto_corte = -1
-                
-                # Primero buscar puntuaciones de corte (especialmente exclamación y pregunta)
-                for j in range(len(segmento_actual) - 1, max(0, len(segmento_actual) - 200), -1):
-                    if segmento_actual[j] in puntuaciones_corte:
-                        punto_corte = j + 1
-                        # Si es una puntuación de énfasis, asegurarse de que se incluya completa
-                        if segmento_actual[j] in puntuaciones_enfasis:
-                            # Verificar si hay espacios adicionales después para incluirlos
-                            k = j + 1
-                            while k < len(segmento_actual) and segmento_actual[k] in ' \n\t':
-                                k += 1
-                            punto_corte = k
-                        break
-                
-                # Si no encontramos puntuación de corte, buscar puntuación de pausa
-                if punto_corte == -1:
-                    for j in range(len(segmento_actual) - 1, max(0, len(segmento_actual) - 100), -1):
-                        if segmento_actual[j] in puntuaciones_pausa:
-                            punto_corte = j + 1
-                            break
-                
-                # Si no encontramos nada, cortar en espacio
-                if punto_corte == -1:
-                    for j in range(len(segmento_actual) - 1, max(0, len(segmento_actual) - 50), -1):
-                        if segmento_actual[j] == ' ':
-                            punto_corte = j + 1
-                            break
-                
-                # Si aún no encontramos, cortar forzosamente
-                if punto_corte == -1:
-                    punto_corte = limite
-                
-                # Agregar segmento y continuar
-                segmentos.append(segmento_actual[:punto_corte])
-                segmento_actual = segmento_actual[punto_corte:]
-                # No incrementar i porque ya avanzamos en segmento_actual
-                continue
-            
-            i += 1
-        
-        # Agregar el último segmento si queda algo
-        if segmento_actual.strip():
-            segmentos.append(segmento_actual)
-        
-        return segmentos
-    
     def traducir_a_espanol(self):
         """Traduce texto del chino al español con barra de progreso y optimización"""
         texto = self.texto_entrada.get("1.0", "end-1c")
@@ -2538,7 +2443,7 @@ class TraductorChino:
                 self.app.after(0, lambda: self.mostrar_barra_progreso("Iniciando traducción..."))
                 
                 # Verificar caché primero
-                cache_key = f"es_{texto}"
+                cache_key = self.backend.cache_key(texto, 'es')
                 if cache_key in self.cache_traducciones:
                     self.app.after(0, lambda: self.actualizar_progreso(50, "Recuperando del caché..."))
                     texto_espanol = self.cache_traducciones[cache_key]
@@ -2546,9 +2451,10 @@ class TraductorChino:
                 else:
                     # Traducir texto optimizado
                     self.app.after(0, lambda: self.actualizar_progreso(20, "Analizando texto..."))
-                    texto_espanol = self.traducir_texto_optimizado(texto, 'es')
-                    # Guardar en caché
-                    self.cache_traducciones[cache_key] = texto_espanol
+                    texto_espanol, fallidos = self.traducir_texto_optimizado(texto, 'es')
+                    # Guardar en caché solo si todo se tradujo: lo marcado se reintenta la próxima vez
+                    if not fallidos:
+                        self.cache_traducciones[cache_key] = texto_espanol
                     self.app.after(0, lambda: self.actualizar_progreso(80, "Traducción completada"))
                 
                 # Mostrar traducción
@@ -2583,119 +2489,80 @@ class TraductorChino:
         self.executor.submit(traducir_hilo)
     
     def traducir_texto_optimizado(self, texto, idioma_destino):
-        """Versión ultra optimizada de traducción con gestión adaptativa de recursos"""
+        """Versión ultra optimizada de traducción con peticiones llenas hasta el máximo del backend
+        
+        Devuelve (traducción, fragmentos que quedaron sin traducir), como traducir_empaquetado.
+        """
+        def avanzar(hechas, total):
+            self.update_progreso_eficiente(20 + (hechas / total) * 50, f"Procesando petición {hechas}/{total}")
+        
         try:
-            # Usar límite adaptativo calculado según hardware
-            limite_segmento = self.limite_segmento
-            
-            # Para textos cortos, traducir directamente
-            if len(texto) <= limite_segmento:
-                traductor = GoogleTranslator(
-                    source='zh-CN', 
-                    target='es' if idioma_destino == 'es' else 'en'
-                )
-                return traductor.translate(texto)
-            
-            # Procesamiento por chunks adaptativos
-            return self.procesar_texto_por_chunks_adaptativos(texto, idioma_destino)
-            
+            return self.traducir_empaquetado(texto, 'zh-CN', 'es' if idioma_destino == 'es' else 'en', avanzar)
         except Exception as e:
             raise Exception(f"Error en traducción ultra optimizada: {str(e)}")
     
-    def procesar_texto_por_chunks_adaptativos(self, texto, idioma_destino):
-        """Procesa texto en chunks adaptativos según el hardware"""
-        try:
-            lineas = texto.split('\n')
-            lineas_traducidas = []
-            total_lineas = len(lineas)
-            
-            # Procesamiento en lotes según capacidad de hardware
-            batch_size = self.calcular_batch_size(total_lineas)
-            
-            for i in range(0, total_lineas, batch_size):
-                batch_lineas = lineas[i:i + batch_size]
-                
-                # Procesar lote
-                batch_traducido = self.procesar_batch_lineas(batch_lineas, idioma_destino)
-                lineas_traducidas.extend(batch_traducido)
-                
-                # Update progreso más eficiente
-                progreso = 20 + ((i + batch_size) / total_lineas) * 50
-                self.update_progreso_eficiente(
-                    progreso, 
-                    f"Procesando lote {(i//batch_size)+1}/{(total_lineas//batch_size)+1}"
-                )
-                
-                # Pausa adaptativa
-                tiempo_pausa = self.calcular_pausa_adaptativa()
-                if tiempo_pausa > 0:
-                    time.sleep(tiempo_pausa)
-            
-            return '\n'.join(lineas_traducidas)
-            
-        except Exception as e:
-            raise Exception(f"Error en procesamiento por chunks: {str(e)}")
-    
-    def calcular_batch_size(self, total_lineas):
-        """Calcula el tamaño de lote óptimo según hardware"""
-        try:
-            hw = self.hardware_info
-            
-            # Base según número de workers
-            base_batch = max(1, self.max_workers // 2)
-            
-            # Ajustar según memoria disponible
-            if hw['memory_available_gb'] >= 8:
-                batch_multiplier = 3
-            elif hw['memory_available_gb'] >= 4:
-                batch_multiplier = 2
-            else:
-                batch_multiplier = 1
-            
-            batch_size = base_batch * batch_multiplier
-            
-            # Limitar según total de líneas
-            return min(batch_size, max(1, total_lineas // 4))
-            
-        except:
-            return 2  # Valor seguro por defecto
-    
-    def procesar_batch_lineas(self, lineas, idioma_destino):
-        """Procesa un lote de líneas de manera optimizada"""
-        resultado = []
+    def traducir_empaquetado(self, texto, origen, destino, al_avanzar=None):
+        """Traduce llenando cada petición hasta el máximo del backend sin partir oraciones
         
-        for linea in lineas:
-            if not linea.strip():
-                resultado.append('')
-                continue
+        Devuelve (traducción, fallidos): fallidos cuenta los fragmentos marcados ⚠️ o que
+        conservan el original, y un resultado con fallidos no debe guardarse en caché.
+        """
+        limite = self.backend.max_request_chars
+        if len(texto) <= limite:
+            # Una sola petición, con el mismo tratamiento de errores (⚠️ sin conexión) que un documento largo
+            peticiones = [[(0, len(texto))]]
+        else:
+            peticiones = pack_spans(segment_spans(texto, limite), limite)
+        fragmentos = [texto[spans[0][0]:spans[-1][1]] for spans in peticiones]
+        
+        # Todas las peticiones al planificador: los documentos masivos ceden el paso al editor
+        clase = classify(len(texto))
+        futuros = [
+            self.planificador.submit(clase, self.traducir_persistente, fragmento.strip(), origen, destino)
+            if fragmento.strip() else None
+            for fragmento in fragmentos
+        ]
+        
+        partes = []
+        fallidos = 0
+        for idx, (fragmento, futuro) in enumerate(zip(fragmentos, futuros)):
+            contenido = fragmento.strip()
+            if futuro is not None:
+                try:
+                    traduccion = futuro.result()
+                except BackendUnavailable:
+                    # Modo sin conexión: marcar el fragmento como no traducido sin esperar timeouts
+                    traduccion = f"⚠️[{contenido}]"
+                    fallidos += 1
+                except Exception as e:
+                    # El backend ya agotó sus reintentos: conservar el original
+                    print(f"Error traduciendo petición {idx + 1}/{len(peticiones)}: {e}")
+                    traduccion = contenido
+                    fallidos += 1
+                
+                # Conservar los espacios y saltos de línea del original alrededor de la traducción
+                inicio = fragmento[:len(fragmento) - len(fragmento.lstrip())]
+                if not inicio and destino != 'zh-CN' and partes and not partes[-1][-1:].isspace():
+                    inicio = ' '
+                fragmento = inicio + traduccion.strip() + fragmento[len(fragmento.rstrip()):]
+            partes.append(fragmento)
             
-            try:
-                traductor = GoogleTranslator(
-                    source='zh-CN', 
-                    target='es' if idioma_destino == 'es' else 'en'
-                )
-                linea_traducida = traductor.translate(linea.strip())
-                resultado.append(linea_traducida)
-            except Exception as e:
-                print(f"Error traduciendo línea: {e}")
-                resultado.append(linea)  # Mantener original si falla
+            if al_avanzar:
+                al_avanzar(idx + 1, len(peticiones))
         
-        return resultado
+        return ''.join(partes), fallidos
     
-    def calcular_pausa_adaptativa(self):
-        """Calcula pausa adaptativa para evitar sobrecarga de API"""
-        try:
-            hw = self.hardware_info
-            
-            if hw['is_high_end']:
-                return 0.05  # Pausa mínima para hardware potente
-            elif hw['is_low_end']:
-                return 0.2   # Pausa mayor para hardware limitado
-            else:
-                return 0.1   # Pausa estándar
-                
-        except:
-            return 0.1
+    def traducir_persistente(self, texto, origen, destino):
+        """Traduce consultando antes la caché en disco; lo nuevo se guarda en segundo plano"""
+        almacen = self.almacen_traducciones
+        if almacen:
+            guardada = almacen.get(origen, destino, self.backend.cache_id, texto)
+            if guardada:
+                return guardada
+        traduccion = self.backend.translate(texto, origen, destino)
+        if almacen and traduccion:
+            almacen.put(origen, destino, self.backend.cache_id, texto, traduccion)
+        return traduccion
     
     def update_progreso_eficiente(self, valor, texto=""):
         """Update de progreso ultra eficiente para evitar bloqueos"""
@@ -2756,8 +2623,8 @@ class TraductorChino:
             # Generar datos con procesamiento por lotes adaptativos
             datos_tabla = self.crear_datos_pinyin_ultra_rapido(texto_chino)
             
-            # Guardar en caché con límite inteligente
-            self.gestionar_cache_inteligente(cache_key, datos_tabla)
+            # Guardar en caché (su presupuesto en bytes decide qué desalojar)
+            self.cache_pinyin[cache_key] = datos_tabla
             
             # Crear tabla de manera no bloqueante
             self.crear_tabla_pinyin_ultra_optimizada(datos_tabla)
@@ -3002,26 +2869,6 @@ class TraductorChino:
             print(f"Error procesando grupo: {e}")
             return []
     
-    def gestionar_cache_inteligente(self, cache_key, datos):
-        """Gestiona el caché de manera inteligente según memoria disponible"""
-        try:
-            # Calcular tamaño aproximado del caché
-            cache_size_mb = len(self.cache_pinyin) * 0.1  # Estimación aproximada
-            
-            # Limpiar caché si excede el límite
-            if cache_size_mb > self.limite_cache_mb:
-                # Mantener solo los elementos más recientes
-                elementos_mantener = int(self.limite_cache_mb * 10)  # Conversión inversa
-                items = list(self.cache_pinyin.items())[-elementos_mantener:]
-                self.cache_pinyin = dict(items)
-                print(f"Caché Pinyin optimizado: {len(self.cache_pinyin)} elementos")
-            
-            # Agregar nuevo elemento
-            self.cache_pinyin[cache_key] = datos
-            
-        except Exception as e:
-            print(f"Error gestionando caché: {e}")
-    
     def crear_tabla_pinyin_ultra_optimizada(self, datos_tabla):
         """Crea tabla de pinyin con optimización ultra usando HTML o CTkTable"""
         try:
@@ -3397,7 +3244,7 @@ class TraductorChino:
                 self.app.after(0, lambda: self.mostrar_barra_progreso("Iniciando traducción a inglés..."))
                 
                 # Verificar caché primero
-                cache_key = f"en_{texto}"
+                cache_key = self.backend.cache_key(texto, 'en')
                 if cache_key in self.cache_traducciones:
                     self.app.after(0, lambda: self.actualizar_progreso(50, "Recuperando del caché..."))
                     texto_ingles = self.cache_traducciones[cache_key]
@@ -3405,9 +3252,10 @@ class TraductorChino:
                 else:
                     # Traducir texto optimizado
                     self.app.after(0, lambda: self.actualizar_progreso(20, "Analizando texto..."))
-                    texto_ingles = self.traducir_texto_optimizado(texto, 'en')
-                    # Guardar en caché
-                    self.cache_traducciones[cache_key] = texto_ingles
+                    texto_ingles, fallidos = self.traducir_texto_optimizado(texto, 'en')
+                    # Guardar en caché solo si todo se tradujo: lo marcado se reintenta la próxima vez
+                    if not fallidos:
+                        self.cache_traducciones[cache_key] = texto_ingles
                     self.app.after(0, lambda: self.actualizar_progreso(80, "Traducción completada"))
                 
                 # Mostrar traducción
@@ -3442,138 +3290,13 @@ class TraductorChino:
         self.executor.submit(traducir_hilo)
     
     def traducir_texto_largo(self, texto, idioma_destino):
-        """Traduce textos largos dividiéndolos en segmentos pequeños preservando formato exacto"""
+        """Traduce textos largos en peticiones llenas preservando formato exacto"""
         try:
-            # Límite más pequeño para mejor precisión y respeto del formato
-            limite_segmento = 1500  # Segmentos más pequeños para mejor control
-            
-            # Si el texto es muy corto, traducir directamente
-            if len(texto) <= limite_segmento:
-                if idioma_destino == 'es':
-                    traductor = GoogleTranslator(source='zh-CN', target='es')
-                else:  # 'en'
-                    traductor = GoogleTranslator(source='zh-CN', target='en')
-                return traductor.translate(texto)
-            
-            # Dividir por líneas para preservar formato exacto
-            lineas = texto.split('\n')
-            lineas_traducidas = []
-            
-            for linea in lineas:
-                if not linea.strip():  # Línea vacía
-                    lineas_traducidas.append('')  # Preservar líneas vacías
-                    continue
-                
-                # Si la línea es muy larga, dividirla por oraciones
-                if len(linea) > limite_segmento:
-                    # Dividir por puntuaciones para respetar el contexto
-                    segmentos = self.dividir_linea_en_segmentos(linea, limite_segmento)
-                    segmentos_traducidos = []
-                    
-                    for segmento in segmentos:
-                        if segmento.strip():
-                            try:
-                                if idioma_destino == 'es':
-                                    traductor = GoogleTranslator(source='zh-CN', target='es')
-                                else:  # 'en'
-                                    traductor = GoogleTranslator(source='zh-CN', target='en')
-                                
-                                segmento_traducido = traductor.translate(segmento.strip())
-                                segmentos_traducidos.append(segmento_traducido)
-                            except Exception as e:
-                                print(f"Error traduciendo segmento: {e}")
-                                segmentos_traducidos.append(segmento)  # Mantener original si falla
-                    
-                    # Unir segmentos de la línea
-                    linea_completa = ' '.join(segmentos_traducidos)
-                    lineas_traducidas.append(linea_completa)
-                else:
-                    # Línea corta, traducir directamente
-                    try:
-                        if idioma_destino == 'es':
-                            traductor = GoogleTranslator(source='zh-CN', target='es')
-                        else:  # 'en'
-                            traductor = GoogleTranslator(source='zh-CN', target='en')
-                        
-                        linea_traducida = traductor.translate(linea)
-                        lineas_traducidas.append(linea_traducida)
-                    except Exception as e:
-                        print(f"Error traduciendo línea: {e}")
-                        lineas_traducidas.append(linea)  # Mantener original si falla
-            
-            # Unir todas las líneas preservando saltos de línea exactos
-            return '\n'.join(lineas_traducidas)
-            
+            destino = 'es' if idioma_destino == 'es' else 'en'
+            return self.traducir_empaquetado(texto, 'zh-CN', destino)[0]
         except Exception as e:
             raise Exception(f"Error en traducción por segmentos: {str(e)}")
     
-    def dividir_linea_en_segmentos(self, linea, limite):
-        """Divide una línea larga en segmentos respetando puntuaciones importantes (versión mejorada)"""
-        if len(linea) <= limite:
-            return [linea]
-        
-        segmentos = []
-        segmento_actual = ""
-        
-        # Puntuaciones que indican fin de oración o pausa (mejoradas)
-        puntuaciones_corte = ['。', '！', '？', '；', '.', '!', '?', ';', '…', '——']
-        puntuaciones_pausa = ['，', '、', ',', ':', '：', '（', '）', '(', ')', '"', '"', ''', ''']
-        puntuaciones_enfasis = ['！', '？', '!', '?']  # Requieren tratamiento especial
-        
-        i = 0
-        while i < len(linea):
-            char = linea[i]
-            segmento_actual += char
-            
-            # Si alcanzamos el límite, buscar un punto de corte apropiado
-            if len(segmento_actual) >= limite:
-                # Buscar punto de corte hacia atrás
-                punto_corte = -1
-                
-                # Primero buscar puntuaciones de corte (prioridad a exclamación y pregunta)
-                for j in range(len(segmento_actual) - 1, max(0, len(segmento_actual) - 200), -1):
-                    if segmento_actual[j] in puntuaciones_corte:
-                        punto_corte = j + 1
-                        # Si es puntuación de énfasis, incluir posibles espacios después
-                        if segmento_actual[j] in puntuaciones_enfasis:
-                            k = j + 1
-                            while k < len(segmento_actual) and segmento_actual[k] in ' \n\t':
-                                k += 1
-                            punto_corte = k
-                        break
-                
-                # Si no encontramos puntuación de corte, buscar puntuación de pausa
-                if punto_corte == -1:
-                    for j in range(len(segmento_actual) - 1, max(0, len(segmento_actual) - 100), -1):
-                        if segmento_actual[j] in puntuaciones_pausa:
-                            punto_corte = j + 1
-                            break
-                
-                # Si no encontramos nada, cortar en espacio
-                if punto_corte == -1:
-                    for j in range(len(segmento_actual) - 1, max(0, len(segmento_actual) - 50), -1):
-                        if segmento_actual[j] == ' ':
-                            punto_corte = j + 1
-                            break
-                
-                # Si aún no encontramos, cortar forzosamente
-                if punto_corte == -1:
-                    punto_corte = limite
-                
-                # Agregar segmento y continuar
-                segmentos.append(segmento_actual[:punto_corte])
-                segmento_actual = segmento_actual[punto_corte:]
-                # No incrementar i porque ya avanzamos en segmento_actual
-                continue
-            
-            i += 1
-        
-        # Agregar el último segmento si queda algo
-        if segmento_actual.strip():
-            segmentos.append(segmento_actual)
-        
-        return segmentos
-    
     def generar_pinyin(self, texto_chino):
         """Genera pinyin usando CTkTable con formato responsive optimizado, caché y sin límites"""
         try:
@@ -4043,11 +3766,8 @@ class TraductorChino:
             print(f"\n--- Prueba {i} ---")
             print(f"Texto original: {texto}")
             
-            # Probar división en segmentos
-            if self.contiene_caracteres_chinos(texto):
-                segmentos = self.dividir_linea_en_segmentos(texto, 20)
-            else:
-                segmentos = self.dividir_linea_en_segmentos_occidentales(texto, 20)
+            # Probar división en segmentos (el mismo segmentador sirve para chino y occidental)
+            segmentos = segment_text(texto, 20)
             
             texto_reunido = ''.join(segmentos)
             print(f"Texto procesado: {texto_reunido}")
@@ -4529,9 +4249,13 @@ class TraductorChino:
             if self.traduccion_en_progreso:
                 self.traduccion_en_progreso = False
             
-            # Cerrar el pool de hilos
+            # Cerrar el pool de hilos y el planificador
             if hasattr(self, 'executor'):
                 self.executor.shutdown(wait=False)
+            if hasattr(self, 'planificador'):
+                self.planificador.shutdown()
+            if getattr(self, 'almacen_traducciones', None):
+                self.almacen_traducciones.close()
             
             # Cerrar la aplicación
             self.app.destroy()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks de rendimiento (sin red ni interfaz)
+
+Uso:
+    python benchmark.py segmentation --sizes 1 4 8
+    python benchmark.py cache --capacity 500 --alpha 0.8 1.0 1.2
+    python benchmark.py compression --count 5000 --budget-mb 8
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import OrderedDict
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Módulos compartidos con la v1.0 (carpeta traductor_comun en la raíz del repositorio)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from traductor_comun.cache import TinyLFUCache
+from traductor_comun.codec import ValueCodec
+from traductor_comun.segmentation import segment_spans
+
+
+def legacy_split_text(text: str, chunk_size: int) -> List[str]:
+    """Divisor anterior de TranslationWorker (carácter a carácter), como referencia"""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    current_chunk = ""
+    chinese_punctuation = '。！？；，、：'
+    for char in text:
+        current_chunk += char
+        if len(current_chunk) >= chunk_size:
+            if char in chinese_punctuation or not char.strip():
+                chunks.append(current_chunk)
+                current_chunk = ""
+            elif len(current_chunk) > chunk_size * 1.2:
+                chunks.append(current_chunk)
+                current_chunk = ""
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def sample_text(megabytes: float, seed: int = 0) -> str:
+    """Texto mixto chino/occidental de aproximadamente el tamaño indicado (en UTF-8)"""
+    rng = random.Random(seed)
+    hanzi = [chr(code) for code in range(0x4e00, 0x4e00 + 2000)]
+    words = "the quick brown fox jumps over lazy dog el rápido zorro salta sobre perro".split()
+    target = int(megabytes * 1024 * 1024)
+    parts: List[str] = []
+    size = 0
+    while size < target:
+        if rng.random() < 0.8:
+            clauses = [''.join(rng.choices(hanzi, k=rng.randint(4, 20))) for _ in range(rng.randint(1, 4))]
+            sentence = '，'.join(clauses) + rng.choice('。。。！？')
+        else:
+            sentence = ' '.join(rng.choices(words, k=rng.randint(5, 25))).capitalize() + rng.choice('..!?') + ' '
+        if rng.random() < 0.05:
+            sentence += '\n'
+        parts.append(sentence)
+        size += len(sentence.encode('utf-8'))
+    return ''.join(parts)
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """Mejor tiempo de varias ejecuciones"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class LegacyFifoCache:
+    """Caché anterior de ResourceManager: dict que al llenarse borra el 20% más antiguo"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data: Dict[str, str] = {}
+    
+    def get(self, key: str):
+        return self.data.get(key)
+    
+    def put(self, key: str, value: str):
+        if len(self.data) >= self.max_entries:
+            for old in list(self.data.keys())[:self.max_entries // 5]:
+                del self.data[old]
+        self.data[key] = value
+
+
+class LruReference:
+    """LRU mínimo sobre OrderedDict, como referencia de una política solo por recencia"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data: 'OrderedDict[str, str]' = OrderedDict()
+    
+    def get(self, key: str):
+        value = self.data.get(key)
+        if value is not None:
+            self.data.move_to_end(key)
+        return value
+    
+    def put(self, key: str, value: str):
+        self.data[key] = value
+        if len(self.data) > self.max_entries:
+            self.data.popitem(last=False)
+
+
+CACHE_POLICIES = (('FIFO 20%', LegacyFifoCache), ('LRU', LruReference), ('W-TinyLFU', TinyLFUCache))
+
+
+def zipf_keys(universe: int, operations: int, alpha: float, seed: int = 0) -> List[str]:
+    """Secuencia de claves con popularidad Zipf (la k-ésima más popular aparece ∝ 1/k^alpha)"""
+    rng = random.Random(seed)
+    keys = [f"句子{rank}_es" for rank in range(universe)]
+    rng.shuffle(keys)  # La popularidad no debe coincidir con el orden de inserción
+    weights = list(accumulate(1 / (rank + 1) ** alpha for rank in range(universe)))
+    return rng.choices(keys, cum_weights=weights, k=operations)
+
+
+def replay(cache, keys: List[str]) -> float:
+    """Consulta cada clave y la inserta si falta (lectura con relleno); devuelve la tasa de aciertos"""
+    hits = 0
+    for key in keys:
+        if cache.get(key) is None:
+            cache.put(key, key)
+        else:
+            hits += 1
+    return hits / len(keys)
+
+
+def bench_cache(capacity: int, universe: int, operations: int, alphas: List[float], miss_ms: float):
+    # Un fallo cuesta una petición al backend: el coste medio por consulta lo domina la tasa de aciertos
+    print(f"{'alpha':>6} {'política':>10} {'aciertos':>9} {'µs/op':>7} {'ms/consulta':>12}")
+    for alpha in alphas:
+        keys = zipf_keys(universe, operations, alpha)
+        for name, factory in CACHE_POLICIES:
+            cache = factory(capacity)
+            start = time.perf_counter()
+            ratio = replay(cache, keys)
+            micros = (time.perf_counter() - start) / operations * 1e6
+            print(f"{alpha:>6g} {name:>10} {ratio:>9.1%} {micros:>7.2f} {micros / 1000 + (1 - ratio) * miss_ms:>12.1f}")
+
+
+def sample_translations(count: int, seed: int = 0) -> List[str]:
+    """Párrafos traducidos sintéticos: vocabulario con frecuencias Zipf y longitudes de 1 a 8 frases"""
+    rng = random.Random(seed)
+    syllables = "la el de que en los se del las por un para con una su al es lo como más pero sus le ya o este".split()
+    stems = "traduc document sistem gobiern desarroll econom provinc ciudad human tecnolog cultur merc".split()
+    endings = "ión o a os as al ales ico ica ar ado ada".split()
+    vocabulary = syllables + [stem + ending for stem in stems for ending in endings]
+    weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    paragraphs = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(1, 8)):
+            words = rng.choices(vocabulary, cum_weights=weights, k=rng.randint(8, 30))
+            sentences.append(' '.join(words).capitalize() + '.')
+        paragraphs.append(' '.join(sentences))
+    return paragraphs
+
+
+def bench_compression(count: int, threshold: int, budget_mb: float):
+    texts = sample_translations(count)
+    raw_bytes = sum(len(text.encode('utf-8')) for text in texts)
+    print(f"{count} traducciones, {raw_bytes / 1024 / 1024:.1f} MB en UTF-8 (umbral {threshold} B)")
+    print(f"{'códec':>14} {'ratio':>6} {'µs/codif.':>10} {'µs/decodif.':>12} {'entradas en presupuesto':>24}")
+    codecs = (('sin comprimir', None),
+              ('zlib', ValueCodec(threshold=threshold, train_after=0)),
+              ('zlib + dict', ValueCodec(threshold=threshold, train_after=min(256, count))))
+    for name, codec in codecs:
+        if codec is None:
+            stored, encode_us, decode_us, ratio = texts, 0.0, 0.0, 1.0
+        else:
+            for text in texts[:codec.train_after]:  # Entrena el diccionario antes de medir
+                codec.encode(text)
+            start = time.perf_counter()
+            stored = [codec.encode(text) for text in texts]
+            encode_us = (time.perf_counter() - start) / count * 1e6
+            start = time.perf_counter()
+            assert [codec.decode(value) for value in stored] == texts
+            decode_us = (time.perf_counter() - start) / count * 1e6
+            ratio = raw_bytes / sum(len(v) if isinstance(v, bytes) else len(v.encode('utf-8')) for v in stored)
+        # Entradas que conserva una caché con presupuesto en bytes (claves de 16 bytes como en la aplicación)
+        cache = TinyLFUCache(max_bytes=int(budget_mb * 1024 * 1024), codec=codec)
+        for i, text in enumerate(texts):
+            cache.put(i.to_bytes(16, 'little'), text)
+        print(f"{name:>14} {ratio:>6.2f} {encode_us:>10.1f} {decode_us:>12.1f} {len(cache):>24}")
+
+
+def bench_segmentation(sizes: List[float], chunk_size: int, repeat: int):
+    print(f"{'MB':>6} {'anterior (s)':>14} {'spans (s)':>12} {'MB/s':>10} {'aceleración':>12}")
+    for megabytes in sizes:
+        text = sample_text(megabytes)
+        spans = segment_spans(text, chunk_size)
+        # Los spans deben cubrir el texto exacto y respetar el máximo
+        assert ''.join(text[start:end] for start, end in spans) == text
+        assert all(end - start <= chunk_size for start, end in spans)
+
+        legacy = timed(lambda: legacy_split_text(text, chunk_size), repeat)
+        current = timed(lambda: segment_spans(text, chunk_size), repeat)
+        print(f"{megabytes:>6g} {legacy:>14.3f} {current:>12.3f} "
+              f"{megabytes / current:>10.1f} {legacy / current:>11.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks del traductor")
+    sub = parser.add_subparsers(dest='suite', required=True)
+
+    seg = sub.add_parser('segmentation', help="Segmentación en oraciones sobre textos de varios MB")
+    seg.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 8], help="Tamaños de entrada en MB")
+    seg.add_argument('--chunk-size', type=int, default=150)
+    seg.add_argument('--repeat', type=int, default=3)
+
+    cache = sub.add_parser('cache', help="Caché de traducciones con claves de popularidad Zipf")
+    cache.add_argument('--capacity', type=int, default=500, help="Entradas máximas (Config.MAX_CACHE_SIZE)")
+    cache.add_argument('--universe', type=int, default=20000, help="Oraciones distintas")
+    cache.add_argument('--operations', type=int, default=500000)
+    cache.add_argument('--alpha', type=float, nargs='+', default=[0.8, 1.0, 1.2], help="Exponentes Zipf")
+    cache.add_argument('--miss-ms', type=float, default=150, help="Latencia de una petición al backend")
+
+    comp = sub.add_parser('compression', help="Compresión de traducciones largas en caché")
+    comp.add_argument('--count', type=int, default=5000, help="Traducciones sintéticas")
+    comp.add_argument('--threshold', type=int, default=128, help="Bytes a partir de los que se comprime")
+    comp.add_argument('--budget-mb', type=float, default=8, help="Presupuesto de la caché en memoria")
+    
+    args = parser.parse_args()
+    if args.suite == 'segmentation':
+        bench_segmentation(args.sizes, args.chunk_size, args.repeat)
+    elif args.suite == 'cache':
+        bench_cache(args.capacity, args.universe, args.operations, args.alpha, args.miss_ms)
+    elif args.suite == 'compression':
+        bench_compression(args.count, args.threshold, args.budget_mb)
+
+
+if __name__ == '__main__':
+    main()
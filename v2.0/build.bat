@@ -35,6 +35,7 @@ python -m PyInstaller ^
     --onefile ^
     --windowed ^
     --name "TraductorChino_v2" ^
+    --paths ".." ^
     --hidden-import "PyQt6" ^
     --hidden-import "PyQt6.QtCore" ^
     --hidden-import "PyQt6.QtGui" ^
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instantánea inmutable de la caché de traducciones, leída con mmap
+El exportador compila la caché SQLite en un archivo binario: una tabla de
+registros de tamaño fijo ordenada por el resumen BLAKE2b de la clave
+(TranslationStore.digest) y un blob con las traducciones en UTF-8. Los textos
+originales no se guardan. El lector mapea el archivo y responde cada consulta con
+una búsqueda binaria directamente sobre el mapa, sin cargar nada en diccionarios:
+abrirlo es instantáneo y las páginas se comparten entre procesos.
+
+Formato (little-endian):
+    cabecera  MAGIC, versión, nº de registros, offset de la tabla, offset del blob
+    tabla     registros (resumen 16 bytes, offset valor u64, longitud valor u32)
+              ordenados por resumen
+    blob      traducciones concatenadas
+
+Uso:
+    python cache_snapshot.py --db ~/.traductor_chino/traducciones.sqlite3 --out traducciones.snap
+"""
+
+import argparse
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+# Módulos compartidos con la v1.0 (carpeta traductor_comun en la raíz del repositorio)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from traductor_comun.codec import ValueCodec
+from traductor_comun.translation_store import DIGEST_SIZE, TranslationStore, digest_key, load_dictionaries
+
+MAGIC = b'TRSNAP\x00\x01'
+VERSION = 2  # 2: registros indexados por el resumen de la clave en lugar de la clave completa
+HEADER = struct.Struct('<8sIQQQ')
+RECORD = struct.Struct(f'<{DIGEST_SIZE}sQI')
+
+
+def write_snapshot(entries: Iterable[Tuple[bytes, str]], path: Union[str, Path]) -> int:
+    """Escribe (resumen, traducción) de forma atómica (un lector abierto sigue viendo la versión anterior)"""
+    records = []
+    blob = bytearray()
+    for digest, value in entries:
+        value_bytes = value.encode('utf-8')
+        records.append((digest, len(blob), len(value_bytes)))
+        blob += value_bytes
+    records.sort()
+
+    table_offset = HEADER.size
+    blob_offset = table_offset + RECORD.size * len(records)
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), table_offset, blob_offset))
+        for record in records:
+            f.write(RECORD.pack(*record))
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(records)
+
+
+def export_store(db_path: Union[str, Path], out_path: Union[str, Path]) -> int:
+    """Compila todas las traducciones de la caché SQLite en una instantánea"""
+    conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+    try:
+        # Las traducciones comprimidas se descomprimen: la instantánea se lee sin códec
+        codec = ValueCodec(train_after=0)
+        load_dictionaries(conn, codec)
+        rows = conn.execute("SELECT source, target, backend, text, translation FROM translations")
+        # Las claves de la base ya están normalizadas
+        entries = ((digest_key(row[:4]), codec.decode(row[4])) for row in rows)
+        return write_snapshot(entries, out_path)
+    finally:
+        conn.close()
+
+
+class CacheSnapshot:
+    """Lector de solo lectura: búsqueda binaria sobre el archivo mapeado en memoria"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self._table, self._blob = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path} no es una instantánea de caché válida")
+        self.reads = 0
+        self.hits = 0
+
+    def get(self, source: str, target: str, backend: str, text: str) -> Optional[str]:
+        """Traducción de la instantánea o None"""
+        self.reads += 1
+        wanted = TranslationStore.digest(source, target, backend, text)
+
+        # Primer registro con resumen >= buscado (bytes se comparan en orden lexicográfico, igual que sort())
+        mm, table, size = self._map, self._table, RECORD.size
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            offset = table + mid * size
+            if mm[offset:offset + DIGEST_SIZE] < wanted:
+                low = mid + 1
+            else:
+                high = mid
+        if low == self.count:
+            return None
+        digest, value_off, value_len = RECORD.unpack_from(mm, table + low * size)
+        if digest != wanted:
+            return None
+        self.hits += 1
+        return mm[self._blob + value_off:self._blob + value_off + value_len].decode('utf-8')
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta la caché SQLite a una instantánea de solo lectura")
+    parser.add_argument('--db', default=str(Path.home() / ".traductor_chino" / "traducciones.sqlite3"))
+    parser.add_argument('--out', default=str(Path.home() / ".traductor_chino" / "traducciones.snap"))
+    args = parser.parse_args()
+
+    count = export_store(args.db, args.out)
+    size = Path(args.out).stat().st_size
+    print(f"📦 {count} traducciones exportadas a {args.out} ({size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
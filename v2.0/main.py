@@ -8,11 +8,18 @@ Arquitectura: MVC con gestión eficiente de recursos
 
 import sys
 import os
+import time
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Callable, Hashable, Iterable
 import threading
 import queue
-from functools import lru_cache
+import hashlib
+import re
+import sqlite3
+from bisect import bisect_left
+from collections import deque
+from difflib import SequenceMatcher
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import psutil
 
 # PyQt6 - Framework moderno y optimizado
@@ -22,12 +29,25 @@ from PyQt6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont, QColor, QPalette, QIcon
+from PyQt6.QtGui import QFont, QColor, QPalette, QIcon, QTextCursor
 
-# Librerías de traducción y pronunciación
-from deep_translator import GoogleTranslator
+# Pronunciación (las librerías de traducción las usa traductor_comun.backends)
 from pypinyin import pinyin, Style
 
+# Módulos compartidos con la v1.0 (carpeta traductor_comun en la raíz del repositorio)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from traductor_comun.backends import (
+    AdaptiveRateLimiter, BackendUnavailable, GoogleBackend, HttpPool, LatencyTracker, RetryPolicy, StubBackend,
+    TranslationBackend
+)
+from traductor_comun.cache import TinyLFUCache
+from traductor_comun.codec import ValueCodec
+from traductor_comun.scheduler import BULK, INTERACTIVE, PREFETCH, PriorityScheduler, classify
+from traductor_comun.segmentation import (MARKER_CHARS, join_segments, normalize_sentence, pack_spans, segment_spans,
+                                          segment_text, split_segments)
+from traductor_comun.translation_store import TranslationStore
+from cache_snapshot import CacheSnapshot
+
 # ============================================================================
 # CONFIGURACIÓN Y CONSTANTES
 # ============================================================================
@@ -44,9 +64,60 @@ class Config:
     DEFAULT_HEIGHT = 800
     
     # Caché y rendimiento
-    MAX_CACHE_SIZE = 500
+    TRANSLATION_CACHE_BYTES = 8 * 1024 * 1024  # Presupuesto en memoria (claves + valores) de cada caché
+    PINYIN_CACHE_BYTES = 2 * 1024 * 1024
+    COMPRESS_THRESHOLD_BYTES = 128  # Traducciones más largas se guardan comprimidas (memoria y disco)
+    PERSISTENT_CACHE = True  # Guardar traducciones en disco (SQLite compartido con la v1.0)
+    CACHE_DB_PATH = Path(os.environ.get('TRADUCTOR_CACHE_DB', Path.home() / ".traductor_chino" / "traducciones.sqlite3"))
+    # Instantánea de solo lectura generada con cache_snapshot.py (se usa si existe)
+    CACHE_SNAPSHOT_PATH = Path(os.environ.get('TRADUCTOR_CACHE_SNAPSHOT',
+                                              Path.home() / ".traductor_chino" / "traducciones.snap"))
     TRANSLATION_TIMEOUT = 5
-    CHUNK_SIZE = 150  # Caracteres por chunk para traducción (optimizado para deep-translator)
+    PARALLEL_TRANSLATION = True  # Traducir varios chunks a la vez
+    MAX_CONCURRENT_REQUESTS = 4  # Peticiones simultáneas por trabajo de traducción
+    STREAM_TRANSLATION = True  # Mostrar cada fragmento en cuanto él y los anteriores están listos
+    INCREMENTAL_TRANSLATION = True  # Re-traducir solo las oraciones editadas desde el último trabajo
+    PREFETCH_OTHER_LANGUAGE = True  # Al quedar libre, traducir en segundo plano al otro idioma (es/en)
+    HTTP_POOL_SIZE = MAX_CONCURRENT_REQUESTS * 2  # Conexiones keep-alive (traducción + pinyin en paralelo)
+    
+    # Planificador por prioridad: el editor adelanta a precargas y documentos largos en la cola
+    SCHEDULER_WORKERS = MAX_CONCURRENT_REQUESTS + 2  # Hilos compartidos por todas las clases
+    SCHEDULER_BUDGETS = {PREFETCH: 1, BULK: 3}  # Peticiones en vuelo por clase (el resto queda para el editor)
+    BULK_THRESHOLD_CHARS = 20000  # Trabajos más largos se tratan como documento masivo
+    
+    # Limitador adaptativo (token bucket + AIMD) compartido por todas las peticiones
+    RATE_LIMIT_START = 20.0  # Peticiones/segundo iniciales (arranque rápido)
+    RATE_LIMIT_MIN = 0.5
+    RATE_LIMIT_MAX = 50.0
+    RATE_LIMIT_BURST = 8  # Ráfaga máxima de peticiones seguidas
+    RATE_LIMIT_INCREASE = 0.5  # Subida aditiva: +0.5 req/s por cada segundo de respuestas correctas
+    RATE_LIMIT_DECREASE = 0.5  # Factor multiplicativo ante throttling
+    RATE_LIMIT_COOLDOWN = 1.0  # Segundos mínimos entre reducciones (los 429 en vuelo son el mismo evento)
+    
+    # Reintentos con backoff exponencial + jitter y peticiones de cobertura (hedging)
+    RETRY_ATTEMPTS = 3
+    RETRY_BASE_DELAY = 0.25  # Segundos; se duplica en cada intento
+    RETRY_MAX_DELAY = 4.0
+    HEDGE_REQUESTS = True  # Lanzar un duplicado si la petición supera el p95 de su tamaño
+    HEDGE_MIN_SAMPLES = 20  # Latencias observadas antes de empezar a cubrir
+    HEDGE_MIN_DELAY = 0.2  # Segundos mínimos antes de lanzar el duplicado
+    
+    # Circuit breaker: modo degradado (solo caché + pinyin) cuando el backend cae
+    BREAKER_FAILURE_THRESHOLD = 5  # Fallos consecutivos para abrir el circuito
+    BREAKER_PROBE_INTERVAL = 5.0  # Segundos entre sondeos en segundo plano
+    UNTRANSLATED_MARK = "⚠️[{text}]"  # Marca de segmentos sin traducir en modo degradado
+    OFFLINE_GROUP_TEXT = "📴 sin conexión"
+    
+    # Backend de traducción ('google', 'stub' para el servidor local de pruebas o 'cedict' sin red)
+    BACKEND = os.environ.get('TRADUCTOR_BACKEND', 'google')
+    STUB_SERVER_URL = os.environ.get('TRADUCTOR_STUB_URL', 'http://127.0.0.1:8765')
+    
+    # Diccionarios CC-CEDICT por idioma de glosas ('es' usa el de 'en' si falta)
+    CEDICT_PATHS = {
+        'en': os.environ.get('TRADUCTOR_CEDICT_EN', 'cedict_ts.u8'),
+        'es': os.environ.get('TRADUCTOR_CEDICT_ES', 'cedict_es.u8'),
+    }
+    OFFLINE_GLOSS_MARK = "📖{text}"  # Glosas del diccionario usadas mientras el backend está caído
     
     # Fuentes optimizadas
     FONT_FAMILY = "Segoe UI"
@@ -68,43 +139,223 @@ class Config:
 # GESTOR DE RECURSOS Y CACHÉ
 # ============================================================================
 
-class ResourceManager:
-    """Gestiona recursos de sistema y caché de manera eficiente"""
+class SingleFlight:
+    """Registro de peticiones en vuelo: llamadas concurrentes con la misma clave comparten un único resultado"""
     
     def __init__(self):
-        self.translation_cache: Dict[str, str] = {}
-        self.pinyin_cache: Dict[str, List] = {}
-        self.cache_hits = 0
-        self.cache_misses = 0
-        
-    @lru_cache(maxsize=1000)
-    def get_pinyin(self, text: str) -> List:
-        """Obtiene pinyin con caché optimizado"""
-        return pinyin(text, style=Style.TONE, heteronym=False)
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.shared = 0  # Llamadas que esperaron a una petición ya en vuelo
     
-    def get_translation(self, text: str, target_lang: str) -> Optional[str]:
-        """Obtiene traducción con caché"""
-        cache_key = f"{text}_{target_lang}"
+    def do(self, key: Hashable, fn: Callable[[], str]) -> str:
+        """Ejecuta fn una sola vez por clave; el resto de llamadores espera su resultado"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.shared += 1
         
-        if cache_key in self.translation_cache:
-            self.cache_hits += 1
-            return self.translation_cache[cache_key]
+        if not leader:
+            return future.result()
         
-        self.cache_misses += 1
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+def format_bytes(size: int) -> str:
+    """Tamaño legible (KB por debajo de 1 MB)"""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+_value_codec: Optional[ValueCodec] = None
+_value_codec_lock = threading.Lock()
+
+
+def get_value_codec() -> ValueCodec:
+    """Códec de compresión único del proceso: memoria y disco comparten sus diccionarios"""
+    global _value_codec
+    with _value_codec_lock:
+        if _value_codec is None:
+            _value_codec = ValueCodec(threshold=Config.COMPRESS_THRESHOLD_BYTES)
+        return _value_codec
+
+
+_translation_store: Optional[TranslationStore] = None
+_translation_store_lock = threading.Lock()
+
+
+def get_translation_store() -> Optional[TranslationStore]:
+    """Caché en disco única del proceso; None si está desactivada o no se puede abrir"""
+    global _translation_store
+    if not Config.PERSISTENT_CACHE:
         return None
+    with _translation_store_lock:
+        if _translation_store is None:
+            try:
+                _translation_store = TranslationStore(Config.CACHE_DB_PATH, codec=get_value_codec())
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Caché persistente no disponible ({e}), solo en memoria")
+                Config.PERSISTENT_CACHE = False
+        return _translation_store
+
+
+_cache_snapshot: Optional[CacheSnapshot] = None
+_cache_snapshot_lock = threading.Lock()
+
+
+def get_cache_snapshot() -> Optional[CacheSnapshot]:
+    """Instantánea mapeada en memoria única del proceso; None si no se ha exportado ninguna"""
+    global _cache_snapshot
+    with _cache_snapshot_lock:
+        if _cache_snapshot is None and Config.CACHE_SNAPSHOT_PATH.exists():
+            try:
+                _cache_snapshot = CacheSnapshot(Config.CACHE_SNAPSHOT_PATH)
+                print(f"📦 Instantánea de caché: {len(_cache_snapshot)} traducciones")
+            except (ValueError, OSError) as e:
+                print(f"⚠️ Instantánea de caché no válida ({e}), se ignora")
+        return _cache_snapshot
+
+
+class ResourceManager:
+    """Gestiona recursos de sistema y la jerarquía de cachés de traducción
     
-    def set_translation(self, text: str, target_lang: str, translation: str):
-        """Guarda traducción en caché con límite"""
-        cache_key = f"{text}_{target_lang}"
-        
-        # Limpiar caché si excede límite
-        if len(self.translation_cache) >= Config.MAX_CACHE_SIZE:
-            # Eliminar 20% más antiguo
-            keys_to_remove = list(self.translation_cache.keys())[:Config.MAX_CACHE_SIZE // 5]
-            for key in keys_to_remove:
-                del self.translation_cache[key]
+    L1: W-TinyLFU en memoria (pequeña y caliente). L2: instantánea mapeada y SQLite en disco.
+    Las escrituras van a L1 y se encolan en L2, así que lo que L1 desaloja queda degradado a L2
+    en lugar de perderse; un acierto en L2 se promueve a L1. L2 solo se lee desde los workers
+    o desde el hilo de prefetch(), nunca desde el hilo de la interfaz.
+    """
+    
+    def __init__(self, backend_id: str, store: Optional[TranslationStore] = None,
+                 snapshot: Optional[CacheSnapshot] = None):
+        # L1 con presupuesto en bytes: al llenarse desaloja solo lo necesario.
+        # Las traducciones largas pesan comprimidas, así que caben varias veces más
+        self.translation_cache = TinyLFUCache(max_bytes=Config.TRANSLATION_CACHE_BYTES,
+                                              codec=store.codec if store is not None else get_value_codec())
+        self.pinyin_cache = TinyLFUCache(max_bytes=Config.PINYIN_CACHE_BYTES)
+        # L2 (solo lectura y en disco): lo traducido en sesiones anteriores (o por la v1.0) no vuelve a pedirse
+        self.snapshot = snapshot
+        self.store = store
+        self.promotions = 0
+        self.demotions = 0  # Salidas de L1 (desalojadas o no admitidas) que siguen en L2
+        self._l2_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-l2")
+        # Las claves incluyen el backend y su versión: resultados de proveedores distintos conviven
+        self.backend_id = backend_id
+        self.inflight = SingleFlight()
+    
+    @property
+    def cache_hits(self) -> int:
+        return self.translation_cache.hits
+    
+    @property
+    def cache_misses(self) -> int:
+        return self.translation_cache.misses
+    
+    def get_pinyin(self, text: str) -> List:
+        """Obtiene pinyin con caché optimizado"""
+        result = self.pinyin_cache.get(text)
+        if result is None:
+            result = pinyin(text, style=Style.TONE, heteronym=False)
+            self.pinyin_cache.put(text, result)
+        return result
+    
+    def cache_usage(self) -> Dict[str, Tuple[int, int]]:
+        """Bytes ocupados y presupuesto de cada caché"""
+        return {
+            'traducciones': (self.translation_cache.weight, self.translation_cache.capacity),
+            'pinyin': (self.pinyin_cache.weight, self.pinyin_cache.capacity),
+        }
+    
+    def cache_key(self, text: str, target_lang: str, source_lang: str = 'zh-CN') -> bytes:
+        """Resumen de 16 bytes del texto normalizado, los idiomas y el backend (no guarda el texto en memoria)"""
+        return TranslationStore.digest(source_lang, target_lang, self.backend_id, text)
+    
+    def get_translation(self, text: str, target_lang: str, source_lang: str = 'zh-CN') -> Optional[str]:
+        """Obtiene traducción con caché (L1 y después L2)"""
+        cached = self.translation_cache.get(self.cache_key(text, target_lang, source_lang))
+        if cached is not None:
+            return cached
+        return self._read_l2([text], target_lang, source_lang).get(text)
+    
+    def get_translations(self, texts: Iterable[str], target_lang: str, source_lang: str = 'zh-CN') -> Dict[str, str]:
+        """Traducciones conocidas de varios textos: L1 y, para los fallos, L2 en una sola consulta"""
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        for text in dict.fromkeys(texts):
+            cached = self.translation_cache.get(self.cache_key(text, target_lang, source_lang))
+            if cached is not None:
+                found[text] = cached
+            else:
+                missing.append(text)
+        if missing:
+            found.update(self._read_l2(missing, target_lang, source_lang))
+        return found
+    
+    def prefetch(self, texts: List[str], target_lang: str, source_lang: str = 'zh-CN') -> 'Future[Dict[str, str]]':
+        """get_translations en el hilo de L2: el llamador sigue trabajando mientras se lee el disco"""
+        return self._l2_executor.submit(self.get_translations, texts, target_lang, source_lang)
+    
+    def _read_l2(self, texts: List[str], target_lang: str, source_lang: str) -> Dict[str, str]:
+        """Busca en la instantánea y después en SQLite (una consulta por lote) y promueve los aciertos a L1"""
+        found: Dict[str, str] = {}
+        if self.snapshot is not None:
+            for text in texts:
+                translation = self.snapshot.get(source_lang, target_lang, self.backend_id, text)
+                if translation:
+                    found[text] = translation
+        if self.store is not None and len(found) < len(texts):
+            found.update(self.store.get_many(source_lang, target_lang, self.backend_id,
+                                             [text for text in texts if text not in found]))
+        for text, translation in found.items():
+            self._put_l1(self.cache_key(text, target_lang, source_lang), translation)
+        self.promotions += len(found)
+        return found
+    
+    def set_translation(self, text: str, target_lang: str, translation: str, source_lang: str = 'zh-CN'):
+        """Guarda traducción en caché (al llenarse solo desplaza entradas menos populares) y la encola para disco"""
+        self._put_l1(self.cache_key(text, target_lang, source_lang), translation)
+        if self.store is not None:
+            self.store.put(source_lang, target_lang, self.backend_id, text, translation)
+    
+    def _put_l1(self, key: bytes, translation: str):
+        """Escribe en L1; lo que sale de L1 solo es una degradación si SQLite recibió su escritura"""
+        cache = self.translation_cache
+        before = cache.evictions + cache.rejections
+        cache.put(key, translation)
+        if self.store is not None:
+            self.demotions += cache.evictions + cache.rejections - before
+    
+    def fetch_translation(self, text: str, target_lang: str, backend: 'TranslationBackend',
+                          source_lang: str = 'zh-CN') -> str:
+        """Traduce con caché; peticiones idénticas simultáneas comparten una sola llamada al backend"""
+        cached = self.get_translation(text, target_lang, source_lang)
+        if cached:
+            return cached
+        cache_key = self.cache_key(text, target_lang, source_lang)
+        
+        def request() -> str:
+            # Otro líder pudo completar la misma traducción entre la consulta y el registro
+            cached_now = self.translation_cache.peek(cache_key)
+            if cached_now:
+                return cached_now
+            result = backend.translate(text, source_lang, target_lang)
+            if result:
+                self.set_translation(text, target_lang, result, source_lang)
+            return result
         
-        self.translation_cache[cache_key] = translation
+        return self.inflight.do(cache_key, request)
     
     def get_memory_usage(self) -> float:
         """Retorna uso de memoria en MB"""
@@ -115,185 +366,794 @@ class ResourceManager:
         """Limpia caché para liberar memoria"""
         self.translation_cache.clear()
         self.pinyin_cache.clear()
-        self.get_pinyin.cache_clear()
         print(f"🧹 Caché limpiado. Hits: {self.cache_hits}, Misses: {self.cache_misses}")
+    
+    def close(self):
+        """Vacía L1 y cierra L2 (lo pendiente de la caché en disco se confirma antes de salir)"""
+        self._l2_executor.shutdown(wait=True, cancel_futures=True)
+        self.clear_cache()
+        if self.store is not None:
+            self.store.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+
+# ============================================================================
+# BACKENDS DE TRADUCCIÓN
+# ============================================================================
+
+_http_pool: Optional[HttpPool] = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpPool:
+    """Pool HTTP único del proceso, compartido por todos los backends"""
+    global _http_pool
+    with _http_pool_lock:
+        if _http_pool is None:
+            _http_pool = HttpPool(Config.HTTP_POOL_SIZE, Config.TRANSLATION_TIMEOUT)
+        return _http_pool
+
+
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Limitador único del proceso, compartido por todos los backends remotos"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter(Config.RATE_LIMIT_START, Config.RATE_LIMIT_MIN,
+                                                Config.RATE_LIMIT_MAX, Config.RATE_LIMIT_BURST,
+                                                Config.RATE_LIMIT_INCREASE, Config.RATE_LIMIT_DECREASE,
+                                                Config.RATE_LIMIT_COOLDOWN)
+        return _rate_limiter
+
+
+_latency_tracker = LatencyTracker(min_samples=Config.HEDGE_MIN_SAMPLES, min_delay=Config.HEDGE_MIN_DELAY,
+                                  max_workers=Config.HTTP_POOL_SIZE * 2)
+_latency_tracker.enabled = Config.HEDGE_REQUESTS
+
+
+def remote_backend_options() -> Dict:
+    """Limitador, hedging, reintentos y breaker de los backends de red según Config"""
+    return {
+        'limiter': get_rate_limiter(),
+        'latency': _latency_tracker,
+        'retry_policy': RetryPolicy(Config.RETRY_ATTEMPTS, Config.RETRY_BASE_DELAY, Config.RETRY_MAX_DELAY),
+        'breaker_threshold': Config.BREAKER_FAILURE_THRESHOLD,
+        'probe_interval': Config.BREAKER_PROBE_INTERVAL,
+    }
+
+
+class CedictIndex:
+    """Diccionario CC-CEDICT compacto: claves ordenadas + glosas en paralelo, búsqueda binaria"""
+    
+    # Tradicional Simplificado [pin1 yin1] /glosa 1/glosa 2/
+    LINE = re.compile(r'^(\S+) (\S+) \[([^\]]*)\] /(.*)/\s*$')
+    PUNCTUATION = str.maketrans('。，、；：！？（）“”‘’《》', '.,,;:!?()""\'\'""')
+    NO_SPACE_BEFORE = set('.,;:!?)"\'\n')
+    
+    def __init__(self, keys: List[str], glosses: List[str]):
+        self.keys = keys
+        self.glosses = glosses
+        self.max_len = max((len(key) for key in keys), default=0)
+    
+    @classmethod
+    def load(cls, path: Path) -> 'CedictIndex':
+        """Lee un archivo en formato CC-CEDICT (simplificado y tradicional apuntan a la misma glosa)"""
+        entries: Dict[str, Tuple[str, bool]] = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                match = cls.LINE.match(line)
+                if not match:
+                    continue
+                traditional, simplified, reading, body = match.groups()
+                senses = [sense for sense in body.split('/') if sense]
+                useful = [sense for sense in senses if not sense.startswith('CL:')] or senses
+                if not useful:
+                    continue
+                # Las lecturas en mayúscula son nombres propios: ceden ante la acepción común
+                common = not reading[:1].isupper()
+                for key in (simplified, traditional):
+                    current = entries.get(key)
+                    if current is None or (common and not current[1]):
+                        entries[key] = (useful[0], common)
+        
+        keys = sorted(entries)
+        return cls(keys, [entries[key][0] for key in keys])
+    
+    def lookup(self, word: str) -> Optional[str]:
+        """Glosa de una palabra exacta"""
+        idx = bisect_left(self.keys, word)
+        if idx < len(self.keys) and self.keys[idx] == word:
+            return self.glosses[idx]
+        return None
+    
+    def segment(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        """Máxima coincidencia hacia delante: (palabra, glosa) o (texto sin entrada, None)"""
+        tokens: List[Tuple[str, Optional[str]]] = []
+        i = 0
+        while i < len(text):
+            best_len, best_gloss = 0, None
+            for length in range(1, min(self.max_len, len(text) - i) + 1):
+                prefix = text[i:i + length]
+                idx = bisect_left(self.keys, prefix)
+                if idx == len(self.keys) or not self.keys[idx].startswith(prefix):
+                    break  # Ninguna palabra más larga empieza así
+                if self.keys[idx] == prefix:
+                    best_len, best_gloss = length, self.glosses[idx]
+            
+            if best_len:
+                tokens.append((text[i:i + best_len], best_gloss))
+                i += best_len
+            elif tokens and tokens[-1][1] is None:
+                tokens[-1] = (tokens[-1][0] + text[i], None)
+                i += 1
+            else:
+                tokens.append((text[i], None))
+                i += 1
+        return tokens
+    
+    def gloss(self, text: str) -> str:
+        """Traducción palabra a palabra: glosas separadas por espacios, el resto se conserva"""
+        out: List[str] = []
+        for word, gloss in self.segment(text):
+            piece = gloss if gloss is not None else word.translate(self.PUNCTUATION)
+            if out and not out[-1][-1].isspace() and not piece[0].isspace() \
+                    and piece[0] not in self.NO_SPACE_BEFORE and (gloss is not None or out[-1][-1] not in '("'):
+                out.append(' ')
+            out.append(piece)
+        return ''.join(out)
+
+
+class DictionaryBackend(TranslationBackend):
+    """Glosas palabra a palabra desde un diccionario CC-CEDICT local: sin red y en microsegundos"""
+    name = "cedict"
+    remote = False
+    max_request_chars = 100_000
+    
+    def __init__(self, paths: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.paths = paths or Config.CEDICT_PATHS
+        self._indexes: Dict[str, Optional[CedictIndex]] = {}
+        self._lock = threading.Lock()
+        self.version = f"{type(self).version}-{self._dictionaries_id()}"
+    
+    def _dictionaries_id(self) -> str:
+        """Identidad de los diccionarios que usa cada idioma (archivo y tamaño)
+        
+        Forma parte de la versión: las glosas en caché de un idioma que usaba las inglesas
+        no se reutilizan cuando aparece su propio diccionario, ni al actualizar un archivo.
+        """
+        sources = []
+        for lang in sorted(self.paths):
+            path = self._source(lang)
+            sources.append(f"{lang}={path.name}:{path.stat().st_size}" if path else f"{lang}=-")
+        return hashlib.blake2b(';'.join(sources).encode('utf-8'), digest_size=4).hexdigest()
+    
+    def _resolve(self, lang: str) -> Optional[Path]:
+        """Ruta del diccionario de glosas para el idioma (relativa a la aplicación)"""
+        raw = self.paths.get(lang)
+        if not raw:
+            return None
+        path = Path(raw)
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parent / path
+        return path if path.exists() else None
+    
+    def available(self) -> bool:
+        return any(self._resolve(lang) for lang in self.paths)
+    
+    def _source(self, lang: str) -> Optional[Path]:
+        """Diccionario que usa el idioma: el suyo o, si no lo hay, el de glosas en inglés"""
+        path = self._resolve(lang)
+        if path is None and lang != 'en':
+            path = self._resolve('en')
+        return path
+    
+    def index(self, lang: str) -> Optional[CedictIndex]:
+        """Índice del idioma, cargado una sola vez; sin diccionario propio se usan las glosas en inglés"""
+        with self._lock:
+            if lang not in self._indexes:
+                path = self._source(lang)
+                if path is not None:
+                    start = time.perf_counter()
+                    self._indexes[lang] = CedictIndex.load(path)
+                    print(f"📖 Diccionario {path.name} ({lang}): {len(self._indexes[lang].keys)} entradas "
+                          f"en {time.perf_counter() - start:.1f}s")
+                else:
+                    self._indexes[lang] = None
+            return self._indexes[lang]
+    
+    def _translate(self, text: str, source: str, target: str) -> str:
+        index = self.index(target)
+        if index is None:
+            raise BackendUnavailable(f"Sin diccionario CC-CEDICT para '{target}'")
+        return index.gloss(text)
+
+
+_offline_backend: Optional[DictionaryBackend] = None
+_offline_backend_lock = threading.Lock()
+
+
+def get_offline_backend() -> Optional[DictionaryBackend]:
+    """Diccionario local para modo degradado; None si no hay ningún archivo CC-CEDICT"""
+    global _offline_backend
+    with _offline_backend_lock:
+        if _offline_backend is None:
+            _offline_backend = DictionaryBackend()
+    return _offline_backend if _offline_backend.available() else None
+
+
+def offline_gloss(text: str, target_lang: str) -> Optional[str]:
+    """Glosas del diccionario local marcadas como provisionales; None si no hay diccionario"""
+    offline = get_offline_backend()
+    if offline is None:
+        return None
+    try:
+        return Config.OFFLINE_GLOSS_MARK.format(text=offline.translate(text, 'zh-CN', target_lang))
+    except BackendUnavailable:
+        return None
+
+
+BACKENDS: Dict[str, Callable[[], TranslationBackend]] = {
+    GoogleBackend.name: lambda: GoogleBackend(get_http_pool(), **remote_backend_options()),
+    StubBackend.name: lambda: StubBackend(get_http_pool(), Config.STUB_SERVER_URL, **remote_backend_options()),
+    DictionaryBackend.name: DictionaryBackend,
+}
+
+
+def create_backend(name: str = Config.BACKEND) -> TranslationBackend:
+    """Crea el backend configurado (google por defecto)"""
+    factory = BACKENDS.get(name)
+    if factory is None:
+        print(f"⚠️ Backend desconocido '{name}', usando google")
+        factory = BACKENDS[GoogleBackend.name]
+    return factory()
 
 
 # ============================================================================
 # WORKERS ASÍNCRONOS
 # ============================================================================
 
+class JobCancelled(Exception):
+    """El trabajo se canceló porque el usuario lanzó uno más reciente"""
+
+
+class CancellationToken:
+    """Cancelación cooperativa: los bucles de los workers la consultan entre pasos
+    
+    Un token hijo (parent) queda cancelado también al cancelar el padre, pero no al revés.
+    """
+    
+    def __init__(self, parent: Optional['CancellationToken'] = None):
+        self._event = threading.Event()
+        self.parent = parent
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.parent is not None and self.parent.cancelled)
+    
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+
+_scheduler: Optional[PriorityScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> PriorityScheduler:
+    """Planificador único del proceso: todas las peticiones de traducción pasan por él"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PriorityScheduler(Config.SCHEDULER_WORKERS, Config.SCHEDULER_BUDGETS)
+        return _scheduler
+
+
+def match_sentences(old: List[str], new: List[str]) -> Dict[int, int]:
+    """Empareja las oraciones que no cambiaron entre dos versiones: índice antiguo -> nuevo"""
+    # Prefijo y sufijo comunes primero: una edición local se resuelve en tiempo lineal
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    
+    mapping = {i: i for i in range(prefix)}
+    offset = len(new) - len(old)
+    for i in range(len(old) - suffix, len(old)):
+        mapping[i] = i + offset
+    
+    # El tramo central puede contener oraciones movidas o repetidas
+    middle_old = old[prefix:len(old) - suffix]
+    middle_new = new[prefix:len(new) - suffix]
+    if middle_old and middle_new:
+        matcher = SequenceMatcher(None, middle_old, middle_new, autojunk=False)
+        for a, b, size in matcher.get_matching_blocks():
+            for k in range(size):
+                mapping[prefix + a + k] = prefix + b + k
+    return mapping
+
+
+class TranslationSnapshot:
+    """Última versión traducida: cada oración con su traducción"""
+    
+    def __init__(self, target_lang: str, sentences: List[str], translations: List[Optional[str]],
+                 reusable: List[bool], text: str = "", output: str = ""):
+        self.target_lang = target_lang
+        self.sentences = sentences
+        self.translations = translations
+        self.reusable = reusable  # False para las marcadas sin traducir (se reintentan)
+        self.text = text  # Versión del texto de entrada que traduce
+        self.output = output  # Traducción completa tal como se mostró
+    
+    def matches(self, text: str) -> bool:
+        """Traduce exactamente este texto y sin fragmentos pendientes de reintento"""
+        return self.text == text and bool(self.output) and all(self.reusable)
+
+
+class PinyinSnapshot:
+    """Última versión con pinyin: grupos de cada oración, ya traducidos"""
+    
+    def __init__(self, target_lang: str, sentences: List[str], groups: List[List[Dict]], text: str = ""):
+        self.target_lang = target_lang
+        self.sentences = sentences
+        self.groups = groups  # groups[i] son los grupos de sentences[i]
+        self.text = text  # Versión del texto de entrada
+    
+    def flat_groups(self) -> List[Dict]:
+        """Grupos en el orden de la tabla"""
+        return [group for groups in self.groups for group in groups]
+
+
 class TranslationWorker(QThread):
-    """Worker asíncrono para traducciones sin bloquear UI - Con fragmentación"""
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-    progress = pyqtSignal(int, str)  # (porcentaje, mensaje)
+    """Worker asíncrono para traducciones sin bloquear UI - Oraciones empaquetadas por petición"""
+    # Todas las señales llevan el job_id para que la UI descarte resultados obsoletos
+    finished = pyqtSignal(int, str)
+    error = pyqtSignal(int, str)
+    progress = pyqtSignal(int, int, str)  # (job_id, porcentaje, mensaje)
+    degraded = pyqtSignal(int, int)  # Oraciones que quedaron sin traducir (backend caído)
+    partial = pyqtSignal(int, str)  # Siguiente oración traducida, en orden (modo streaming)
     
-    def __init__(self, text: str, target_lang: str, resource_mgr: ResourceManager):
+    def __init__(self, text: str, target_lang: str, resource_mgr: ResourceManager,
+                 backend: TranslationBackend, job_id: int = 0, token: Optional[CancellationToken] = None,
+                 previous: Optional[TranslationSnapshot] = None, background: bool = False):
         super().__init__()
         self.text = text
         self.target_lang = target_lang
         self.resource_mgr = resource_mgr
+        self.backend = backend
+        self.job_id = job_id
+        self.token = token or CancellationToken()
+        self.previous = previous  # Versión anterior para re-traducir solo lo editado
+        self.background = background  # Precarga: sin streaming y con la prioridad más baja que el editor
+        self.priority = classify(len(text), background, Config.BULK_THRESHOLD_CHARS)
+        self.snapshot: Optional[TranslationSnapshot] = None
+        self.stats: Dict[str, float] = {}
     
     def run(self):
         try:
-            # Verificar caché primero (solo para textos cortos)
-            if len(self.text) < Config.CHUNK_SIZE:
-                cached = self.resource_mgr.get_translation(self.text, self.target_lang)
+            # Oraciones que caben en una petición (las más largas, partidas por cláusulas)
+            max_chars = self.backend.max_request_chars
+            spans = segment_spans(self.text, max_chars)
+            sentences = [self.text[start:end] for start, end in spans]
+            total = len(sentences)
+            # Todas las oraciones del trabajo se buscan en L1/L2 de una vez, mientras se compara con la versión anterior
+            lookup = self.resource_mgr.prefetch([sentence.strip() for sentence in sentences if sentence.strip()],
+                                                self.target_lang)
+            
+            # Las oraciones que no cambiaron desde la versión anterior traen su traducción
+            translations = self._reuse_previous(sentences)
+            reusable = [translation is not None for translation in translations]
+            reused = sum(reusable)
+            
+            # Deduplicar en todo el documento: cada oración distinta se resuelve una sola vez
+            occurrences: Dict[str, List[int]] = {}
+            for i, sentence in enumerate(sentences):
+                if translations[i] is None and sentence.strip():
+                    occurrences.setdefault(normalize_sentence(sentence), []).append(i)
+                elif translations[i] is None:
+                    translations[i] = sentence  # Solo espacios
+            repeated = sum(len(indices) - 1 for indices in occurrences.values())
+            self.stats = {
+                'sentences': total,
+                'reused': reused,
+                'unique': len(occurrences),
+                'dedup_ratio': repeated / max(repeated + len(occurrences), 1),
+            }
+            
+            # Resolver aciertos de caché antes de lanzar peticiones
+            known = lookup.result()
+            pending: List[List[int]] = []
+            for indices in occurrences.values():
+                cached = known.get(sentences[indices[0]].strip())
                 if cached:
-                    self.finished.emit(cached)
-                    return
+                    self._fan_out(indices, cached, translations, reusable)
+                else:
+                    pending.append(indices)
             
-            # Dividir en chunks para textos largos
-            chunks = self._split_text(self.text, Config.CHUNK_SIZE)
-            total_chunks = len(chunks)
-            translations = []
+            # Emitir en orden el prefijo ya resuelto (streaming)
+            pieces: List[str] = []
+            self._stream_ready(sentences, translations, pieces)
             
-            self.progress.emit(0, f"Traduciendo 0/{total_chunks} fragmentos...")
+            # Llenar cada petición hasta el máximo del backend (cada oración tras su marcador numerado)
+            requests_plan = pack_spans([spans[indices[0]] for indices in pending], max_chars, separator=MARKER_CHARS)
+            batches: List[List[List[int]]] = []
+            pos = 0
+            for request in requests_plan:
+                batches.append(pending[pos:pos + len(request)])
+                pos += len(request)
             
-            translator = GoogleTranslator(source='zh-CN', target=self.target_lang)
+            done = total - sum(len(indices) for indices in pending)
+            untranslated = 0
+            notes = []
+            if reused:
+                notes.append(f"{reused} sin cambios")
+            if repeated:
+                notes.append(f"{repeated} repetidas")
+            suffix = f" ({', '.join(notes)})" if notes else ""
+            self.progress.emit(self.job_id, int(done / max(total, 1) * 100),
+                               f"Traduciendo {done}/{total} oraciones en {len(batches)} peticiones{suffix}...")
             
-            for i, chunk in enumerate(chunks):
-                if not chunk.strip():
-                    translations.append(chunk)
-                    continue
-                
-                # Verificar caché por chunk
-                cached_chunk = self.resource_mgr.get_translation(chunk, self.target_lang)
-                if cached_chunk:
-                    translations.append(cached_chunk)
-                else:
-                    # Traducir chunk
-                    result = translator.translate(chunk)
-                    if result:
-                        translations.append(result)
-                        self.resource_mgr.set_translation(chunk, self.target_lang, result)
-                    else:
-                        translations.append(chunk)  # Fallback
-                
-                # Actualizar progreso
-                progress_pct = int((i + 1) / total_chunks * 100)
-                self.progress.emit(progress_pct, f"Traduciendo {i+1}/{total_chunks} fragmentos...")
+            # Mantener hasta N peticiones en el planificador (una en precarga, que no compite con el
+            # editor por la cuota del proveedor); cada resultado vuelve a su posición original
+            window = Config.MAX_CONCURRENT_REQUESTS if Config.PARALLEL_TRANSLATION and not self.background else 1
+            scheduler = get_scheduler()
+            queued = deque(batches)
+            futures: Dict[Future, List[List[int]]] = {}
+            try:
+                while queued or futures:
+                    while queued and len(futures) < window:
+                        # Tras un reparto roto el backend admite menos oraciones por petición
+                        chunks = self.backend.packing_chunks(queued.popleft())
+                        batch = chunks[0]
+                        queued.extendleft(reversed(chunks[1:]))
+                        texts = [sentences[indices[0]].strip() for indices in batch]
+                        futures[scheduler.submit(self.priority, self._translate_request, texts)] = batch
+                    finished, _ = wait(futures, timeout=0.25, return_when=FIRST_COMPLETED)
+                    self.token.raise_if_cancelled()
+                    if not finished:
+                        continue
+                    future = finished.pop()
+                    batch = futures.pop(future)
+                    resolved = sum(len(indices) for indices in batch)
+                    try:
+                        for indices, translation in zip(batch, future.result()):
+                            self._fan_out(indices, translation, translations, reusable)
+                    except JobCancelled:
+                        raise
+                    except Exception as e:
+                        # Cualquier fallo afecta solo a esta petición (servicio caído, respuesta sin
+                        # traducción o mal formada): glosas del diccionario local u original marcado
+                        if not isinstance(e, (BackendUnavailable, *RetryPolicy.RETRYABLE)):
+                            print(f"⚠️ Petición de {len(batch)} oraciones fallida ({type(e).__name__}: {e})")
+                        for indices in batch:
+                            fallback = self._offline_translation(sentences[indices[0]].strip())
+                            for i in indices:
+                                translations[i] = fallback
+                        untranslated += resolved
+                    self._stream_ready(sentences, translations, pieces)
+                    
+                    # Actualizar progreso a medida que llega cada petición
+                    done += resolved
+                    self.progress.emit(self.job_id, int(done / total * 100), f"Traduciendo {done}/{total} oraciones...")
+            finally:
+                # Trabajo cancelado: retirar de la cola lo que aún no empezó
+                for future in futures:
+                    future.cancel()
             
-            # Unir todas las traducciones
-            final_translation = ''.join(translations)
+            # Unir todas las traducciones en el orden del texto original
+            final_translation = ''.join(pieces)
+            self.snapshot = TranslationSnapshot(self.target_lang, sentences, translations, reusable,
+                                                self.text, final_translation)
             
             if final_translation:
-                self.finished.emit(final_translation)
+                self.finished.emit(self.job_id, final_translation)
+                if untranslated:
+                    self.degraded.emit(self.job_id, untranslated)
             else:
-                self.error.emit("Traducción vacía")
-                
+                self.error.emit(self.job_id, "Traducción vacía")
+        
+        except JobCancelled:
+            pass  # Hay un trabajo más reciente: no emitir nada
         except Exception as e:
-            self.error.emit(str(e))
+            self.error.emit(self.job_id, str(e))
     
-    def _split_text(self, text: str, chunk_size: int) -> List[str]:
-        """Divide el texto en chunks respetando puntuación china"""
-        if len(text) <= chunk_size:
-            return [text]
-        
-        chunks = []
-        current_chunk = ""
-        
-        # Puntuación china para dividir
-        chinese_punctuation = '。！？；，、：'
-        
-        for char in text:
-            current_chunk += char
-            
-            # Si llegamos al tamaño máximo o encontramos puntuación
-            if len(current_chunk) >= chunk_size:
-                if char in chinese_punctuation or not char.strip():
-                    chunks.append(current_chunk)
-                    current_chunk = ""
-                elif len(current_chunk) > chunk_size * 1.2:  # No exceder 20%
-                    chunks.append(current_chunk)
-                    current_chunk = ""
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks
+    @staticmethod
+    def _fan_out(indices: List[int], translation: str, translations: List[Optional[str]], reusable: List[bool]):
+        """Copia la traducción de una oración a todas sus apariciones"""
+        for i in indices:
+            translations[i] = translation
+            reusable[i] = True
+    
+    def _offline_translation(self, text: str) -> str:
+        """Sustituto cuando el backend no responde (no se cachea y se reintenta en el siguiente trabajo)"""
+        gloss = offline_gloss(text, self.target_lang) if self.backend.remote else None
+        return gloss or Config.UNTRANSLATED_MARK.format(text=text)
+    
+    def _reuse_previous(self, sentences: List[str]) -> List[Optional[str]]:
+        """Traducciones de la versión anterior para las oraciones que no cambiaron"""
+        translations: List[Optional[str]] = [None] * len(sentences)
+        previous = self.previous
+        if previous is None or previous.target_lang != self.target_lang:
+            return translations
+        for old_idx, new_idx in match_sentences(previous.sentences, sentences).items():
+            if previous.reusable[old_idx]:
+                translations[new_idx] = previous.translations[old_idx]
+        return translations
+    
+    def _stream_ready(self, sentences: List[str], translations: List[Optional[str]], pieces: List[str]):
+        """Da formato y emite las oraciones consecutivas ya resueltas tras las emitidas"""
+        while len(pieces) < len(sentences) and translations[len(pieces)] is not None:
+            idx = len(pieces)
+            piece = self._format_piece(sentences[idx], translations[idx], pieces[-1] if pieces else '')
+            pieces.append(piece)
+            if Config.STREAM_TRANSLATION and not self.background:
+                self.partial.emit(self.job_id, piece)
+    
+    @staticmethod
+    def _format_piece(source: str, translation: str, previous: str) -> str:
+        """Restaura alrededor de la traducción los espacios y saltos de línea del original"""
+        if not source.strip():
+            return source
+        lead = source[:len(source) - len(source.lstrip())]
+        trail = source[len(source.rstrip()):]
+        if not lead and previous and not previous[-1].isspace():
+            lead = ' '  # En chino las oraciones van pegadas; en la traducción no
+        return lead + translation.strip() + trail
+    
+    def _translate_request(self, texts: List[str]) -> List[str]:
+        """Traduce varias oraciones en una petición (separadas por marcadores) y las reparte de vuelta"""
+        self.token.raise_if_cancelled()
+        if len(texts) == 1:
+            # Caché + peticiones en vuelo compartidas con PinyinWorker
+            result = self.resource_mgr.fetch_translation(texts[0], self.target_lang, self.backend)
+            return [result or texts[0]]  # Fallback
+        
+        # Solo el editor cubre la cola lenta: en lotes masivos o de fondo el duplicado solo gasta cuota
+        result = self.backend.translate(join_segments(texts), 'zh-CN', self.target_lang,
+                                        hedge=self.priority == INTERACTIVE)
+        translations = split_segments(result, len(texts))
+        self.backend.record_packing(len(texts), translations is not None)
+        if translations is None:
+            # El proveedor perdió o alteró marcadores: repetir en trozos del nuevo tope del backend
+            print(f"⚠️ Petición de {len(texts)} oraciones sin marcadores fiables, dividiendo")
+            size = max(1, min(self.backend.max_packed_segments or 1, len(texts) // 2))
+            return [translation for i in range(0, len(texts), size)
+                    for translation in self._translate_request(texts[i:i + size])]
+        
+        for text, translation in zip(texts, translations):
+            self.resource_mgr.set_translation(text, self.target_lang, translation)
+        return translations
 
 
 class PinyinWorker(QThread):
     """Worker asíncrono para generar pronunciación Pinyin con agrupación"""
-    finished = pyqtSignal(list)  # Lista de grupos
-    progress = pyqtSignal(int)
+    finished = pyqtSignal(int, list)  # (job_id, lista de grupos)
+    progress = pyqtSignal(int, int)  # (job_id, porcentaje)
     
-    def __init__(self, text: str, target_lang: str, resource_mgr: ResourceManager):
+    # Un lote fallido ya tiene la ruta por grupo como respaldo: un solo reintento basta
+    PACKED_RETRY = RetryPolicy(attempts=2)
+    # Traducciones de relleno que no se reutilizan en la siguiente versión
+    FAILED_TRANSLATIONS = ("...", Config.OFFLINE_GROUP_TEXT)
+    OFFLINE_PREFIX = Config.OFFLINE_GLOSS_MARK.split('{')[0]
+    
+    def __init__(self, text: str, target_lang: str, resource_mgr: ResourceManager,
+                 backend: TranslationBackend, job_id: int = 0, token: Optional[CancellationToken] = None,
+                 previous: Optional[PinyinSnapshot] = None, alternate: Optional[PinyinSnapshot] = None,
+                 background: bool = False):
         super().__init__()
         self.text = text
         self.target_lang = target_lang
         self.resource_mgr = resource_mgr
+        self.backend = backend
+        self.job_id = job_id
+        self.token = token or CancellationToken()
+        self.previous = previous  # Versión anterior: sus oraciones intactas conservan sus grupos
+        self.alternate = alternate  # Versión ya traducida a target_lang (precarga o visita anterior)
+        self.priority = classify(len(text), background, Config.BULK_THRESHOLD_CHARS)
+        self.snapshot: Optional[PinyinSnapshot] = None
     
     def run(self):
         try:
-            groups = []
-            current_group = []
+            sentences = segment_text(self.text)
             
-            # Puntuación china que indica fin de grupo
-            chinese_punctuation = '。！？；，、'
+            # Oraciones que no cambiaron: grupos completos si el idioma coincide,
+            # si no solo su estructura y pinyin (el pinyin no depende del idioma destino)
+            reused: Dict[int, List[Dict]] = {}
+            untranslated: Dict[int, List[Dict]] = {}
+            previous = self.previous
+            if previous is not None:
+                same_lang = previous.target_lang == self.target_lang
+                for old_idx, new_idx in match_sentences(previous.sentences, sentences).items():
+                    groups = previous.groups[old_idx]
+                    if same_lang and all(self.usable(group['translation']) for group in groups):
+                        reused[new_idx] = groups
+                    else:
+                        untranslated[new_idx] = [{'items': group['items'], 'translation': ''} for group in groups]
             
-            for i, char in enumerate(self.text):
-                if '\u4e00' <= char <= '\u9fff':  # Es caracter chino
-                    pinyin_result = self.resource_mgr.get_pinyin(char)
-                    if pinyin_result and pinyin_result[0]:
-                        current_group.append({
-                            'char': char,
-                            'pinyin': pinyin_result[0][0]
-                        })
+            groups_by_sentence: List[List[Dict]] = []
+            fresh: List[Dict] = []
+            for idx, sentence in enumerate(sentences):
+                self.token.raise_if_cancelled()
+                groups = reused.get(idx)
+                if groups is None:
+                    groups = untranslated.get(idx)
+                    if groups is None:
+                        groups = self._build_groups(sentence)
+                    fresh.extend(groups)
+                groups_by_sentence.append(groups)
                 
-                # Si encontramos puntuación o llegamos al límite, crear nuevo grupo
-                if char in chinese_punctuation or len(current_group) >= 8:
-                    if current_group:
-                        # Traducir el grupo completo
-                        chars_text = ''.join([item['char'] for item in current_group])
-                        translation = self._translate_group(chars_text)
-                        
-                        groups.append({
-                            'items': current_group,
-                            'translation': translation
-                        })
-                        current_group = []
-                
-                # Actualizar progreso
-                progress = int((i + 1) / len(self.text) * 100)
-                self.progress.emit(progress)
-            
-            # Agregar último grupo si existe
-            if current_group:
-                chars_text = ''.join([item['char'] for item in current_group])
-                translation = self._translate_group(chars_text)
-                groups.append({
-                    'items': current_group,
-                    'translation': translation
-                })
+                # Actualizar progreso (la primera mitad es el pinyin)
+                self.progress.emit(self.job_id, int((idx + 1) / len(sentences) * 50))
             
-            self.finished.emit(groups)
+            # Traducir solo los grupos sin traducción en pocas peticiones empaquetadas
+            texts = [self._group_text(group) for group in fresh]
+            for group, translation in zip(fresh, self._translate_groups(texts, self._known_translations())):
+                group['translation'] = translation
             
+            self.snapshot = PinyinSnapshot(self.target_lang, sentences, groups_by_sentence, self.text)
+            self.finished.emit(self.job_id, self.snapshot.flat_groups())
+        
+        except JobCancelled:
+            pass  # Hay un trabajo más reciente: no emitir nada
         except Exception as e:
             print(f"Error en PinyinWorker: {e}")
-            self.finished.emit([])
+            self.finished.emit(self.job_id, [])
+    
+    @classmethod
+    def usable(cls, translation: str) -> bool:
+        """False para rellenos y glosas de modo degradado, que se vuelven a pedir"""
+        return translation not in cls.FAILED_TRANSLATIONS and not translation.startswith(cls.OFFLINE_PREFIX)
+    
+    @staticmethod
+    def _group_text(group: Dict) -> str:
+        """Caracteres chinos de un grupo"""
+        return ''.join(item['char'] for item in group['items'])
+    
+    def _known_translations(self) -> Dict[str, str]:
+        """Traducciones de grupos ya conocidas en target_lang, aunque la caché las haya desalojado"""
+        known: Dict[str, str] = {}
+        if self.alternate is not None and self.alternate.target_lang == self.target_lang:
+            for groups in self.alternate.groups:
+                for group in groups:
+                    if self.usable(group['translation']):
+                        known[self._group_text(group)] = group['translation']
+        return known
+    
+    def _build_groups(self, sentence: str) -> List[Dict]:
+        """Agrupa los caracteres chinos de una oración con su pinyin"""
+        groups = []
+        current_group = []
+        
+        # Puntuación china que indica fin de grupo
+        chinese_punctuation = '。！？；，、'
+        
+        for i, char in enumerate(sentence):
+            if i % 256 == 255:
+                self.token.raise_if_cancelled()
+            if '\u4e00' <= char <= '\u9fff':  # Es caracter chino
+                pinyin_result = self.resource_mgr.get_pinyin(char)
+                if pinyin_result and pinyin_result[0]:
+                    current_group.append({
+                        'char': char,
+                        'pinyin': pinyin_result[0][0]
+                    })
+            
+            # Si encontramos puntuación o llegamos al límite, crear nuevo grupo
+            if char in chinese_punctuation or len(current_group) >= 8:
+                if current_group:
+                    groups.append({'items': current_group, 'translation': ''})
+                    current_group = []
+        
+        # Agregar último grupo si existe
+        if current_group:
+            groups.append({'items': current_group, 'translation': ''})
+        
+        return groups
+    
+    def _translate_groups(self, texts: List[str], known: Optional[Dict[str, str]] = None) -> List[str]:
+        """Traduce los grupos empaquetando varios por petición (separados por marcadores)"""
+        results: Dict[str, str] = {}
+        for text in texts:
+            if (known or {}).get(text):
+                results[text] = known[text]
+        # Los grupos restantes se buscan en L1 y, los que falten, en L2 con una sola consulta
+        results.update(self.resource_mgr.get_translations(
+            [text for text in texts if text not in results], self.target_lang))
+        pending = [text for text in dict.fromkeys(texts) if text not in results]
+        
+        batches = self._pack_batches(pending, self.backend.max_request_chars)
+        scheduler = get_scheduler()
+        futures: List[Future] = []
+        try:
+            for batch_idx, batch in enumerate(batches):
+                # Tras un reparto roto el backend admite menos grupos por petición
+                for chunk in self.backend.packing_chunks(batch):
+                    self.token.raise_if_cancelled()
+                    futures = [scheduler.submit(self.priority, self._translate_packed, chunk)]
+                    self._wait_all(futures)
+                    translated = futures[0].result()
+                    if translated is None:
+                        # El reparto no es fiable: volver a una petición por grupo
+                        futures = [scheduler.submit(self.priority, self._translate_group, text) for text in chunk]
+                        self._wait_all(futures)
+                        translated = [future.result() for future in futures]
+                    results.update(zip(chunk, translated))
+                self.progress.emit(self.job_id, 50 + int((batch_idx + 1) / len(batches) * 50))
+        finally:
+            # Trabajo cancelado: retirar de la cola lo que aún no empezó
+            for future in futures:
+                future.cancel()
+        
+        return [results.get(text, "...") for text in texts]
+    
+    def _wait_all(self, futures: List[Future]):
+        """Espera los futures comprobando la cancelación: un trabajo sustituido no sigue bloqueado"""
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.25)
+            self.token.raise_if_cancelled()
+    
+    @staticmethod
+    def _pack_batches(texts: List[str], max_chars: int) -> List[List[str]]:
+        """Agrupa textos en lotes cuyo tamaño empaquetado no supera max_chars"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for text in texts:
+            # Cada grupo va tras su marcador numerado
+            if current and size + len(text) + MARKER_CHARS > max_chars:
+                batches.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += len(text) + MARKER_CHARS
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _translate_packed(self, batch: List[str]) -> Optional[List[str]]:
+        """Traduce un lote en una sola petición; None si la respuesta no se puede repartir"""
+        if len(batch) == 1:
+            return None  # Sin ventaja: se usa la ruta normal por grupo
+        try:
+            result = self.backend.translate(join_segments(batch), 'zh-CN', self.target_lang, retry=self.PACKED_RETRY,
+                                            hedge=self.priority == INTERACTIVE)
+        except Exception as e:
+            print(f"Error traduciendo lote de grupos: {e}")
+            return None
+        
+        # Validar: todos los marcadores, en orden y con texto detrás
+        translations = split_segments(result, len(batch))
+        self.backend.record_packing(len(batch), translations is not None)
+        if translations is None:
+            print(f"⚠️ Lote de {len(batch)} grupos sin marcadores fiables, traduciendo por grupo")
+            return None
+        
+        for text, translation in zip(batch, translations):
+            self.resource_mgr.set_translation(text, self.target_lang, translation)
+        return translations
     
     def _translate_group(self, text: str) -> str:
         """Traduce un grupo de caracteres"""
         try:
-            # Verificar caché
-            cached = self.resource_mgr.get_translation(text, self.target_lang)
-            if cached:
-                return cached
-            
-            # Traducir
-            from deep_translator import GoogleTranslator
-            translator = GoogleTranslator(source='zh-CN', target=self.target_lang)
-            result = translator.translate(text)
-            
-            if result:
-                # Guardar en caché
-                self.resource_mgr.set_translation(text, self.target_lang, result)
-                return result
-            else:
-                return "..."
+            # Caché + peticiones en vuelo compartidas con TranslationWorker
+            result = self.resource_mgr.fetch_translation(text, self.target_lang, self.backend)
+            return result or "..."
+        except BackendUnavailable:
+            gloss = offline_gloss(text, self.target_lang) if self.backend.remote else None
+            return gloss or Config.OFFLINE_GROUP_TEXT
         except Exception as e:
             print(f"Error traduciendo grupo: {e}")
             return "..."
@@ -308,10 +1168,29 @@ class ChineseTranslatorApp(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        self.resource_mgr = ResourceManager()
+        self.backend = create_backend()
+        self.resource_mgr = ResourceManager(self.backend.cache_id, get_translation_store(), get_cache_snapshot())
         self.current_lang = 'es'
         self.translation_worker = None
         self.pinyin_worker = None
+        # Generación del trabajo actual: los resultados de generaciones anteriores se descartan
+        self.job_generation = 0
+        self.job_token: Optional[CancellationToken] = None
+        # Precarga del otro idioma: hija del trabajo actual, se cancela además al editar el texto
+        self.prefetch_token: Optional[CancellationToken] = None
+        self.active_workers: List[QThread] = []
+        # Última versión traducida por idioma: base para re-traducir solo las oraciones editadas
+        self.translation_snapshots: Dict[str, TranslationSnapshot] = {}
+        self.pinyin_snapshots: Dict[str, PinyinSnapshot] = {}
+        self.pinyin_current: Optional[PinyinSnapshot] = None  # Versión mostrada en la tabla
+        self.job_text = ""
+        self.pending_primary: List[str] = []  # Partes del trabajo actual que faltan antes de precargar
+        self.pinyin_groups: List[Dict] = []  # Grupos mostrados, en el orden de la tabla
+        self.stream_output = Config.STREAM_TRANSLATION
+        # Streaming sobre el texto anterior: el panel no se toca mientras lo emitido coincide con él
+        self.stream_base = ""
+        self.stream_matched = 0  # Caracteres emitidos que coinciden con stream_base
+        self.stream_diverged = False
         self.dark_mode = False  # Estado del tema (False = Light, True = Dark)
         
         self.init_ui()
@@ -450,6 +1329,8 @@ class ChineseTranslatorApp(QMainWindow):
         self.input_text.setStyleSheet("QTextEdit { color: #1f2937; background-color: white; }")
         self.input_text.setMinimumHeight(150)  # Altura mínima
         layout.addWidget(self.input_text, stretch=3)  # Aumentar stretch para usar más espacio
+        # Con o sin traducción automática, una precarga del texto anterior ya no sirve
+        self.input_text.textChanged.connect(self.cancel_stale_prefetch)
         
         # === Botones de idioma ===
         lang_layout = QHBoxLayout()
@@ -811,17 +1692,60 @@ class ChineseTranslatorApp(QMainWindow):
         self.btn_spanish.setChecked(lang == 'es')
         self.btn_english.setChecked(lang == 'en')
         
-        # Re-traducir si hay texto
-        if self.input_text.toPlainText().strip():
+        # Mostrar la versión ya traducida (p. ej. precargada) de este texto; si no la hay, re-traducir
+        text = self.input_text.toPlainText().strip()
+        if text and not self._show_snapshots(text, lang):
             self.translate_text()
         
         status_bar = self.statusBar()
         if status_bar:
             status_bar.showMessage(f"✅ Idioma: {'Español' if lang == 'es' else 'English'}", 3000)
     
+    def _snapshots_ready(self, text: str, lang: str) -> bool:
+        """Hay traducción y pinyin completos de esta versión del texto en el idioma"""
+        translation = self.translation_snapshots.get(lang)
+        groups = self.pinyin_snapshots.get(lang)
+        return translation is not None and translation.matches(text) and groups is not None \
+            and groups.text == text and all(PinyinWorker.usable(group['translation']) for group in groups.flat_groups())
+    
+    def _show_snapshots(self, text: str, lang: str) -> bool:
+        """Muestra sin ningún trabajo nuevo la traducción y el pinyin guardados de esta versión del texto"""
+        if not self._snapshots_ready(text, lang):
+            return False
+        
+        # Lo que siga en curso es del otro idioma: cancelarlo
+        self._start_job()
+        self.job_text = text
+        self.pending_primary = []
+        self.title_label.setText(f"🈳 {Config.APP_NAME} 🈳")
+        self.btn_translate.setEnabled(True)
+        self._splice_output(self.translation_snapshots[lang].output)
+        self.pinyin_current = self.pinyin_snapshots[lang]
+        self._show_pinyin_groups(self.pinyin_current.flat_groups())
+        
+        # Si el idioma anterior quedó a medias, precargarlo de nuevo
+        other = 'en' if lang == 'es' else 'es'
+        if Config.PREFETCH_OTHER_LANGUAGE and not self._snapshots_ready(text, other):
+            self.prefetch_language(text, other)
+        return True
+    
+    def _start_job(self) -> int:
+        """Cancela el trabajo en curso y abre una nueva generación"""
+        if self.job_token:
+            self.job_token.cancel()
+        self.job_generation += 1
+        self.job_token = CancellationToken()
+        return self.job_generation
+    
+    def _track_worker(self, worker: QThread):
+        """Conserva referencias a los workers vivos (también los cancelados que aún terminan)"""
+        self.active_workers = [w for w in self.active_workers if w.isRunning()]
+        self.active_workers.append(worker)
+    
     def translate_text(self):
         """Traduce el texto ingresado"""
         text = self.input_text.toPlainText().strip()
+        job_id = self._start_job()
         
         if not text:
             self.output_text.setText("")
@@ -841,26 +1765,69 @@ class ChineseTranslatorApp(QMainWindow):
         if status_bar:
             status_bar.showMessage("🔄 Traduciendo...", 0)
         
+        # Con una versión anterior en el mismo idioma solo viajan las oraciones editadas
+        previous = self.translation_snapshots.get(self.current_lang) if Config.INCREMENTAL_TRANSLATION else None
+        self.job_text = text
+        self.pending_primary = ['translation', 'pinyin']
+        
         # Iniciar worker de traducción
-        self.translation_worker = TranslationWorker(text, self.current_lang, self.resource_mgr)
+        self.translation_worker = TranslationWorker(text, self.current_lang, self.resource_mgr, self.backend,
+                                                    job_id, self.job_token, previous)
         self.translation_worker.finished.connect(self.on_translation_finished)
         self.translation_worker.error.connect(self.on_translation_error)
         self.translation_worker.progress.connect(self.on_translation_progress)
+        self.translation_worker.degraded.connect(self.on_translation_degraded)
+        self.translation_worker.partial.connect(self.on_translation_partial)
+        # El panel conserva el texto anterior hasta la primera oración que cambia; desde ahí se emite en
+        # streaming, así un documento nuevo se ve crecer y una edición pequeña no vacía el panel
+        self.stream_output = Config.STREAM_TRANSLATION
+        self.stream_base = self.output_text.toPlainText()
+        self.stream_matched = 0
+        self.stream_diverged = False
+        self._track_worker(self.translation_worker)
         self.translation_worker.start()
         
         # También generar Pinyin
         self.generate_pinyin()
     
-    def on_translation_progress(self, percentage: int, message: str):
+    def on_translation_progress(self, job_id: int, percentage: int, message: str):
         """Callback de progreso de traducción"""
+        if job_id != self.job_generation:
+            return  # Resultado obsoleto
         self.progress_bar.setValue(percentage)
         status_bar = self.statusBar()
         if status_bar:
             status_bar.showMessage(f"🔄 {message}", 0)
     
-    def on_translation_finished(self, translation: str):
+    def on_translation_partial(self, job_id: int, chunk: str):
+        """Callback de streaming: añade el fragmento al final sin reescribir el panel"""
+        if job_id != self.job_generation or not self.stream_output:
+            return
+        cursor = self.output_text.textCursor()
+        if not self.stream_diverged:
+            base, matched = self.stream_base, self.stream_matched
+            if base.startswith(chunk, matched):
+                self.stream_matched += len(chunk)  # Igual que lo mostrado: nada que repintar
+                return
+            # Primera diferencia: descartar la cola anterior desde ahí y seguir añadiendo
+            common = matched + len(os.path.commonprefix([base[matched:], chunk]))
+            cursor.setPosition(self._qt_pos(base[:common]))
+            cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(chunk[common - matched:])
+            self.stream_diverged = True
+            return
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+    
+    def on_translation_finished(self, job_id: int, translation: str):
         """Callback cuando termina la traducción"""
-        self.output_text.setText(translation)
+        if job_id != self.job_generation:
+            return  # Un trabajo más reciente ya ocupa el panel
+        stats = self.translation_worker.stats if self.translation_worker else {}
+        if self.translation_worker and self.translation_worker.snapshot:
+            self.translation_snapshots[self.translation_worker.target_lang] = self.translation_worker.snapshot
+        # Con streaming el panel ya contiene el texto; si no, reemplazar solo lo que cambió
+        self._splice_output(translation)
         self.progress_bar.setValue(100)
         
         # Restaurar título normal
@@ -872,10 +1839,77 @@ class ChineseTranslatorApp(QMainWindow):
         self.btn_translate.setEnabled(True)
         status_bar = self.statusBar()
         if status_bar:
-            status_bar.showMessage("✅ Traducción completada", 3000)
+            message = "✅ Traducción completada"
+            if stats.get('dedup_ratio'):
+                message += f" ({stats['unique']} oraciones distintas, {stats['dedup_ratio']:.0%} repetidas)"
+            status_bar.showMessage(message, 3000)
+        self._primary_done('translation')
+    
+    def _primary_done(self, part: str):
+        """Cuando la traducción y el pinyin del idioma actual terminan, precargar el otro idioma"""
+        if part in self.pending_primary:
+            self.pending_primary.remove(part)
+        if self.pending_primary or not Config.PREFETCH_OTHER_LANGUAGE or not self.job_text:
+            return
+        self.prefetch_language(self.job_text, 'en' if self.current_lang == 'es' else 'es')
     
-    def on_translation_error(self, error: str):
+    def prefetch_language(self, text: str, lang: str):
+        """Traduce en segundo plano (traducción y grupos) para que cambiar de idioma sea inmediato"""
+        job_id = self.job_generation
+        self.prefetch_token = CancellationToken(self.job_token)
+        translation = TranslationWorker(text, lang, self.resource_mgr, self.backend, job_id, self.prefetch_token,
+                                        self.translation_snapshots.get(lang), background=True)
+        translation.finished.connect(
+            lambda done_id, _, worker=translation: self._store_prefetch(done_id, worker, self.translation_snapshots))
+        pinyin = PinyinWorker(text, lang, self.resource_mgr, self.backend, job_id, self.prefetch_token,
+                              self.pinyin_current, self.pinyin_snapshots.get(lang), background=True)
+        pinyin.finished.connect(
+            lambda done_id, _, worker=pinyin: self._store_prefetch(done_id, worker, self.pinyin_snapshots))
+        
+        # Token hijo del trabajo actual: un trabajo nuevo o una edición del texto cancelan la precarga
+        for worker in (translation, pinyin):
+            self._track_worker(worker)
+            worker.start(QThread.Priority.LowPriority)
+    
+    def _store_prefetch(self, job_id: int, worker: QThread, snapshots: Dict):
+        """Guarda el resultado de una precarga si sigue correspondiendo al texto actual"""
+        if job_id == self.job_generation and worker.snapshot:
+            snapshots[worker.target_lang] = worker.snapshot
+    
+    def _splice_output(self, text: str):
+        """Reemplaza en el panel de salida solo el tramo que difiere del texto nuevo"""
+        old = self.output_text.toPlainText()
+        if old == text:
+            return
+        prefix = len(os.path.commonprefix([old, text]))
+        limit = min(len(old), len(text)) - prefix
+        suffix = min(len(os.path.commonprefix([old[::-1], text[::-1]])), limit)
+        
+        cursor = self.output_text.textCursor()
+        cursor.setPosition(self._qt_pos(old[:prefix]))
+        cursor.setPosition(self._qt_pos(old[:len(old) - suffix]), QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(text[prefix:len(text) - suffix])
+    
+    @staticmethod
+    def _qt_pos(value: str) -> int:
+        """Las posiciones de QTextCursor cuentan unidades UTF-16"""
+        return len(value.encode('utf-16-le')) // 2
+    
+    def on_translation_degraded(self, job_id: int, untranslated: int):
+        """Callback cuando parte del texto quedó sin traducir por backend caído"""
+        if job_id != self.job_generation:
+            return
+        status_bar = self.statusBar()
+        if status_bar:
+            status_bar.showMessage(
+                f"📴 Sin conexión: {untranslated} fragmento(s) sin traducir (marcados ⚠️). "
+                f"Se reintentará al recuperar el servicio", 8000
+            )
+    
+    def on_translation_error(self, job_id: int, error: str):
         """Callback cuando hay error en traducción"""
+        if job_id != self.job_generation:
+            return
         self.progress_bar.setVisible(False)
         self.btn_translate.setEnabled(True)
         
@@ -892,47 +1926,69 @@ class ChineseTranslatorApp(QMainWindow):
             self.pinyin_table.clear()
             self.pinyin_table.setRowCount(0)
             self.pinyin_table.setColumnCount(0)
+            self.pinyin_groups = []
+            self.pinyin_current = None
             self.pinyin_info.setText("💡 Listo para mostrar pronunciación")
             return
         
         # Mostrar indicador de procesamiento
         self.pinyin_info.setText("⏳ Procesando caracteres...")
         
-        # Iniciar worker de Pinyin con idioma actual
-        self.pinyin_worker = PinyinWorker(text, self.current_lang, self.resource_mgr)
+        # Iniciar worker de Pinyin con idioma actual (mismo trabajo que la traducción)
+        # La tabla mostrada aporta estructura y pinyin; la versión en este idioma, traducciones
+        previous = self.pinyin_current if Config.INCREMENTAL_TRANSLATION else None
+        self.pinyin_worker = PinyinWorker(text, self.current_lang, self.resource_mgr, self.backend,
+                                          self.job_generation, self.job_token, previous,
+                                          self.pinyin_snapshots.get(self.current_lang))
         self.pinyin_worker.finished.connect(self.on_pinyin_finished)
         self.pinyin_worker.progress.connect(self.on_pinyin_progress)
+        self._track_worker(self.pinyin_worker)
         self.pinyin_worker.start()
     
-    def on_pinyin_progress(self, progress: int):
+    def on_pinyin_progress(self, job_id: int, progress: int):
         """Callback de progreso de Pinyin"""
+        if job_id != self.job_generation:
+            return
         if self.progress_bar.isVisible():
             self.progress_bar.setRange(0, 100)
             self.progress_bar.setValue(progress)
     
-    def on_pinyin_finished(self, groups: List[Dict]):
+    def on_pinyin_finished(self, job_id: int, groups: List[Dict]):
         """Callback cuando termina generación de Pinyin - Con grupos y separadores"""
+        if job_id != self.job_generation:
+            return  # Resultado de un texto anterior
+        if self.pinyin_worker and self.pinyin_worker.snapshot:
+            self.pinyin_current = self.pinyin_worker.snapshot
+            self.pinyin_snapshots[self.pinyin_worker.target_lang] = self.pinyin_worker.snapshot
+        self._primary_done('pinyin')
+        self._show_pinyin_groups(groups)
+    
+    def _show_pinyin_groups(self, groups: List[Dict]):
+        """Actualiza la tabla con los grupos (solo las filas que cambiaron si la forma coincide)"""
         if not groups:
             self.pinyin_info.setText("⚠️ No se encontraron caracteres chinos")
             return
         
+        # Calcular total de columnas (máximo de caracteres en cualquier grupo)
+        max_cols = max(len(group['items']) for group in groups)
+        
+        if self.pinyin_groups and self.pinyin_table.columnCount() == max_cols:
+            self._patch_pinyin_rows(groups, max_cols)
+        else:
+            self._rebuild_pinyin_table(groups, max_cols)
+        self.pinyin_groups = groups
+        
+        total_chars = sum(len(group['items']) for group in groups)
+        self.pinyin_info.setText(f"✅ {total_chars} caracteres en {len(groups)} grupos")
+        self.progress_bar.setVisible(False)
+    
+    def _rebuild_pinyin_table(self, groups: List[Dict], max_cols: int):
+        """Vuelve a llenar la tabla completa"""
         # Limpiar tabla completamente antes de llenar
         self.pinyin_table.clear()
         self.pinyin_table.setRowCount(0)
         self.pinyin_table.setColumnCount(0)
         
-        # Colores pasteles azulados
-        color_pinyin_bg = QColor("#dbeafe")      # Azul muy claro
-        color_pinyin_text = QColor("#1e40af")    # Azul oscuro
-        color_char_bg = QColor("#bfdbfe")        # Azul pastel
-        color_char_text = QColor("#1e3a8a")      # Azul muy oscuro
-        color_trans_bg = QColor("#a7f3d0")       # Verde agua claro
-        color_trans_text = QColor("#065f46")     # Verde oscuro
-        color_separator_bg = QColor("#f1f5f9")   # Gris muy claro para separador
-        
-        # Calcular total de columnas (máximo de caracteres en cualquier grupo)
-        max_cols = max(len(group['items']) for group in groups)
-        
         # Calcular filas: 3 filas por grupo + 1 separador
         total_rows = len(groups) * 4  # Pinyin + Carácter + Traducción + Separador
         
@@ -948,79 +2004,117 @@ class ChineseTranslatorApp(QMainWindow):
         if v_header:
             v_header.setVisible(False)  # Ocultar números de filas
         
-        row_idx = 0
-        total_chars = 0
-        
-        for group in groups:
-            items = group['items']
-            translation = group['translation']
-            num_items = len(items)
-            total_chars += num_items
-            
-            # FILA 1: PINYIN
-            for col_idx, item in enumerate(items):
-                pinyin_item = QTableWidgetItem(item['pinyin'])
-                pinyin_item.setFont(QFont(Config.FONT_FAMILY, 13, QFont.Weight.Bold))
-                pinyin_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                pinyin_item.setBackground(color_pinyin_bg)
-                pinyin_item.setForeground(color_pinyin_text)
-                self.pinyin_table.setItem(row_idx, col_idx, pinyin_item)
-            
-            # Rellenar celdas vacías de pinyin
-            for col_idx in range(num_items, max_cols):
-                empty_item = QTableWidgetItem("")
-                empty_item.setBackground(color_pinyin_bg)
-                self.pinyin_table.setItem(row_idx, col_idx, empty_item)
-            
-            self.pinyin_table.setRowHeight(row_idx, 40)
-            row_idx += 1
-            
-            # FILA 2: CARACTERES CHINOS
-            for col_idx, item in enumerate(items):
-                char_item = QTableWidgetItem(item['char'])
-                char_item.setFont(QFont(Config.FONT_FAMILY, 18, QFont.Weight.Bold))
-                char_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                char_item.setBackground(color_char_bg)
-                char_item.setForeground(color_char_text)
-                self.pinyin_table.setItem(row_idx, col_idx, char_item)
-            
-            # Rellenar celdas vacías de caracteres
-            for col_idx in range(num_items, max_cols):
-                empty_item = QTableWidgetItem("")
-                empty_item.setBackground(color_char_bg)
-                self.pinyin_table.setItem(row_idx, col_idx, empty_item)
-            
-            self.pinyin_table.setRowHeight(row_idx, 50)
-            row_idx += 1
-            
-            # FILA 3: TRADUCCIÓN (SPAN completo)
-            trans_item = QTableWidgetItem(translation)
-            trans_item.setFont(QFont(Config.FONT_FAMILY, 11))
-            trans_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            trans_item.setBackground(color_trans_bg)
-            trans_item.setForeground(color_trans_text)
-            self.pinyin_table.setItem(row_idx, 0, trans_item)
-            
-            # Hacer span para que ocupe todas las columnas
-            self.pinyin_table.setSpan(row_idx, 0, 1, max_cols)
-            self.pinyin_table.setRowHeight(row_idx, 40)
-            row_idx += 1
-            
-            # FILA 4: SEPARADOR (fila vacía para espaciado)
-            for col_idx in range(max_cols):
-                sep_item = QTableWidgetItem("")
-                sep_item.setBackground(color_separator_bg)
-                self.pinyin_table.setItem(row_idx, col_idx, sep_item)
-            
-            self.pinyin_table.setRowHeight(row_idx, 10)
-            row_idx += 1
+        for group_idx, group in enumerate(groups):
+            self._fill_group_rows(group_idx * 4, group, max_cols)
         
         # Ajustar ancho de columnas
         for col in range(max_cols):
             self.pinyin_table.setColumnWidth(col, 90)
+    
+    def _patch_pinyin_rows(self, groups: List[Dict], max_cols: int):
+        """Sustituye solo las filas de los grupos que cambiaron respecto a la tabla actual"""
+        old = self.pinyin_groups
+        
+        # Los grupos reutilizados comparten su lista de caracteres: recortar prefijo y sufijo comunes
+        limit = min(len(old), len(groups))
+        prefix = 0
+        while prefix < limit and old[prefix]['items'] is groups[prefix]['items']:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix]['items'] is groups[-1 - suffix]['items']:
+            suffix += 1
+        
+        # Misma estructura (p. ej. cambio de idioma): basta con reescribir la fila de traducción
+        shift = len(groups) - len(old)
+        for old_idx in list(range(prefix)) + list(range(len(old) - suffix, len(old))):
+            new_idx = old_idx if old_idx < prefix else old_idx + shift
+            if old[old_idx]['translation'] != groups[new_idx]['translation']:
+                self._set_translation_row(old_idx * 4 + 2, groups[new_idx]['translation'], max_cols)
+        
+        for _ in range((len(old) - suffix - prefix) * 4):
+            self.pinyin_table.removeRow(prefix * 4)
+        for group_idx in range(prefix, len(groups) - suffix):
+            row_idx = group_idx * 4
+            for offset in range(4):
+                self.pinyin_table.insertRow(row_idx + offset)
+            self._fill_group_rows(row_idx, groups[group_idx], max_cols)
+    
+    def _fill_group_rows(self, row_idx: int, group: Dict, max_cols: int):
+        """Llena las 4 filas de un grupo: pinyin, caracteres, traducción y separador"""
+        # Colores pasteles azulados
+        color_pinyin_bg = QColor("#dbeafe")      # Azul muy claro
+        color_pinyin_text = QColor("#1e40af")    # Azul oscuro
+        color_char_bg = QColor("#bfdbfe")        # Azul pastel
+        color_char_text = QColor("#1e3a8a")      # Azul muy oscuro
+        color_separator_bg = QColor("#f1f5f9")   # Gris muy claro para separador
         
-        self.pinyin_info.setText(f"✅ {total_chars} caracteres en {len(groups)} grupos")
-        self.progress_bar.setVisible(False)
+        items = group['items']
+        translation = group['translation']
+        num_items = len(items)
+        
+        # FILA 1: PINYIN
+        for col_idx, item in enumerate(items):
+            pinyin_item = QTableWidgetItem(item['pinyin'])
+            pinyin_item.setFont(QFont(Config.FONT_FAMILY, 13, QFont.Weight.Bold))
+            pinyin_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            pinyin_item.setBackground(color_pinyin_bg)
+            pinyin_item.setForeground(color_pinyin_text)
+            self.pinyin_table.setItem(row_idx, col_idx, pinyin_item)
+        
+        # Rellenar celdas vacías de pinyin
+        for col_idx in range(num_items, max_cols):
+            empty_item = QTableWidgetItem("")
+            empty_item.setBackground(color_pinyin_bg)
+            self.pinyin_table.setItem(row_idx, col_idx, empty_item)
+        
+        self.pinyin_table.setRowHeight(row_idx, 40)
+        row_idx += 1
+        
+        # FILA 2: CARACTERES CHINOS
+        for col_idx, item in enumerate(items):
+            char_item = QTableWidgetItem(item['char'])
+            char_item.setFont(QFont(Config.FONT_FAMILY, 18, QFont.Weight.Bold))
+            char_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            char_item.setBackground(color_char_bg)
+            char_item.setForeground(color_char_text)
+            self.pinyin_table.setItem(row_idx, col_idx, char_item)
+        
+        # Rellenar celdas vacías de caracteres
+        for col_idx in range(num_items, max_cols):
+            empty_item = QTableWidgetItem("")
+            empty_item.setBackground(color_char_bg)
+            self.pinyin_table.setItem(row_idx, col_idx, empty_item)
+        
+        self.pinyin_table.setRowHeight(row_idx, 50)
+        row_idx += 1
+        
+        # FILA 3: TRADUCCIÓN (SPAN completo)
+        self._set_translation_row(row_idx, translation, max_cols)
+        row_idx += 1
+        
+        # FILA 4: SEPARADOR (fila vacía para espaciado)
+        for col_idx in range(max_cols):
+            sep_item = QTableWidgetItem("")
+            sep_item.setBackground(color_separator_bg)
+            self.pinyin_table.setItem(row_idx, col_idx, sep_item)
+        
+        self.pinyin_table.setRowHeight(row_idx, 10)
+    
+    def _set_translation_row(self, row_idx: int, translation: str, max_cols: int):
+        """Escribe la fila de traducción de un grupo (una celda que ocupa todas las columnas)"""
+        color_trans_bg = QColor("#a7f3d0")       # Verde agua claro
+        color_trans_text = QColor("#065f46")     # Verde oscuro
+        
+        trans_item = QTableWidgetItem(translation)
+        trans_item.setFont(QFont(Config.FONT_FAMILY, 11))
+        trans_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        trans_item.setBackground(color_trans_bg)
+        trans_item.setForeground(color_trans_text)
+        self.pinyin_table.setItem(row_idx, 0, trans_item)
+        
+        # Hacer span para que ocupe todas las columnas
+        self.pinyin_table.setSpan(row_idx, 0, 1, max_cols)
+        self.pinyin_table.setRowHeight(row_idx, 40)
     
     def toggle_auto_translate(self):
         """Activa/desactiva traducción automática"""
@@ -1045,8 +2139,14 @@ class ChineseTranslatorApp(QMainWindow):
         self.auto_timer.timeout.connect(self.translate_text)
         self.auto_timer.start(1000)  # 1 segundo de delay
     
+    def cancel_stale_prefetch(self):
+        """Cancela la precarga en curso si el texto ya no es el que se está precargando"""
+        if self.prefetch_token and self.input_text.toPlainText().strip() != self.job_text:
+            self.prefetch_token.cancel()
+    
     def clear_all(self):
         """Limpia todos los campos y resetea la tabla"""
+        self._start_job()  # Descartar resultados de trabajos en curso
         self.input_text.clear()
         self.output_text.clear()
         
@@ -1054,6 +2154,11 @@ class ChineseTranslatorApp(QMainWindow):
         self.pinyin_table.clear()
         self.pinyin_table.setRowCount(0)
         self.pinyin_table.setColumnCount(0)
+        self.pinyin_groups = []
+        self.translation_snapshots.clear()
+        self.pinyin_snapshots.clear()
+        self.pinyin_current = None
+        self.job_text = ""
         
         # Resetear headers (por si acaso)
         h_header = self.pinyin_table.horizontalHeader()
@@ -1308,16 +2413,34 @@ class ChineseTranslatorApp(QMainWindow):
             )
     
     def check_resources(self):
-        """Verifica uso de recursos y optimiza si es necesario"""
+        """Actualiza la barra de estado con el uso de recursos (cada caché se mantiene en su presupuesto)"""
         memory_mb = self.resource_mgr.get_memory_usage()
         
-        # Si excede 200MB, limpiar caché
-        if memory_mb > 200:
-            self.resource_mgr.clear_cache()
-            print(f"⚠️ Memoria alta ({memory_mb:.1f} MB) - Caché limpiado")
-        
         # Actualizar barra de estado
         cache_info = f"Cache: {self.resource_mgr.cache_hits}/{self.resource_mgr.cache_hits + self.resource_mgr.cache_misses}"
+        for name, (used, budget) in self.resource_mgr.cache_usage().items():
+            cache_info += f" | {name.capitalize()}: {format_bytes(used)}/{format_bytes(budget)}"
+        if self.resource_mgr.snapshot is not None:
+            cache_info += f" | Instantánea: {self.resource_mgr.snapshot.hits}/{self.resource_mgr.snapshot.reads}"
+        if self.resource_mgr.store is not None:
+            store_stats = self.resource_mgr.store.stats()
+            cache_info += f" | Disco: {store_stats['hits']}/{store_stats['reads']}"
+        codec_stats = self.resource_mgr.translation_cache.codec.stats()
+        if codec_stats['compressed']:
+            cache_info += (f" | Compresión: x{codec_stats['ratio']:.1f}"
+                           f" ({codec_stats['decode_us']:.0f} µs/lectura)")
+        cache_info += f" | L2→L1: {self.resource_mgr.promotions}, L1→L2: {self.resource_mgr.demotions}"
+        cache_info += f" | Compartidas: {self.resource_mgr.inflight.shared}"
+        pool_stats = get_http_pool().stats()
+        cache_info += f" | Conexiones: {pool_stats['open_connections']} (reuso {pool_stats['reuse_ratio']:.0%})"
+        cache_info += f" | Ritmo: {get_rate_limiter().rate:.1f} req/s"
+        if self.backend.breaker is not None and not self.backend.breaker.allow():
+            cache_info += " | 📴 Modo sin conexión"
+        queued = [f"{stats['queued']} {cls}" for cls, stats in get_scheduler().stats().items() if stats['queued']]
+        if queued:
+            cache_info += f" | En cola: {', '.join(queued)}"
+        if _latency_tracker.hedges:
+            cache_info += f" | Hedges: {_latency_tracker.hedge_wins}/{_latency_tracker.hedges}"
         status_bar = self.statusBar()
         if status_bar:
             status_bar.showMessage(f"✅ Memoria: {memory_mb:.1f} MB | {cache_info}")
@@ -1387,15 +2510,21 @@ class ChineseTranslatorApp(QMainWindow):
     
     def closeEvent(self, a0):  # type: ignore
         """Maneja el cierre de la aplicación"""
-        # Detener workers si están corriendo
-        if self.translation_worker and self.translation_worker.isRunning():
-            self.translation_worker.terminate()
-        
-        if self.pinyin_worker and self.pinyin_worker.isRunning():
-            self.pinyin_worker.terminate()
+        # Pedir a los workers que se detengan (salen en su siguiente comprobación del token)
+        if self.job_token:
+            self.job_token.cancel()
+        
+        # Sin wait(): bloquearía el hilo de la UI. Mientras quede alguno en marcha se oculta la
+        # ventana y se vuelve a comprobar más tarde, sin cerrar la caché ni destruir hilos vivos
+        if any(worker.isRunning() for worker in self.active_workers):
+            self.hide()
+            QTimer.singleShot(250, self.close)
+            if a0:
+                a0.ignore()
+            return
         
         # Limpiar recursos
-        self.resource_mgr.clear_cache()
+        self.resource_mgr.close()
         
         if a0:
             a0.accept()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local de traducción simulada
+Sustituye al proveedor real para pruebas de carga y benchmarks sin red.
+
+Uso:
+    python stub_server.py --port 8765 --latency 120 --jitter 40 --error-rate 0.05 --rps 20
+
+Protocolo (GET o POST form-encoded):
+    /translate?sl=zh-CN&tl=es&q=texto  ->  {"translatedText": "..."}
+
+Respuestas de error:
+    429  límite de peticiones por segundo superado (cabecera Retry-After)
+    413  texto más largo que --max-chars
+    503  fallo aleatorio según --error-rate
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from typing import Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubSettings:
+    """Parámetros de comportamiento del servidor simulado"""
+
+    def __init__(self, latency_ms: float = 100, jitter_ms: float = 30, error_rate: float = 0.0,
+                 rps: float = 0.0, burst: int = 10, max_chars: int = 5000):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rps = rps  # 0 = sin límite
+        self.burst = burst
+        self.max_chars = max_chars
+
+
+class TokenBucket:
+    """Limitador de throughput del lado del servidor"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Consume un token si hay disponible"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+# Marcadores numerados de los lotes empaquetados: como un proveedor real, se copian sin traducir
+MARKER = re.compile(r'^(\[\[\d+\]\]\s*)?(.*)$')
+
+
+def fake_translate(text: str, target: str) -> str:
+    """Traducción determinista que conserva la estructura de líneas y los marcadores de segmento"""
+    lines = []
+    for line in text.split('\n'):
+        marker, content = MARKER.match(line).groups()
+        lines.append(f"{marker or ''}[{target}] {content}" if content.strip() else line)
+    return '\n'.join(lines)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Atiende /translate con latencia, errores y límites configurables"""
+    settings = StubSettings()
+    bucket: Optional[TokenBucket] = None
+    stats = {'requests': 0, 'throttled': 0, 'errors': 0}
+    stats_lock = threading.Lock()
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/stats':
+            with self.stats_lock:
+                self._send_json(200, dict(self.stats))
+            return
+        self._handle(parsed.path, parse_qs(parsed.query))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf-8')
+        self._handle(urlparse(self.path).path, parse_qs(body))
+
+    def _handle(self, path: str, params: dict):
+        if path != '/translate':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        with self.stats_lock:
+            self.stats['requests'] += 1
+
+        # Límite de throughput
+        if self.bucket and not self.bucket.try_acquire():
+            with self.stats_lock:
+                self.stats['throttled'] += 1
+            self._send_json(429, {'error': 'too many requests'}, {'Retry-After': '1'})
+            return
+
+        text = params.get('q', [''])[0]
+        target = params.get('tl', ['en'])[0]
+        if len(text) > self.settings.max_chars:
+            self._send_json(413, {'error': f'text longer than {self.settings.max_chars} chars'})
+            return
+
+        # Latencia simulada
+        delay = max(0.0, random.gauss(self.settings.latency_ms, self.settings.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        # Fallos aleatorios
+        if random.random() < self.settings.error_rate:
+            with self.stats_lock:
+                self.stats['errors'] += 1
+            self._send_json(503, {'error': 'simulated failure'})
+            return
+
+        self._send_json(200, {'translatedText': fake_translate(text, target)})
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass  # Silenciar log por petición
+
+
+def create_server(host: str = '127.0.0.1', port: int = 8765,
+                  settings: Optional[StubSettings] = None) -> ThreadingHTTPServer:
+    """Crea el servidor (sin arrancarlo) con la configuración indicada"""
+    settings = settings or StubSettings()
+    handler = type('ConfiguredStubHandler', (StubRequestHandler,), {
+        'settings': settings,
+        'bucket': TokenBucket(settings.rps, settings.burst) if settings.rps > 0 else None,
+        'stats': {'requests': 0, 'throttled': 0, 'errors': 0},
+        'stats_lock': threading.Lock(),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de traducción simulado para pruebas sin red")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=100, help="Latencia media en ms")
+    parser.add_argument('--jitter', type=float, default=30, help="Desviación de la latencia en ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probabilidad de error 503 (0-1)")
+    parser.add_argument('--rps', type=float, default=0.0, help="Peticiones por segundo permitidas (0 = sin límite)")
+    parser.add_argument('--burst', type=int, default=10, help="Ráfaga máxima del limitador")
+    parser.add_argument('--max-chars', type=int, default=5000, help="Tamaño máximo de texto por petición")
+    args = parser.parse_args()
+
+    settings = StubSettings(args.latency, args.jitter, args.error_rate, args.rps, args.burst, args.max_chars)
+    server = create_server(args.host, args.port, settings)
+    print(f"🧪 Servidor simulado en http://{args.host}:{args.port}/translate "
+          f"(latencia {args.latency}±{args.jitter} ms, errores {args.error_rate:.0%}, rps {args.rps or '∞'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()